@@ -0,0 +1,359 @@
+# bot/bench.py
+
+"""
+Description:
+    Banc de performance hors-ligne du pipeline de rapport :
+        python -m bot.bench [--channels 12 --messages 200 --repeat 5]
+        python -m bot.bench --save-baseline     → enregistre la référence
+    - generate_messages_by_channel() : buffer synthétique reproductible (graine)
+      N canaux × M messages, texte français réaliste, emojis, liens, bruit
+      ("ok", "merci"), annonces recopiées dans plusieurs canaux, doublons
+      consécutifs, horodatages UTC (avec fuseau, comme msg.created_at) étalés
+      sur les 72 dernières heures
+    - mesure format_messages_for_email (cache désactivé), format_messages_by_day,
+      les fenêtres 24h / 72h / n derniers, naive_summarize, save_messages_to_file
+      et cluster_topics (si numpy est installé)
+      → ops/s (médiane), meilleur temps, pic mémoire (tracemalloc)
+    - références : data/bench_baselines.json. Les temps y sont stockés relativement
+      à une boucle de calibration (indépendant de la machine, à peu près) ; une
+      mesure plus lente ou plus gourmande que la référence × (1 + tolérance)
+      fait échouer le banc (code de sortie 1).
+Uses: argparse, random, statistics, tracemalloc, bot.mails_management, bot.summarizer, bot.file_utils
+Args: (ligne de commande)  ||  Returns: code de sortie (0 = OK, 1 = régression)
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable, NamedTuple
+
+from bot.file_utils import save_messages_to_file
+from bot.ingestion import make_buffer_entry
+from bot.keywords import KeywordMatcher
+from bot.mails_management import format_messages_for_email
+from bot.summarizer import (
+    format_messages_by_day,
+    get_last_n_messages,
+    get_messages_last_24h,
+    get_messages_last_72h,
+    naive_summarize,
+)
+
+BASELINES_PATH = os.path.join("data", "bench_baselines.json")
+DEFAULT_TOLERANCE = 0.5
+MEMORY_SLACK_KIB = 64      # en dessous, un écart de pic mémoire n'est que du bruit
+
+# ---------- Générateur de buffer synthétique ----------
+
+CHANNEL_NAMES = [
+    "annonces", "reunions-mensuelles", "general", "projets", "entraide", "evenements",
+    "benevoles", "logistique", "communication", "tresorerie", "ateliers", "covoiturage",
+]
+AUTHORS = ["marie", "julien", "sophie", "karim", "lea", "thomas", "ines", "lucas", "camille", "hugo"]
+_SUBJECTS = [
+    "La réunion de jeudi", "Le compte rendu", "L'atelier vélo", "La permanence du samedi",
+    "Le budget prévisionnel", "La collecte de vêtements", "Le planning des bénévoles",
+    "L'assemblée générale", "La fête de quartier", "Le nouveau local",
+]
+_PREDICATES = [
+    "est déplacée à 19h", "est disponible sur le drive", "a besoin de deux volontaires",
+    "commence plus tôt cette semaine", "doit être validé avant vendredi",
+    "se tiendra dans la grande salle", "est reporté à la semaine prochaine",
+    "a été mis à jour avec vos remarques", "cherche encore quelqu'un pour les clés",
+]
+_TAILS = [
+    "Merci de confirmer votre présence", "N'oubliez pas vos gourdes",
+    "Pensez à prévenir si vous êtes en retard", "Les détails sont dans le document partagé",
+    "On en reparle à la prochaine réunion", "Urgent : répondez avant ce soir",
+    "Le lien est ci-dessous", "Bonne soirée à tous",
+]
+_EMOJIS = ["👍", "🎉", "🙏", "😅", "🚲", "📅", "✅", "🔥"]
+_NOISE = ["ok", "merci", "+1", "👍", "🎉", "thx"]
+_LINKS = [
+    "https://docs.example.org/compte-rendu",
+    "https://framadate.example.org/reunion-jeudi",
+    "https://drive.example.org/planning-benevoles.pdf",
+]
+BENCH_KEYWORDS = ["urgent", "réunion", "deadline", "assemblée générale"]
+
+
+def make_sentence(rnd: random.Random) -> str:
+    """Un message plausible (1 à 3 phrases, parfois un lien et un emoji)."""
+    parts = [f"{rnd.choice(_SUBJECTS)} {rnd.choice(_PREDICATES)}."]
+    for _ in range(rnd.randint(0, 2)):
+        parts.append(f"{rnd.choice(_TAILS)}.")
+    text = " ".join(parts)
+    if rnd.random() < 0.2:
+        text += f" {rnd.choice(_LINKS)}"
+    if rnd.random() < 0.25:
+        text += f" {rnd.choice(_EMOJIS)}"
+    return text
+
+
+def generate_messages_by_channel(
+    n_channels: int = 12,
+    n_messages: int = 200,
+    *,
+    seed: int = 0,
+    now: datetime | None = None,
+    important_ratio: float = 0.25,
+    noise_ratio: float = 0.1,
+    duplicate_ratio: float = 0.05,
+) -> dict:
+    """
+    Buffer {"important": {...}, "general": {...}} de n_channels canaux de n_messages
+    messages chacun (même graine + même `now` → même buffer).
+    duplicate_ratio : part des messages qui recopient une annonce déjà postée
+    ailleurs (ou répètent le message précédent du canal).
+    """
+    rnd = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    matcher = KeywordMatcher(BENCH_KEYWORDS)
+    n_important = max(1, round(n_channels * important_ratio)) if n_channels else 0
+    buffer: dict = {"important": {}, "general": {}}
+    posted: list[str] = []
+    message_id = 1_000_000_000_000_000_000
+
+    for i in range(n_channels):
+        base = CHANNEL_NAMES[i % len(CHANNEL_NAMES)]
+        name = base if i < len(CHANNEL_NAMES) else f"{base}-{i // len(CHANNEL_NAMES)}"
+        category = "important" if i < n_important else "general"
+        # horodatages croissants sur les 72 dernières heures
+        offsets = sorted((rnd.uniform(0, 72 * 3600) for _ in range(n_messages)), reverse=True)
+        entries = []
+        for offset in offsets:
+            roll = rnd.random()
+            if roll < noise_ratio:
+                content = rnd.choice(_NOISE)
+            elif roll < noise_ratio + duplicate_ratio and (posted or entries):
+                if entries and rnd.random() < 0.3:
+                    content = entries[-1]["content"]
+                else:
+                    content = rnd.choice(posted)
+            else:
+                content = make_sentence(rnd)
+                posted.append(content)
+            message_id += 1
+            entries.append(make_buffer_entry(
+                rnd.choice(AUTHORS), content, now - timedelta(seconds=offset), matcher, message_id,
+            ))
+        buffer[category][name] = entries
+    return buffer
+
+
+# ---------- Mesures ----------
+
+class BenchResult(NamedTuple):
+    name: str
+    ops_per_sec: float
+    median_s: float
+    best_s: float
+    peak_kib: float
+    rel: float             # médiane / temps de calibration
+    error: str | None = None
+
+
+def calibrate(repeat: int = 5) -> float:
+    """Meilleur temps (s) d'une charge Python pure fixe : l'unité des références."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        words = [f"mot{i % 97}" for i in range(20_000)]
+        counts: dict[str, int] = {}
+        for w in words:
+            counts[w] = counts.get(w, 0) + 1
+        " ".join(sorted(words)).split()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def measure(name: str, fn: Callable[[], object], *, repeat: int = 5, calib: float = 1.0) -> BenchResult:
+    """Médiane / meilleur de `repeat` appels, puis un appel sous tracemalloc pour le pic mémoire."""
+    timings = []
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()  # échauffement (imports paresseux, caches de regex)
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                fn()
+                timings.append(time.perf_counter() - t0)
+            tracemalloc.start()
+            try:
+                fn()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+    except Exception as e:
+        return BenchResult(name, 0.0, 0.0, 0.0, 0.0, 0.0, f"{type(e).__name__}: {e}")
+    median = statistics.median(timings)
+    return BenchResult(
+        name,
+        ops_per_sec=1.0 / median if median > 0 else float("inf"),
+        median_s=median,
+        best_s=min(timings),
+        peak_kib=peak / 1024,
+        rel=median / calib if calib > 0 else 0.0,
+    )
+
+
+def _cluster_topics(items: list[tuple[str, dict]]):
+    from bot.topics import cluster_topics, np
+    if np is None:
+        raise RuntimeError("numpy absent")
+    return cluster_topics(items)
+
+
+def bench_cases(messages_dict: dict, reports_dir: str) -> dict[str, Callable[[], object]]:
+    """{nom: appel} — chaque appel traite tout le buffer une fois."""
+    blobs = [
+        " ".join(m["content"] for m in msgs)
+        for channels in messages_dict.values()
+        for msgs in channels.values()
+    ]
+    items = [
+        (name, m)
+        for channels in messages_dict.values()
+        for name, msgs in channels.items()
+        for m in msgs
+    ]
+    return {
+        "cluster_topics": lambda: _cluster_topics(items),
+        "format_messages_for_email": lambda: format_messages_for_email(messages_dict, summary_cache=None),
+        "format_messages_by_day": lambda: format_messages_by_day(messages_dict),
+        "get_messages_last_24h": lambda: get_messages_last_24h(messages_dict),
+        "get_messages_last_72h": lambda: get_messages_last_72h(messages_dict),
+        "get_last_n_messages": lambda: get_last_n_messages(messages_dict, n=10),
+        "naive_summarize": lambda: [naive_summarize(b) for b in blobs],
+        "save_messages_to_file": lambda: save_messages_to_file(messages_dict, directory=reports_dir),
+    }
+
+
+def run_benchmarks(
+    n_channels: int = 12,
+    n_messages: int = 200,
+    *,
+    seed: int = 0,
+    repeat: int = 5,
+    only: list[str] | None = None,
+) -> tuple[float, list[BenchResult]]:
+    """Renvoie (temps de calibration, résultats)."""
+    messages_dict = generate_messages_by_channel(n_channels, n_messages, seed=seed)
+    calib = calibrate()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_rapports_") as reports_dir:
+        for name, fn in bench_cases(messages_dict, reports_dir).items():
+            if only and name not in only:
+                continue
+            results.append(measure(name, fn, repeat=repeat, calib=calib))
+    return calib, results
+
+
+# ---------- Références ----------
+
+def load_baselines(path: str = BASELINES_PATH) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baselines(params: dict, results: list[BenchResult], path: str = BASELINES_PATH) -> None:
+    data = {
+        "params": params,
+        "results": {
+            r.name: {"rel": round(r.rel, 4), "peak_kib": round(r.peak_kib, 1), "ops_per_sec": round(r.ops_per_sec, 2)}
+            for r in results if r.error is None
+        },
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: list[BenchResult], baselines: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """Régressions (temps relatif ou pic mémoire au-delà de référence × (1 + tolérance))."""
+    ref = baselines.get("results", {})
+    problems = []
+    for r in results:
+        base = ref.get(r.name)
+        if base is None:
+            continue
+        if r.error is not None:
+            problems.append(f"{r.name} : échec ({r.error})")
+            continue
+        if r.rel > base["rel"] * (1 + tolerance):
+            problems.append(
+                f"{r.name} : {r.rel / base['rel']:.2f}× plus lent que la référence"
+                f" ({r.ops_per_sec:.1f} ops/s, référence ≈ {base.get('ops_per_sec', 0):.1f})"
+            )
+        if r.peak_kib > base["peak_kib"] * (1 + tolerance) + MEMORY_SLACK_KIB:
+            problems.append(
+                f"{r.name} : pic mémoire {r.peak_kib:.0f} KiB (référence {base['peak_kib']:.0f} KiB)"
+            )
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bot.bench", description=__doc__.split("\n")[2].strip())
+    parser.add_argument("--channels", type=int, default=12)
+    parser.add_argument("--messages", type=int, default=200, help="messages par canal")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="noms des mesures à lancer")
+    parser.add_argument("--baseline", default=BASELINES_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true", help="remplace la référence par cette mesure")
+    args = parser.parse_args(argv)
+
+    params = {"channels": args.channels, "messages": args.messages, "seed": args.seed}
+    calib, results = run_benchmarks(
+        args.channels, args.messages, seed=args.seed, repeat=args.repeat, only=args.only,
+    )
+    total = args.channels * args.messages
+    print(f"[BENCH] {args.channels} canaux × {args.messages} messages ({total}), calibration {calib * 1000:.1f} ms")
+    for r in results:
+        if r.error is not None:
+            print(f"[BENCH] {r.name:<26} ignoré : {r.error}")
+            continue
+        print(
+            f"[BENCH] {r.name:<26} {r.ops_per_sec:10.1f} ops/s  médiane {r.median_s * 1000:8.2f} ms"
+            f"  meilleur {r.best_s * 1000:8.2f} ms  pic {r.peak_kib:9.0f} KiB"
+        )
+
+    if args.save_baseline:
+        save_baselines(params, results, args.baseline)
+        print(f"[BENCH] Référence enregistrée dans {args.baseline}.")
+        return 0
+
+    baselines = load_baselines(args.baseline)
+    if not baselines:
+        print(f"[BENCH] Aucune référence ({args.baseline}) : lancer avec --save-baseline.")
+        return 0
+    if baselines.get("params") != params:
+        print(f"[BENCH] Référence mesurée avec {baselines.get('params')} : comparaison ignorée.")
+        return 0
+    problems = compare(results, baselines, args.tolerance)
+    for p in problems:
+        print(f"[REGRESSION] {p}", file=sys.stderr)
+    if problems:
+        print(f"[BENCH] ÉCHEC : {len(problems)} régression(s) (tolérance {args.tolerance:.0%}).", file=sys.stderr)
+        return 1
+    print(f"[BENCH] OK : aucune régression (tolérance {args.tolerance:.0%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# bot/classification.py
+
+"""
+Description:
+    Classement des canaux (important / général / exclu) indexé par ID de canal.
+    Le chemin chaud (on_message, backfill) fait UNE recherche dans un dict au
+    lieu de parcourir les listes de noms. La table est reconstruite seulement
+    quand les listes changent (#bot-storage) ou sur les événements
+    on_guild_channel_create / _update / _delete.
+    Un fil (thread, post de forum) prend le classement de son canal parent.
+Uses: typing.NamedTuple
+Args: (selon la méthode)  ||  Returns: ChannelClass(category, excluded, name)
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+
+class ChannelClass(NamedTuple):
+    category: str   # "important" ou "general"
+    excluded: bool
+    name: str       # nom courant du canal (clé du buffer messages_by_channel)
+
+
+class ChannelClassifier:
+    """Table {channel_id: ChannelClass}, construite depuis les listes de noms."""
+
+    def __init__(self, important=(), excluded=()):
+        self._important = frozenset(important)
+        self._excluded = frozenset(excluded)
+        self._by_id: dict[int, ChannelClass] = {}
+        self.rebuilds = 0
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def _classify_name(self, name: str) -> ChannelClass:
+        return ChannelClass(
+            category="important" if name in self._important else "general",
+            excluded=name in self._excluded,
+            name=name,
+        )
+
+    def rebuild(self, guilds, important, excluded) -> None:
+        """Recalcule toute la table (listes modifiées ou démarrage)."""
+        self._important = frozenset(important)
+        self._excluded = frozenset(excluded)
+        self._by_id = {
+            channel.id: self._classify_name(channel.name)
+            for guild in guilds
+            for channel in [*guild.text_channels, *getattr(guild, "forums", [])]
+        }
+        self.rebuilds += 1
+
+    def update_channel(self, channel) -> ChannelClass:
+        """Canal créé ou renommé."""
+        cls = self._classify_name(channel.name)
+        self._by_id[channel.id] = cls
+        return cls
+
+    def remove_channel(self, channel_id: int) -> None:
+        self._by_id.pop(channel_id, None)
+
+    def lookup(self, channel) -> ChannelClass:
+        """Classement d'un canal : O(1) ; canal inconnu → classé puis mémorisé."""
+        if is_thread(channel):
+            return self._lookup_parent(channel)
+        cls = self._by_id.get(channel.id)
+        if cls is None:
+            cls = self.update_channel(channel)
+        return cls
+
+    def _lookup_parent(self, thread) -> ChannelClass:
+        """Fil : classement du parent (non mémorisé par fil, ils sont nombreux et éphémères)."""
+        cls = self._by_id.get(thread.parent_id)
+        if cls is not None:
+            return cls
+        parent = getattr(thread, "parent", None)
+        if parent is not None:
+            return self.update_channel(parent)
+        return self._classify_name(thread.name)
+
+
+def is_thread(channel) -> bool:
+    """Vrai pour un discord.Thread (fil ou post de forum) : il a un parent_id."""
+    return isinstance(getattr(channel, "parent_id", None), int)
+
+
+def rebuild_classification(bot) -> None:
+    """Reconstruit bot.channel_classifier depuis les listes courantes du bot."""
+    classifier = getattr(bot, "channel_classifier", None)
+    if isinstance(classifier, ChannelClassifier):
+        classifier.rebuild(
+            getattr(bot, "guilds", []),
+            getattr(bot, "important_channels", []),
+            getattr(bot, "excluded_channels", []),
+        )
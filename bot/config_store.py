@@ -0,0 +1,102 @@
+# bot/config_store.py
+
+"""
+Description:
+    Copie locale (disque) de la configuration stockée dans #bot-storage.
+    - Les listes sont lues instantanément au démarrage → le bot classe les
+      canaux avant même d'avoir joint Discord.
+    - data/*.txt (format channel_lists : un nom par ligne, suivis par git)
+      ne servent que de valeurs initiales : ils ne sont jamais réécrits.
+    - data/config_state.json (ignoré par git) retient, par liste, la dernière
+      copie connue, la dernière version synchronisée avec Discord, un drapeau
+      "dirty" (changement local pas encore écrit sur Discord) et les
+      ajouts/retraits en attente, rejoués un par un à la réconciliation.
+    - Chaque changement y est écrit tout de suite (write-through), puis
+      envoyé à #bot-storage par le StoreWriter.
+Uses: json, os, bot.channel_lists
+Args: (selon la méthode)  ||  Returns: (listes de chaînes, état de synchro)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+
+from bot.channel_lists import load_channels
+
+log = logging.getLogger(__name__)
+
+DATA_DIR = "data"
+LOCAL_LIST_FILES = {
+    "important": "important_channels.txt",
+    "excluded": "excluded_channels.txt",
+    "keywords": "keywords.txt",
+}
+STATE_FILE = "config_state.json"
+
+
+class LocalConfigStore:
+    """Listes de config sur disque + état de synchronisation avec #bot-storage."""
+
+    def __init__(self, data_dir: str = DATA_DIR):
+        self.data_dir = data_dir
+        self._state_path = os.path.join(data_dir, STATE_FILE)
+        self._state = self._read_state()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.data_dir, LOCAL_LIST_FILES[key])
+
+    def _read_state(self) -> dict:
+        try:
+            with open(self._state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write_state(self) -> None:
+        with open(self._state_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, indent=2)
+
+    def load(self) -> dict[str, list[str]]:
+        """Toutes les listes locales : copie d'état si connue, sinon data/*.txt (vides si absent)."""
+        lists = {}
+        for key in LOCAL_LIST_FILES:
+            data = (self._state.get(key) or {}).get("data")
+            lists[key] = list(data) if isinstance(data, list) else load_channels(self._path(key))
+        return lists
+
+    def state(self, key: str) -> dict:
+        st = self._state.get(key) or {}
+        return {"version": int(st.get("version", 0)), "dirty": bool(st.get("dirty", False))}
+
+    def pending_ops(self, key: str) -> dict | None:
+        """Ajouts/retraits locaux pas encore sur Discord ({"add": set, "remove": set}), None si inconnus."""
+        ops = (self._state.get(key) or {}).get("ops")
+        if not isinstance(ops, dict):
+            return None
+        return {"add": set(ops.get("add", [])), "remove": set(ops.get("remove", []))}
+
+    def save(self, key: str, data: list[str], *, version: int | None = None, dirty: bool = False,
+             ops: dict | None = None) -> None:
+        """
+        Écrit la liste dans config_state.json. version=None conserve la dernière
+        version synchronisée connue ; dirty=True signale un changement pas encore
+        sur Discord, `ops` étant alors l'ensemble des ajouts/retraits en attente.
+        """
+        try:
+            os.makedirs(self.data_dir, exist_ok=True)
+            st = self.state(key)
+            if version is not None:
+                st["version"] = int(version)
+            st["dirty"] = dirty
+            st["data"] = list(data)
+            if dirty and ops is not None:
+                st["ops"] = {"add": sorted(ops["add"]), "remove": sorted(ops["remove"])}
+            elif dirty and "ops" in (self._state.get(key) or {}):
+                st["ops"] = self._state[key]["ops"]
+            self._state[key] = st
+            self._write_state()
+        except OSError as e:
+            log.warning("[CONFIG] Écriture locale de la config '%s' impossible : %s", key, e)
@@ -4,63 +4,106 @@ Description:
     Fichier principal (core) qui initialise le bot Discord,
     déclare les événements globaux et lance le bot.
     Les commandes (!xxx) sont gérées via une extension (discord_bot_commands).
+    Démarrage court : modules lourds (mails_management, health, journal)
+    importés à la demande, backfill en tâche de fond (bot.startup), durée
+    du démarrage affichée au premier on_ready.
 """
 
 from __future__ import annotations
 
+import time
+
+_T0 = time.perf_counter()   # début du démarrage (bot.startup.StartupClock)
+
 import asyncio
 import logging
-import traceback
 import sys
 import signal
 import contextlib
-from datetime import datetime, timezone, timedelta
-import zoneinfo
+import functools
+import os
 
 import discord
 from discord.ext import commands
 
 # ---------------------------------------------------------------------
-# 1) Logging (moins verbeux)
+# 1) Logging : file + thread d'écriture (bot.logging_setup, configuré au lancement)
+#    LOG_LEVEL=DEBUG pour plus de détails, LOG_FORMAT=text pour du texte brut
 # ---------------------------------------------------------------------
-logging.basicConfig(
-    level=logging.INFO,  # mets DEBUG si tu veux plus de détails
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
-# Réduire le bruit de certains loggers
-logging.getLogger("discord.gateway").setLevel(logging.WARNING)
-logging.getLogger("discord.client").setLevel(logging.INFO)
-logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
+log = logging.getLogger(__name__)
 
 def my_excepthook(exc_type, exc_value, exc_traceback):
-    traceback.print_exception(exc_type, exc_value, exc_traceback)
+    log.critical("[FATAL] Exception non interceptée", exc_info=(exc_type, exc_value, exc_traceback))
 
 sys.excepthook = my_excepthook
 
 # ---------------------------------------------------------------------
 # 2) Config & imports projet
 # ---------------------------------------------------------------------
-from bot.env_config import get_discord_token
+from bot.env_config import (
+    get_discord_token,
+    get_ingest_queue_maxsize,
+    get_ingest_policy,
+    get_thread_crawl_concurrency,
+    get_bot_storage_channel_id,
+    get_shard_count,
+    get_bot_mode,
+    get_journal_path,
+    get_health_address,
+    get_loop_lag_threshold,
+    get_memory_budgets,
+    get_tracemalloc_frames,
+)
 # ✅ Getters email viennent d'env_config
 from bot.env_config import (
     get_email_address,
     get_email_password,
     get_recipient_email,
 )
-# ✅ Fonctions mail & formatage viennent de mails_management
-from bot.mails_management import (
-    send_email,
-    format_messages_for_email,
+# ✅ Fonctions mail & formatage (mails_management) et sauvegarde (file_utils) :
+#    importées dans do_daily_summary_job, au premier rapport
+from bot.ingestion import IngestionPipeline, looks_like_command, make_buffer_entry
+from bot.keywords import KeywordMatcher
+from bot.classification import ChannelClassifier, rebuild_classification
+from bot.message_index import MessageIndex
+from bot.threads import ThreadCheckpoints, crawl_threads
+from bot.permissions import ReadableChannels, readable
+from bot.scheduler import run_daily_at, run_daily_07h_europe_brussels  # noqa: F401
+from bot.guilds import GuildRegistry, guild_recipients, guild_states, load_guild_configs
+from bot.ipc import notify_worker
+from bot.loop_monitor import LoopLagMonitor
+from bot.memory import (
+    INGEST_BUFFER_BUDGET_MB,
+    INGEST_CHANNEL_BUDGET_KB,
+    SPILL_FILENAME,
+    BufferMemory,
+    start_tracing,
+)
+from bot.profiling import profiled_job
+from bot.logging_setup import setup_logging, stop_logging
+from bot.startup import BackfillProgress, StartupClock, preload_modules
+from bot.metrics import (
+    REGISTRY,
+    BACKFILL_CHANNEL_SECONDS,
+    BACKFILL_MESSAGES,
+    BUFFER_BYTES,
+    BUFFER_MESSAGES,
+    DAILY_LAST_RUN,
+    DAILY_STAGE_SECONDS,
+    INGEST_QUEUE_DEPTH,
+    STARTUP_SECONDS,
+    smtp_result,
 )
-from bot.file_utils import save_messages_to_file
+
+STARTUP = StartupClock(_T0)
+STARTUP.mark("imports")
 
 intents = discord.Intents.default()
 intents.messages = True
 intents.message_content = True
 intents.guilds = True
 
-bot: commands.Bot | None = None  # affecté dans main()
+bot: commands.AutoShardedBot | None = None  # affecté dans main()
 
 # Événement pour arrêt propre (SIGINT/SIGTERM/Ctrl+C)
 shutdown_event = asyncio.Event()
@@ -72,123 +115,381 @@ def _handle_signal():
 
 # ---------------------------------------------------------------------
 # 3) Scheduler “propre” (07:00 Europe/Brussels via asyncio.create_task)
+#    → bot.scheduler (partagé avec bot.worker)
 # ---------------------------------------------------------------------
-async def run_daily_07h_europe_brussels(job_coro):
-    """
-    Lance `job_coro` chaque jour à 07:00 Europe/Brussels.
-    `job_coro` est une coroutine SANS argument.
+@profiled_job("daily")
+async def do_daily_summary_job(state=None):
     """
-    log = logging.getLogger(__name__)
-    tz = zoneinfo.ZoneInfo("Europe/Brussels")
-    await asyncio.sleep(0)  # yield
-
-    while True:
-        now = datetime.now(tz)
-        target = now.replace(hour=7, minute=0, second=0, microsecond=0)
-        if target <= now:
-            target = target + timedelta(days=1)
-
-        sleep_s = (target - now).total_seconds()
-        log.info("[CORE] Prochaine exécution à %s (dans %d s)", target.isoformat(), int(sleep_s))
-
-        try:
-            await asyncio.sleep(sleep_s)
-            await job_coro()
-        except asyncio.CancelledError:
-            log.info("[CORE] Tâche quotidienne annulée — arrêt propre.")
-            raise
-        except Exception:
-            log.exception("[CORE] Erreur dans la tâche quotidienne — on continue.")
-
-async def do_daily_summary_job():
+    Construit le résumé et envoie l'e-mail quotidien d'une guild.
+    Utilise state.messages_by_channel (contexte de guild, ou le bot), déjà alimenté ailleurs.
     """
-    Construit le résumé et envoie l'e-mail quotidien.
-    Utilise bot.messages_by_channel, déjà alimenté ailleurs.
-    """
-    assert bot is not None
-    log = logging.getLogger(__name__)
-
-    # 1) Construire le résumé (tout le buffer courant)
-    messages_dict = getattr(bot, "messages_by_channel", {})
-    summary = format_messages_for_email(messages_dict)
+    state = state if state is not None else bot
+    assert state is not None
+    from bot.mails_management import send_email, format_messages_for_email
+    from bot.file_utils import save_messages_to_file
+
+    # 1) Construire le résumé (tout le buffer courant, + messages débordés sur disque)
+    messages_dict = getattr(state, "messages_by_channel", {})
+    memory = getattr(state, "buffer_memory", None)
+    report_dict = memory.merged_with_spill(messages_dict) if memory is not None else messages_dict
+    with DAILY_STAGE_SECONDS.time(stage="format"):
+        summary = format_messages_for_email(report_dict)
+    matcher = getattr(state, "keyword_matcher", None)
+    if matcher is not None:
+        st = matcher.stats()
+        log.info("[KEYWORDS] %d/%d messages avec mot-clé — %.1f µs/message (%d états)",
+                 st["matched"], st["scanned"], st["avg_us_per_message"], st["states"])
 
     # 2) Paramètres e-mail
     from_addr = get_email_address()
     password  = get_email_password()
-    to_addr   = get_recipient_email()
+    recipients = guild_recipients(state, get_recipient_email)
 
-    # 3) Envoi
-    try:
-        await send_email(summary, from_addr, password, to_addr)
-        log.info("[MAIL] Résumé envoyé à %s.", to_addr)
-    except Exception:
-        log.exception("[MAIL] Échec de l'envoi du résumé (SMTP).")
+    # 3) Envoi (une adresse SMTP par destinataire)
+    if not recipients:
+        log.warning("[MAIL] %r : aucun destinataire configuré (data/guilds.json), envoi ignoré.", state)
+    else:
+        t0 = time.perf_counter()
+        try:
+            with DAILY_STAGE_SECONDS.time(stage="smtp"):
+                await send_email(summary, from_addr, password, recipients)
+            smtp_result(True, time.perf_counter() - t0)
+            log.info("[MAIL] Résumé envoyé à %s.", ", ".join(recipients))
+        except Exception:
+            smtp_result(False, time.perf_counter() - t0)
+            log.exception("[MAIL] Échec de l'envoi du résumé (SMTP).")
 
     # 4) Sauvegarde locale (log JSON)
+    config = getattr(state, "guild_config", None)
     try:
-        save_messages_to_file(messages_dict)
+        with DAILY_STAGE_SECONDS.time(stage="save"):
+            if config is not None:
+                save_messages_to_file(report_dict, directory=config.reports_dir)
+            else:
+                save_messages_to_file(report_dict)
+        if memory is not None:
+            memory.clear_spill()  # archivés avec ce rapport
     except Exception:
         log.exception("[SAVE] Échec de la sauvegarde du JSON.")
 
+    # 5) Purge des messages supprimés (pierres tombales) du buffer
+    index = getattr(state, "message_index", None)
+    if index is not None:
+        removed = index.compact(messages_dict)
+        if removed:
+            log.info("[CORE] %d message(s) supprimé(s) retiré(s) du buffer.", removed)
+    if memory is not None:
+        memory.recount(messages_dict)
+    DAILY_LAST_RUN.set(time.time())
+
 # ---------------------------------------------------------------------
 # 4) Utilitaires
 # ---------------------------------------------------------------------
-async def populate_initial_messages(bot: commands.Bot, limit: int = 20):
+@profiled_job("populate")
+async def populate_initial_messages(bot: commands.Bot, limit: int = 20, enforce_budget: bool = True):
     """
-    Récupère `limit` messages récents dans chaque salon texte et
-    remplit bot.messages_by_channel[category][channel_name].
+    Récupère `limit` messages récents dans chaque salon texte, puis dans
+    chaque fil / post de forum (actif ou archivé récemment, depuis le
+    dernier checkpoint), et remplit bot.messages_by_channel[category][channel_name].
+    `bot` est normalement le contexte d'une guild (bot.guilds == [sa guild]).
+    Tourne en tâche de fond pendant que l'ingestion live alimente le même
+    buffer : les messages déjà reçus (même id) sont ignorés et l'historique,
+    plus ancien, est inséré avant eux. Avancement dans bot.backfill.
     """
+    progress = getattr(bot, "backfill", None) or BackfillProgress()
     if not bot.guilds:
-        print("[WARN] Aucune guild détectée (le bot est-il invité ?)")
+        log.warning("[INIT] Aucune guild détectée (le bot est-il invité ?)")
+        progress.finish(failed=True)
         return
 
     guild = bot.guilds[0]
-    excluded = getattr(bot, "excluded_channels", [])
-    important = getattr(bot, "important_channels", [])
+    classifier = bot.channel_classifier
+    matcher = getattr(bot, "keyword_matcher", None) or KeywordMatcher()
+    index = bot.message_index
 
-    for channel in guild.text_channels:
-        channel_name = channel.name
-        if channel_name in excluded:
-            continue
+    # seulement les salons lisibles (pas d'appel history() voué au Forbidden)
+    channels = [c for c in readable(bot, guild.text_channels) if not classifier.lookup(c).excluded]
+    progress.start(len(channels))
+    for channel in channels:
+        cls = classifier.lookup(channel)
 
-        category = "important" if (channel_name in important) else "general"
+        category = cls.category
+        channel_name = cls.name
 
         if channel_name not in bot.messages_by_channel[category]:
             bot.messages_by_channel[category][channel_name] = []
 
         collected = []
+        skipped = 0
         try:
-            async for msg in channel.history(limit=limit, oldest_first=False):
-                if msg.author.bot:
-                    continue
-                collected.append({
-                    "author":    msg.author.name,
-                    "content":   msg.content,
-                    "timestamp": msg.created_at
-                })
+            with BACKFILL_CHANNEL_SECONDS.time(channel=channel_name):
+                async for msg in channel.history(limit=limit, oldest_first=False):
+                    if msg.author.bot:
+                        continue
+                    if msg.id in index:
+                        skipped += 1
+                        continue
+                    collected.append(make_buffer_entry(msg.author.name, msg.content, msg.created_at, matcher, msg.id))
         except discord.Forbidden:
-            print(f"[WARN] Pas de permission pour lire #{channel_name}")
+            log.warning("[INIT] Pas de permission pour lire #%s", channel_name, extra={"channel": channel_name})
+            bot.readable_channels.remove_channel(channel)
+            progress.channel_done(0)
             continue
+        BACKFILL_MESSAGES.inc(len(collected), category=category)
 
+        # history() a rendu du plus récent au plus ancien ; les messages live
+        # arrivés entre-temps sont plus récents : l'historique passe devant
         collected.reverse()
-        bot.messages_by_channel[category][channel_name].extend(collected)
+        bot.messages_by_channel[category][channel_name][:0] = collected
+        for entry in collected:
+            index.add(entry["id"], category, channel_name, entry)
+        progress.channel_done(len(collected), skipped)
+
+    # Fils et posts de forum (classés comme leur canal parent)
+    progress.threads()
+    thread_entries = await crawl_threads(
+        bot, guild,
+        limit=limit,
+        concurrency=get_thread_crawl_concurrency(),
+        checkpoints=ThreadCheckpoints(os.path.join(bot.local_config.data_dir, "thread_checkpoints.json")),
+    )
+    skipped = 0
+    for category, channel_name, entry in thread_entries:
+        if entry["id"] in index:
+            skipped += 1
+            continue
+        bot.messages_by_channel[category].setdefault(channel_name, []).append(entry)
+        index.add(entry["id"], category, channel_name, entry)
+        BACKFILL_MESSAGES.inc(category=category)
+    progress.add_messages(len(thread_entries) - skipped, skipped)
+
+    memory = getattr(bot, "buffer_memory", None)
+    if memory is not None:
+        memory.recount(bot.messages_by_channel)
+        if enforce_budget:
+            memory.enforce(bot.messages_by_channel, bot.message_index)
+
+    progress.finish()
+    st = matcher.stats()
+    log.info("[INIT] populate_initial_messages terminé : %s (mots-clés : %d/%d messages, %.1f µs/message)",
+             progress.summary(), st["matched"], st["scanned"], st["avg_us_per_message"])
+
+def init_bot_state(bot: commands.Bot):
+    """État hors guild (messages privés sans guild historique), aussi utilisé par bot.loadtest."""
+    bot.messages_by_channel = {"important": {}, "general": {}}
+    # Valeurs par défaut pour éviter AttributeError avant le chargement du store
+    bot.important_channels = []
+    bot.excluded_channels = []
+    bot.keywords = []
+    bot.keyword_matcher = KeywordMatcher()
+    bot.channel_classifier = ChannelClassifier()
+    bot.message_index = MessageIndex()
+    bot.readable_channels = ReadableChannels()
+    bot.last_message_at = None   # /healthz : secondes depuis le dernier message
+    bot.loop_monitor = None      # LoopLagMonitor (main), résumé dans !stats et /healthz
+    bot.buffer_memory = None     # BufferMemory par guild (start_guild)
+
+def collect_guild_gauges():
+    """Collecteur de métriques : profondeur de file et taille du buffer de chaque guild."""
+    if bot is None:
+        return
+    INGEST_QUEUE_DEPTH.clear()
+    BUFFER_MESSAGES.clear()
+    for state in guild_states(bot):
+        name = getattr(getattr(state, "guild", None), "name", None) or "hors-guild"
+        ingestion = getattr(state, "ingestion", None)
+        if ingestion is not None:
+            INGEST_QUEUE_DEPTH.set(ingestion.queue.qsize(), guild=name)
+        for category, channels in getattr(state, "messages_by_channel", {}).items():
+            BUFFER_MESSAGES.set(sum(len(msgs) for msgs in channels.values()), guild=name, category=category)
+        memory = getattr(state, "buffer_memory", None)
+        if memory is not None:
+            per_category: dict[str, int] = {}
+            for (category, _channel), size in memory.bytes.items():
+                per_category[category] = per_category.get(category, 0) + size
+            for category, size in per_category.items():
+                BUFFER_BYTES.set(size, guild=name, category=category)
+
+async def sync_store_in_background(bot: commands.Bot):
+    """Charge #bot-storage et le réconcilie avec la copie locale, sans bloquer on_ready."""
+    try:
+        # import tardif pour éviter les cycles
+        from bot.discord_bot_commands import ensure_storage_loaded
+        await ensure_storage_loaded(bot)
+        log.info("[CORE] bot-storage chargé -> important: %s excluded: %s",
+                 bot.important_channels, bot.excluded_channels)
+    except Exception as e:
+        log.warning("[CORE] ensure_storage_loaded a échoué (config locale conservée) : %s", e)
+
+def _watch_backfill(state, task: asyncio.Task) -> None:
+    """Backfill interrompu (exception, annulation) → progression marquée "failed"."""
+    def done(t: asyncio.Task) -> None:
+        if t.cancelled():
+            state.backfill.finish(failed=True)
+        elif t.exception() is not None:
+            state.backfill.finish(failed=True)
+            log.error("[INIT] Backfill de %r interrompu", state, exc_info=t.exception())
+    task.add_done_callback(done)
+
+async def _refresh_worker(journal):
+    """Prévient le worker une fois la guild écrite dans le journal (thread d'écriture)."""
+    await asyncio.to_thread(journal.flush)
+    await notify_worker({"op": "refresh"})
+
+async def populate_and_journal(state, limit: int = 20):
+    """
+    Backfill de la guild, copie du buffer dans le journal (doublons ignorés),
+    puis seulement application des budgets mémoire : rien n'est oublié avant
+    d'être journalisé.
+    """
+    await populate_initial_messages(state, limit=limit, enforce_budget=False)
+    state.journal.append(state.guild_id, [
+        (category, channel_name, entry)
+        for category, channels in state.messages_by_channel.items()
+        for channel_name, msgs in channels.items()
+        for entry in msgs
+    ])
+    memory = getattr(state, "buffer_memory", None)
+    if memory is not None:
+        memory.enforce(state.messages_by_channel, state.message_index)
+
+async def start_guild(guild: discord.Guild):
+    """
+    Démarre une guild (connexion ou arrivée dans une nouvelle guild) :
+    config locale, classement, file d'ingestion, #bot-storage, backfill et
+    envoi quotidien, tous propres à la guild. Rien n'est attendu ici : la
+    file d'ingestion et les commandes marchent tout de suite, l'envoi
+    quotidien est planifié d'emblée, #bot-storage et le backfill tournent
+    en tâche de fond (une grosse guild ne retarde pas les autres).
+    """
+    state, created = bot.guild_contexts.ensure(guild)
+    if not created:
+        rebuild_classification(state)
+        state.readable_channels.rebuild(state.guilds)
+        return state
+    config = state.guild_config
+
+    # Copie locale de la config (data/*.txt ou data/guilds/<id>/*.txt) : sans réseau
+    # (import tardif pour éviter les cycles)
+    from bot.discord_bot_commands import apply_local_config
+    local_lists = apply_local_config(state)
+    log.info("[CORE] %s : config locale chargée -> important: %s excluded: %s",
+             guild.name, local_lists["important"], local_lists["excluded"])
+
+    # Table de classement des canaux + canaux lisibles (le cache de la guild est prêt)
+    rebuild_classification(state)
+    state.readable_channels.rebuild(state.guilds)
+
+    # Pipeline d'ingestion de la guild : on_message ne fait que mettre en file
+    state.ingestion = IngestionPipeline(
+        state,
+        maxsize=get_ingest_queue_maxsize(),
+        policy=get_ingest_policy(),
+        spill_path=os.path.join(config.data_dir, "ingestion_spill.jsonl"),
+    )
+    state.ingestion.start()
+
+    # Comptabilité mémoire du buffer + budgets (MEMORY_*), débordement dans le dossier de la guild.
+    # Mode ingest : rien ne purge le buffer (pas de rapport ici) → budgets par défaut, et
+    # "evict" suffit (tout est déjà dans le journal)
+    journal = getattr(bot, "journal", None)
+    if journal is not None:
+        budgets = get_memory_budgets(INGEST_CHANNEL_BUDGET_KB, INGEST_BUFFER_BUDGET_MB)
+        budgets["policy"] = "evict"
+    else:
+        budgets = get_memory_budgets()
+    state.buffer_memory = BufferMemory(
+        **budgets,
+        spill_path=os.path.join(config.data_dir, SPILL_FILENAME),
+    )
+
+    # Réconcilier avec #bot-storage en arrière-plan
+    state.store_sync_task = asyncio.create_task(sync_store_in_background(state))
+    state.backfill = BackfillProgress(guild.name)
+
+    # Mode deux processus : chaque lot va aussi au journal ; les rapports sont au worker
+    if journal is not None:
+        journal.set_guild(guild.id, guild.name, config._asdict())
+        state.ingestion.sinks.append(journal.sink(guild.id))
+        state.populate_task = asyncio.create_task(populate_and_journal(state, limit=20))
+        _watch_backfill(state, state.populate_task)
+        asyncio.create_task(_refresh_worker(journal))
+        return state
+
+    # Tâche planifiée, puis pré-fetch des messages (create_task → Task annulable/awaitable)
+    hour, minute = config.daily_at
+    state.daily_task = asyncio.create_task(
+        run_daily_at(functools.partial(do_daily_summary_job, state), hour, minute, name=guild.name)
+    )
+    log.info("[CORE] %s : daily_task prête (%02d:%02d).", guild.name, hour, minute)
+    state.populate_task = asyncio.create_task(populate_initial_messages(state, limit=20))
+    _watch_backfill(state, state.populate_task)
+    return state
+
+async def stop_guild(state):
+    """Arrête les tâches d'une guild, vide sa file d'ingestion et écrit sa config en attente."""
+    for name in ("daily_task", "populate_task", "store_sync_task"):
+        task = getattr(state, name, None)
+        if task:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await task
+
+    # Vider la file d'ingestion dans le buffer
+    ingestion = getattr(state, "ingestion", None)
+    if ingestion is not None:
+        with contextlib.suppress(Exception):
+            await ingestion.stop()
+
+    # Écrire les changements de config encore en attente (#bot-storage)
+    writer = getattr(state, "store_writer", None)
+    if writer is not None and writer.pending:
+        try:
+            await writer.flush()
+        except Exception:
+            log.exception("[CORE] Flush de #bot-storage échoué à l'arrêt.")
 
-    print("[INIT] populate_initial_messages terminé")
+async def on_message(message: discord.Message):
+    """
+    Chemin rapide : une mise en file dans la file de la guild (le travail est
+    fait par son consommateur, par lots), puis dispatch des commandes
+    seulement si le message commence par le préfixe.
+    """
+    if message.author == bot.user:
+        return
+    bot.last_message_at = time.time()
+    if message.guild is not None:
+        state = bot.guild_contexts.get(message.guild.id)
+        if state is not None:
+            state.ingestion.submit(message)
+    if looks_like_command(bot, message):
+        await bot.process_commands(message)
 
 # ---------------------------------------------------------------------
 # 5) Point d'entrée principal
 # ---------------------------------------------------------------------
 async def main():
     global bot
-    print("=== DEBUG: main() appelé ===")
+    log.debug("[CORE] main() appelé")
 
-    bot = commands.Bot(command_prefix="!", intents=intents)
+    # AutoShardedBot : une seule guild → un shard ; beaucoup de guilds → shards répartis
+    bot = commands.AutoShardedBot(command_prefix="!", intents=intents, shard_count=get_shard_count())
 
-    # Mémoire interne
-    bot.messages_by_channel = {"important": {}, "general": {}}
-    # Valeurs par défaut pour éviter AttributeError avant le chargement du store
-    bot.important_channels = []
-    bot.excluded_channels = []
+    # État par guild (buffer, listes, #bot-storage, file d'ingestion, envoi quotidien)
+    bot.guild_contexts = GuildRegistry(bot, load_guild_configs(), get_bot_storage_channel_id())
+
+    # BOT_MODE=ingest : ce processus ne fait qu'ingérer (journal SQLite) ;
+    # rendu, archivage et e-mails sont faits par `python -m bot.worker`
+    bot.journal = None
+    if get_bot_mode() == "ingest":
+        from bot.journal import MessageJournal
+        bot.journal = MessageJournal(get_journal_path())
+        bot.journal.start_writer()  # écritures SQLite hors de la boucle du gateway
+
+    init_bot_state(bot)
+    bot.startup = STARTUP
+    REGISTRY.add_collector(collect_guild_gauges)
+    start_tracing(get_tracemalloc_frames())
 
     # Installer les handlers de signaux (Ctrl+C / kill)
     loop = asyncio.get_running_loop()
@@ -202,7 +503,7 @@ async def main():
     # Listener global d'erreurs de commandes
     @commands.Cog.listener()
     async def on_command_error(ctx, error):
-        traceback.print_exc()
+        log.error("[CORE] Erreur de commande %s", ctx.command, exc_info=(type(error), error, error.__traceback__))
         try:
             await ctx.send(f"Une erreur est survenue : {error}")
         except Exception:
@@ -212,65 +513,63 @@ async def main():
 
     @bot.event
     async def on_ready():
-        print(f"[CORE] Connecté en tant que {bot.user} (ID: {bot.user.id})")
-
-        # 1) Charger les listes depuis #bot-storage avant tout
-        try:
-            # import tardif pour éviter les cycles
-            from bot.discord_bot_commands import ensure_storage_loaded
-            await ensure_storage_loaded(bot)
-            print("[CORE] bot-storage chargé ->",
-                  "important:", bot.important_channels,
-                  "excluded:", bot.excluded_channels)
-        except Exception as e:
-            print("[WARN] ensure_storage_loaded a échoué :", e)
-
-        # 2) Pré-fetch des messages
-        await populate_initial_messages(bot, limit=20)
-        print("[CORE] Messages initiaux récupérés.")
-
-        # 3) Tâche planifiée (create_task → Task annulable/awaitable)
-        if not hasattr(bot, "daily_task"):
-            bot.daily_task = asyncio.create_task(
-                run_daily_07h_europe_brussels(do_daily_summary_job)
-            )
-            logging.getLogger(__name__).info("[CORE] daily_task prête.")
+        log.info("[CORE] Connecté en tant que %s (ID: %s), %d guild(s), %s shard(s)",
+                 bot.user, bot.user.id, len(bot.guilds), bot.shard_count)
+        if not bot.guilds:
+            log.warning("[CORE] Aucune guild détectée (le bot est-il invité ?)")
+        # Chaque guild démarre indépendamment (un on_ready répété ne fait que rafraîchir)
+        first = "ready" not in STARTUP.marks
+        STARTUP.mark("connexion")
+        for guild in bot.guilds:
+            await start_guild(guild)
+        if first:
+            STARTUP.mark("ready")
+            for phase, seconds in STARTUP.phases():
+                STARTUP_SECONDS.set(seconds, phase=phase)
+            STARTUP_SECONDS.set(STARTUP.total(), phase="total")
+            log.info("[STARTUP] %s — backfill en tâche de fond", STARTUP.summary(),
+                     extra={"startup": STARTUP.snapshot()})
+            seconds = await asyncio.to_thread(preload_modules)
+            log.info("[STARTUP] Modules lourds préchargés en %.2f s (hors boucle)", seconds)
 
     @bot.event
-    async def on_message(message: discord.Message):
-        if message.author == bot.user:
-            return
-
-        channel_name = message.channel.name
-        excluded = getattr(bot, "excluded_channels", [])
-        important = getattr(bot, "important_channels", [])
-
-        if channel_name in excluded:
-            await bot.process_commands(message)
-            return
+    async def on_guild_join(guild: discord.Guild):
+        log.info("[CORE] Nouvelle guild : %s (%s)", guild.name, guild.id)
+        await start_guild(guild)
 
-        cat = "important" if (channel_name in important) else "general"
-        if channel_name not in bot.messages_by_channel[cat]:
-            bot.messages_by_channel[cat][channel_name] = []
-
-        now = datetime.now(timezone.utc)
-        bot.messages_by_channel[cat][channel_name].append({
-            "author":    message.author.name,
-            "content":   message.content,
-            "timestamp": now
-        })
+    @bot.event
+    async def on_guild_remove(guild: discord.Guild):
+        state = bot.guild_contexts.remove(guild.id)
+        if state is not None:
+            await stop_guild(state)
+        log.info("[CORE] Guild quittée : %s (%s)", guild.name, guild.id)
 
-        await bot.process_commands(message)
+    bot.event(on_message)
 
     # Charger l’extension (cogs & helpers)
     try:
         await bot.load_extension("bot.discord_bot_commands")
     except Exception as e:
-        print(f"[ERROR] Impossible de charger l'extension: {e}")
-        traceback.print_exc()
+        log.exception("[CORE] Impossible de charger l'extension : %s", e)
+
+    # Surveillance des appels bloquants sur la boucle (LOOP_LAG_THRESHOLD_MS, 0 = off)
+    lag_threshold = get_loop_lag_threshold()
+    if lag_threshold > 0:
+        bot.loop_monitor = LoopLagMonitor(lag_threshold).start()
+
+    # Serveur de santé optionnel (HEALTH_PORT), sur la même boucle
+    health_runner = None
+    health_address = get_health_address()
+    if health_address is not None:
+        from bot.health import start_health_server  # aiohttp.web : seulement si HEALTH_PORT
+        try:
+            health_runner = await start_health_server(bot, *health_address)
+        except OSError as e:
+            log.warning("[HEALTH] Serveur de santé non démarré (%s:%d) : %s", *health_address, e)
 
     # Lancement + arrêt propre
     token = get_discord_token()
+    STARTUP.mark("init")
     try:
         # Démarre le bot en tâche concurrente
         start_task = asyncio.create_task(bot.start(token))
@@ -283,12 +582,15 @@ async def main():
         # Ctrl+C classique
         pass
     finally:
-        # Annuler proprement la tâche quotidienne si présente
-        task = getattr(bot, "daily_task", None)
-        if task:
-            task.cancel()
-            with contextlib.suppress(asyncio.CancelledError):
-                await task
+        # Arrêter proprement chaque guild (tâches, file d'ingestion, #bot-storage)
+        await asyncio.gather(*(stop_guild(state) for state in guild_states(bot)))
+        if bot.journal is not None:
+            bot.journal.close()
+        if health_runner is not None:
+            with contextlib.suppress(Exception):
+                await health_runner.cleanup()
+        if bot.loop_monitor is not None:
+            await bot.loop_monitor.stop()
 
         # Fermer le bot Discord
         with contextlib.suppress(Exception):
@@ -298,11 +600,13 @@ async def main():
 # 6) Exécution
 # ---------------------------------------------------------------------
 if __name__ == "__main__":
+    setup_logging()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("Arrêt demandé (Ctrl+C) — fermeture propre.")
+        log.info("[CORE] Arrêt demandé (Ctrl+C) — fermeture propre.")
     except Exception as e:
-        print(f"[FATAL] Exception non gérée dans main(): {e}")
-        traceback.print_exc()
+        log.critical("[FATAL] Exception non gérée dans main() : %s", e, exc_info=True)
+    finally:
+        stop_logging()
 # EOF
@@ -2,13 +2,23 @@
 """
 Description:
     Commandes du bot (!preview_mail, !add_important, …) + helpers
-    pour stocker les listes dans des messages du canal #bot-storage.
+    pour stocker les listes (canaux importants/exclus, mots-clés)
+    dans des messages du canal #bot-storage.
 Author: baudoux.sebastien@gmail.com  | Version: 3.2 | 2025-09-19
 """
 
 from __future__ import annotations
 
+import asyncio
+import copy
+import functools
+import io
 import json
+import logging
+import os
+import sys
+import tempfile
+import time
 from datetime import datetime, timezone
 
 import discord
@@ -21,15 +31,31 @@ from bot.env_config import (
     get_recipient_email,
     get_test_recipient_email,
     get_bot_storage_channel_id,
+    get_important_msg_id,
+    get_excluded_msg_id,
+    get_keywords_msg_id,
+    get_thread_crawl_concurrency,
 )
-from bot.mails_management import send_email, format_messages_for_email
+# ✅ mails_management (smtplib, email.mime), file_utils, journal (sqlite3), profiling
+#    (cProfile) et memory (tracemalloc) : importés dans les commandes qui s'en servent
 from bot.summarizer import (
     get_messages_last_24h,
     get_messages_last_72h,
     get_last_n_messages,
     format_messages_by_day,
 )
-from bot.file_utils import save_messages_to_file
+from bot.ingestion import make_buffer_entry
+from bot.keywords import KeywordMatcher, rescan_buffer
+from bot.config_store import LocalConfigStore
+from bot.classification import rebuild_classification
+from bot.threads import crawl_threads
+from bot.permissions import ReadableChannels, readable
+from bot.ipc import notify_worker
+from bot.guilds import GuildConfig, GuildContext, STORAGE_CHANNEL_NAME, guild_recipients, guild_state, guild_states
+from bot.metrics import REGISTRY, COMMAND_SECONDS, COMMANDS_TOTAL
+from bot.startup import BackfillProgress, StartupClock
+
+log = logging.getLogger(__name__)
 
 # ============================================================
 # Helpers : stockage des listes dans des messages Discord
@@ -43,6 +69,11 @@ STORE_TEMPLATE = {
 
 TAG_IMPORTANT = "[[STORE:important_channels]]"
 TAG_EXCLUDED  = "[[STORE:excluded_channels]]"
+TAG_KEYWORDS  = "[[STORE:keywords]]"
+STORE_TAGS = {"important": TAG_IMPORTANT, "excluded": TAG_EXCLUDED, "keywords": TAG_KEYWORDS}
+
+# IDs des messages de stockage, mémorisés pour éviter de re-scanner l'historique
+STORE_IDS_PATH = os.path.join("data", "bot_storage_ids.json")
 
 def _render_store_payload(tag: str, payload: dict) -> str:
     body = json.dumps(payload, ensure_ascii=False, indent=2)
@@ -57,69 +88,426 @@ def _parse_store_message(content: str) -> dict:
     except Exception:
         return dict(STORE_TEMPLATE)
 
-async def _find_store_message(channel: discord.TextChannel, tag: str, bot_user_id: int):
-    """Cherche un message contenant 'tag' ET écrit par le bot."""
+def _store_ids_path(bot) -> str:
+    """data/bot_storage_ids.json, ou son équivalent dans le dossier de la guild."""
+    local = getattr(bot, "local_config", None)
+    if isinstance(local, LocalConfigStore):
+        return os.path.join(local.data_dir, os.path.basename(STORE_IDS_PATH))
+    return STORE_IDS_PATH
+
+def _load_store_ids(path: str = STORE_IDS_PATH, use_env: bool = True) -> dict[str, int]:
+    """IDs connus : variables d'env (IMPORTANT_MSG_ID, …) prioritaires, sinon fichier local."""
+    ids: dict[str, int] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            ids.update({k: int(v) for k, v in json.load(f).items() if k in STORE_TAGS})
+    except (OSError, ValueError, AttributeError):
+        pass
+    if not use_env:
+        return ids
+    for key, getter in (("important", get_important_msg_id),
+                        ("excluded", get_excluded_msg_id),
+                        ("keywords", get_keywords_msg_id)):
+        env_id = getter()
+        if env_id:
+            ids[key] = env_id
+    return ids
+
+def _save_store_ids(ids: dict[str, int], path: str = STORE_IDS_PATH) -> None:
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(ids, f, indent=2)
+    except OSError as e:
+        log.warning("[STORE] Impossible d'écrire %s : %s", path, e)
+
+async def _storage_channel(bot) -> discord.TextChannel:
+    """
+    Canal #bot-storage : BOT_STORAGE_CHANNEL_ID (ou storage_channel_id de la
+    guild dans data/guilds.json), sinon le canal nommé "bot-storage" de la guild.
+    """
+    config = getattr(bot, "guild_config", None)
+    if isinstance(config, GuildConfig):
+        channel_id = config.storage_channel_id
+    else:
+        channel_id = get_bot_storage_channel_id()
+    if channel_id:
+        return bot.get_channel(channel_id) or await bot.fetch_channel(channel_id)
+    if isinstance(config, GuildConfig) and bot.guild is not None:
+        channel = discord.utils.get(bot.guild.text_channels, name=STORAGE_CHANNEL_NAME)
+        if channel is not None:
+            return channel
+        raise RuntimeError(f"Aucun canal #{STORAGE_CHANNEL_NAME} dans la guild {bot.guild_id}")
+    raise RuntimeError("BOT_STORAGE_CHANNEL_ID manquant dans .env")
+
+async def _find_store_messages(channel: discord.TextChannel, tags: dict[str, str], bot_user_id: int) -> dict:
+    """
+    UN seul scan de l'historique pour tous les tags manquants.
+    tags = {tag: clé} → renvoie {clé: message} (messages écrits par le bot).
+    """
+    found = {}
     async for msg in channel.history(limit=100):
-        if msg.author.id == bot_user_id and tag in (msg.content or ""):
-            return msg
-    return None
+        if msg.author.id != bot_user_id:
+            continue
+        for tag, key in tags.items():
+            if key not in found and tag in (msg.content or ""):
+                found[key] = msg
+        if len(found) == len(tags):
+            break
+    return found
 
-async def _ensure_message(channel: discord.TextChannel, tag: str, bot_user_id: int):
-    """Retourne (message, payload). Crée si absent ou non éditable."""
-    msg = await _find_store_message(channel, tag, bot_user_id)
-    if msg is None:
-        payload = dict(STORE_TEMPLATE)
-        rendered = _render_store_payload(tag, payload)
-        msg = await channel.send(rendered)
-        return msg, payload
+async def _fetch_known_message(channel: discord.TextChannel, message_id: int, tag: str, bot_user_id: int):
+    """Récupère un message de stockage par ID (1 appel, pas de scan) ; None si invalide."""
+    try:
+        msg = await channel.fetch_message(message_id)
+    except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+        return None
+    if msg.author.id != bot_user_id or tag not in (msg.content or ""):
+        return None
+    return msg
 
-    payload = _parse_store_message(msg.content or "")
-    return msg, payload
+def _set_list(bot: commands.Bot, key: str, data: list[str]):
+    if key == "important":
+        bot.important_channels = data
+    elif key == "keywords":
+        _set_keywords(bot, data)
+        return
+    else:
+        bot.excluded_channels = data
+    rebuild_classification(bot)
 
-async def ensure_storage_loaded(bot: commands.Bot):
+def _apply_store_payload(bot: commands.Bot, key: str, payload: dict, *, dirty: bool = False,
+                         ops: dict | None = None):
     """
-    Charge/initialise les deux messages de stockage dans #bot-storage.
-    - Si aucun message 'propre' appartenant au bot: on les crée.
-    - Remplit bot.important_channels / bot.excluded_channels et bot._store.
+    Répercute un payload de stockage sur les attributs du bot, et sur la copie
+    locale (write-through). dirty=True : changement pas encore écrit sur Discord,
+    `ops` étant les ajouts/retraits en attente (rejoués à la réconciliation).
     """
-    storage_channel_id = get_bot_storage_channel_id()
-    if not storage_channel_id:
-        raise RuntimeError("BOT_STORAGE_CHANNEL_ID manquant dans .env")
+    data = list(payload.get("data", []))
+    _set_list(bot, key, data)
+    local = getattr(bot, "local_config", None)
+    if isinstance(local, LocalConfigStore):
+        local.save(key, data, version=payload.get("version"), dirty=dirty, ops=ops)
 
-    channel = bot.get_channel(storage_channel_id) or await bot.fetch_channel(storage_channel_id)
+def apply_local_config(bot: commands.Bot) -> dict[str, list[str]]:
+    """
+    Démarrage : charge les listes depuis la copie locale (config_state.json,
+    sinon data/*.txt), sans réseau.
+    Renvoie les listes chargées.
+    """
+    local = getattr(bot, "local_config", None)
+    if not isinstance(local, LocalConfigStore):
+        local = LocalConfigStore()
+        bot.local_config = local
+    lists = local.load()
+    for key, data in lists.items():
+        _set_list(bot, key, data)
+    return lists
+
+def _set_keywords(bot: commands.Bot, keywords: list[str]):
+    """Recompile l'automate des mots-clés et re-scanne le buffer existant."""
+    bot.keywords = list(keywords)
+    bot.keyword_matcher = KeywordMatcher(bot.keywords)
+    rescan_buffer(getattr(bot, "messages_by_channel", {}), bot.keyword_matcher)
+
+def store_is_loaded(bot: commands.Bot) -> bool:
+    return isinstance(getattr(bot, "_store", None), dict)
+
+async def ensure_storage_loaded(bot: commands.Bot, *, force: bool = False):
+    """
+    Charge/initialise les messages de stockage dans #bot-storage.
+    - Déjà chargé (et force=False) : aucun appel API, le cache mémoire fait foi
+      (il est tenu à jour par save_list_to_store et on_raw_message_edit).
+    - Chargement déjà en cours (ex: on_ready de core et de CanauxCog) : on l'attend.
+    - IDs connus (env ou data/bot_storage_ids.json) : fetch_message direct.
+    - Sinon : un seul scan de l'historique ; création des messages absents.
+    - Remplit bot.important_channels / bot.excluded_channels / bot.keywords et bot._store,
+      puis réconcilie avec la copie locale (voir _reconcile_with_local).
+    """
+    if not force and store_is_loaded(bot):
+        return
+    inflight = getattr(bot, "_store_loading", None)
+    if isinstance(inflight, asyncio.Task) and not inflight.done():
+        await asyncio.shield(inflight)
+        if not force:
+            return
+    bot._store_loading = asyncio.ensure_future(_load_store(bot))
+    await asyncio.shield(bot._store_loading)
+
+async def _load_store(bot: commands.Bot):
+    channel = await _storage_channel(bot)
     bot_user_id = bot.user.id
 
-    imp_msg, imp_payload = await _ensure_message(channel, TAG_IMPORTANT, bot_user_id)
-    exc_msg, exc_payload = await _ensure_message(channel, TAG_EXCLUDED,  bot_user_id)
+    config = getattr(bot, "guild_config", None)
+    ids_path = _store_ids_path(bot)
+    # les IDs de l'env (.env) ne concernent que la guild historique
+    known_ids = _load_store_ids(ids_path, use_env=not isinstance(config, GuildConfig) or config.legacy)
+    messages = {}
+    for key, tag in STORE_TAGS.items():
+        if key in known_ids:
+            msg = await _fetch_known_message(channel, known_ids[key], tag, bot_user_id)
+            if msg is not None:
+                messages[key] = msg
 
-    bot._store = {
-        "channel": channel,
-        "important": {"message": imp_msg, "payload": imp_payload, "tag": TAG_IMPORTANT},
-        "excluded":  {"message": exc_msg, "payload": exc_payload, "tag": TAG_EXCLUDED},
-    }
-    bot.important_channels = list(imp_payload.get("data", []))
-    bot.excluded_channels  = list(exc_payload.get("data", []))
+    missing = {tag: key for key, tag in STORE_TAGS.items() if key not in messages}
+    if missing:
+        messages.update(await _find_store_messages(channel, missing, bot_user_id))
 
-async def save_list_to_store(bot: commands.Bot, key: str, new_list: list[str]):
+    store = {"channel": channel}
+    for key, tag in STORE_TAGS.items():
+        msg = messages.get(key)
+        if msg is None:
+            payload = dict(STORE_TEMPLATE)
+            msg = await channel.send(_render_store_payload(tag, payload))
+        else:
+            payload = _parse_store_message(msg.content or "")
+        store[key] = {"message": msg, "payload": payload, "tag": tag}
+
+    bot._store = store
+    ids = {key: store[key]["message"].id for key in STORE_TAGS}
+    if ids != known_ids:
+        _save_store_ids(ids, ids_path)
+    _reconcile_with_local(bot)
+
+def _reconcile_with_local(bot: commands.Bot):
+    """
+    Après lecture de #bot-storage :
+    - liste locale "dirty" (modifiée pendant que Discord était injoignable) :
+      seuls les ajouts/retraits locaux en attente sont rejoués par-dessus la
+      liste de #bot-storage, élément par élément (les changements faits
+      entre-temps par d'autres admins sont conservés) ;
+    - sinon : #bot-storage fait foi, la copie locale est mise à jour.
+    """
+    local = getattr(bot, "local_config", None)
+    local_lists = local.load() if isinstance(local, LocalConfigStore) else {}
+    for key in STORE_TAGS:
+        remote = bot._store[key]["payload"]
+        if key in local_lists and local.state(key)["dirty"]:
+            remote_set = set(remote.get("data", []))
+            ops = local.pending_ops(key)
+            if ops is None:
+                # état sans ops (ancien format) : on ne rejoue que les ajouts
+                ops = {"add": set(local_lists[key]) - remote_set, "remove": set()}
+            _set_list(bot, key, sorted(remote_set))
+            get_store_writer(bot).queue(key, add=ops["add"], remove=ops["remove"])
+            log.info("[STORE] '%s' : changements locaux non synchronisés → renvoyés vers #bot-storage", key)
+        else:
+            _apply_store_payload(bot, key, remote)
+
+def apply_store_edit(bot: commands.Bot, message_id: int, content: str) -> str | None:
     """
-    Écrit la liste (triée, unique) dans le message #bot-storage du bot.
-    key ∈ {'important', 'excluded'}.
+    Met à jour le cache si message_id est un message de stockage (édition
+    manuelle ou par une autre instance). Ignore les versions plus anciennes
+    que celle en cache (dont l'écho de nos propres éditions).
+    Renvoie la clé mise à jour, ou None.
     """
-    entry = bot._store[key]
-    payload = dict(entry.get("payload") or STORE_TEMPLATE)
-    payload["data"] = sorted(set(new_list))
-    payload["version"] = int(payload.get("version", 0)) + 1
-    payload["updated_at"] = datetime.now(timezone.utc).isoformat()
+    if not store_is_loaded(bot):
+        return None
+    for key in STORE_TAGS:
+        entry = bot._store[key]
+        if entry["message"].id != message_id:
+            continue
+        payload = _parse_store_message(content or "")
+        current = int((entry.get("payload") or {}).get("version", 0))
+        if int(payload.get("version", 0)) <= current and payload.get("data") == entry["payload"].get("data"):
+            return None
+        entry["payload"] = payload
+        writer = getattr(bot, "store_writer", None)
+        ops = writer.pending_ops(key) if isinstance(writer, StoreWriter) else None
+        if ops:
+            merged = {"version": payload.get("version"), "data": _apply_ops(payload.get("data", []), ops)}
+            _apply_store_payload(bot, key, merged, dirty=True)
+        else:
+            _apply_store_payload(bot, key, payload)
+        return key
+    return None
 
-    rendered = _render_store_payload(entry["tag"], payload)
-    await entry["message"].edit(content=rendered)
+def _current_list(bot: commands.Bot, key: str) -> list[str]:
+    return {
+        "important": getattr(bot, "important_channels", []),
+        "excluded": getattr(bot, "excluded_channels", []),
+        "keywords": getattr(bot, "keywords", []),
+    }[key]
 
-    # maj mémoire
-    entry["payload"] = payload
-    if key == "important":
-        bot.important_channels = payload["data"]
-    else:
-        bot.excluded_channels = payload["data"]
+def _apply_ops(data, ops: dict) -> list[str]:
+    return sorted((set(data) | ops["add"]) - ops["remove"])
+
+class StoreWriter:
+    """
+    Tampon d'écriture (write-behind) pour #bot-storage.
+    - queue() applique le changement en mémoire tout de suite et fusionne les
+      ajouts/retraits par liste ; une seule édition Discord par liste est faite
+      après `debounce_s` sans nouveau changement (au plus `max_delay_s` après le 1er).
+    - flush() écrit immédiatement (appelé aussi à l'arrêt du bot). En cas
+      d'échec, tous les changements non écrits restent en attente et l'écriture
+      différée est reprogrammée (délai doublé à chaque échec, max RETRY_MAX_S).
+    - Verrou optimiste sur payload["version"] : si le message distant a une version
+      plus récente que celle en cache, les changements sont ré-appliqués dessus.
+    """
+
+    RETRY_MAX_S = 300.0
+
+    def __init__(self, bot: commands.Bot, debounce_s: float = 2.0, max_delay_s: float = 10.0):
+        self.bot = bot
+        self.debounce_s = debounce_s
+        self.max_delay_s = max_delay_s
+        self._pending: dict[str, dict[str, set]] = {}
+        self._timer: asyncio.Task | None = None
+        self._first_change_at: float | None = None
+        self._lock = asyncio.Lock()
+        self._failures = 0   # échecs consécutifs (délai de la prochaine tentative)
+        # compteurs
+        self.changes = 0
+        self.edits = 0
+        self.conflicts = 0
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._pending)
+
+    def pending_ops(self, key: str) -> dict | None:
+        return self._pending.get(key)
+
+    def queue(self, key: str, add=(), remove=()) -> None:
+        ops = self._pending.setdefault(key, {"add": set(), "remove": set()})
+        for name in add:
+            ops["remove"].discard(name)
+            ops["add"].add(name)
+        for name in remove:
+            ops["add"].discard(name)
+            ops["remove"].add(name)
+        self.changes += len(add) + len(remove)
+        _apply_store_payload(self.bot, key, {"data": _apply_ops(_current_list(self.bot, key), ops)},
+                             dirty=True, ops=self._unsynced_ops(key, add, remove))
+        self._schedule()
+
+    def _schedule(self) -> None:
+        now = asyncio.get_running_loop().time()
+        if self._first_change_at is None:
+            self._first_change_at = now
+        delay = min(self.debounce_s, max(0.0, self._first_change_at + self.max_delay_s - now))
+        if self._timer and not self._timer.done():
+            self._timer.cancel()
+        self._timer = asyncio.create_task(self._flush_later(delay))
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._timer = None  # un nouveau changement ne doit pas annuler l'écriture en cours
+        try:
+            await self.flush()
+        except Exception as e:
+            retry = min(self.RETRY_MAX_S, self.debounce_s * 2 ** self._failures)
+            log.warning("[STORE] Écriture différée de #bot-storage échouée : %s (nouvel essai dans %.0f s)", e, retry)
+            if self.pending and self._timer is None:
+                self._timer = asyncio.create_task(self._flush_later(retry))
+
+    def _unsynced_ops(self, key: str, add, remove) -> dict:
+        """
+        Changements locaux pas encore sur Discord, à retenir sur disque : ceux
+        déjà retenus (dont une écriture en cours ou échouée) + add/remove.
+        """
+        local = getattr(self.bot, "local_config", None)
+        known = local.pending_ops(key) if isinstance(local, LocalConfigStore) else None
+        ops = known or {"add": set(), "remove": set()}
+        for name in add:
+            ops["remove"].discard(name)
+            ops["add"].add(name)
+        for name in remove:
+            ops["add"].discard(name)
+            ops["remove"].add(name)
+        return ops
+
+    def _requeue(self, key: str, ops: dict) -> None:
+        """Remet des changements non écrits sous ceux arrivés entre-temps (les plus récents gagnent)."""
+        again = self._pending.setdefault(key, {"add": set(), "remove": set()})
+        again["add"] |= ops["add"] - again["remove"]
+        again["remove"] |= ops["remove"] - again["add"]
+
+    async def flush(self) -> None:
+        if self._timer and self._timer is not asyncio.current_task() and not self._timer.done():
+            self._timer.cancel()
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            self._first_change_at = None
+            items = list(pending.items())
+            for i, (key, ops) in enumerate(items):
+                try:
+                    await self._write(key, ops)
+                except Exception:
+                    # cette liste et toutes celles pas encore écrites restent en attente
+                    self._failures += 1
+                    for later_key, later_ops in items[i:]:
+                        self._requeue(later_key, later_ops)
+                    raise
+            self._failures = 0
+
+    async def _remote_payload(self, entry: dict) -> dict | None:
+        try:
+            msg = await self.bot._store["channel"].fetch_message(entry["message"].id)
+        except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+            return None
+        return _parse_store_message(msg.content or "")
+
+    async def _write(self, key: str, ops: dict) -> None:
+        entry = self.bot._store[key]
+        base = dict(entry.get("payload") or STORE_TEMPLATE)
+        remote = await self._remote_payload(entry)
+        if remote is not None and int(remote.get("version", 0)) > int(base.get("version", 0)):
+            self.conflicts += 1
+            base = remote
+
+        payload = dict(base)
+        payload["data"] = _apply_ops(base.get("data", []), ops)
+        payload["version"] = int(base.get("version", 0)) + 1
+        payload["updated_at"] = datetime.now(timezone.utc).isoformat()
+        await entry["message"].edit(content=_render_store_payload(entry["tag"], payload))
+        self.edits += 1
+
+        # maj mémoire (+ changements arrivés pendant l'écriture)
+        entry["payload"] = payload
+        newer = self._pending.get(key)
+        if newer:
+            merged = {"version": payload["version"], "data": _apply_ops(payload["data"], newer)}
+            _apply_store_payload(self.bot, key, merged, dirty=True, ops=newer)
+        else:
+            _apply_store_payload(self.bot, key, payload)
+
+def _readable_channels(bot: commands.Bot) -> ReadableChannels:
+    """Ensemble des canaux lisibles du bot (créé à la demande)."""
+    rc = getattr(bot, "readable_channels", None)
+    if not isinstance(rc, ReadableChannels):
+        rc = bot.readable_channels = ReadableChannels()
+    return rc
+
+def _journal(bot):
+    """Journal SQLite du mode deux processus (BOT_MODE=ingest), sinon None."""
+    journal_module = sys.modules.get("bot.journal")
+    if journal_module is None:  # aucun journal ouvert dans ce processus
+        return None
+    journal = getattr(bot, "journal", None)
+    return journal if isinstance(journal, journal_module.MessageJournal) else None
+
+def _reports_kwargs(bot) -> dict:
+    """Dossier des rapports JSON de la guild (rapports/<guild_id> hors guild historique)."""
+    config = getattr(bot, "guild_config", None)
+    return {"directory": config.reports_dir} if isinstance(config, GuildConfig) else {}
+
+def get_store_writer(bot: commands.Bot) -> StoreWriter:
+    writer = getattr(bot, "store_writer", None)
+    if not isinstance(writer, StoreWriter):
+        writer = StoreWriter(bot)
+        bot.store_writer = writer
+    return writer
+
+async def save_list_to_store(bot: commands.Bot, key: str, new_list: list[str]):
+    """
+    Écrit la liste (triée, unique) dans le message #bot-storage du bot, immédiatement.
+    key ∈ {'important', 'excluded', 'keywords'}.
+    (Les commandes passent par get_store_writer(bot).queue(...) : écriture regroupée.)
+    """
+    current, new = set(_current_list(bot, key)), set(new_list)
+    writer = get_store_writer(bot)
+    writer.queue(key, add=new - current, remove=current - new)
+    await writer.flush()
 
 
 # ============================================================
@@ -132,7 +520,9 @@ class EmailCog(commands.Cog):
 
     @commands.command(name="preview_mail", help="Aperçu du rapport e-mail.")
     async def preview_mail_cmd(self, ctx):
-        mail_summary = format_messages_for_email(self.bot.messages_by_channel)
+        from bot.mails_management import format_messages_for_email
+        state = guild_state(self.bot, ctx.guild)
+        mail_summary = format_messages_for_email(state.messages_by_channel)
         if not mail_summary.strip():
             await ctx.send("Le rapport est vide (aucun message).")
             return
@@ -140,22 +530,40 @@ class EmailCog(commands.Cog):
 
     @commands.command(name="send_daily_summary", help="Envoie un résumé par e-mail (24h).")
     async def send_daily_summary_cmd(self, ctx):
-        recent_msgs = get_messages_last_24h(self.bot.messages_by_channel)
+        from bot.mails_management import send_email, format_messages_for_email
+        state = guild_state(self.bot, ctx.guild)
+        if _journal(self.bot) is not None and ctx.guild is not None:
+            # mode deux processus : le rendu et l'envoi sont faits par le worker
+            resp = await notify_worker({"op": "report", "guild_id": ctx.guild.id})
+            if resp and resp.get("ok"):
+                await ctx.send(f"✅ Résumé envoyé par le worker à {resp.get('sent_to') or '(personne)'}.")
+            elif resp and resp.get("pending"):
+                await ctx.send(f"⏳ {resp['error']} : vérifier la boîte mail avant de relancer.")
+            else:
+                await ctx.send(f"❌ Échec de l’envoi par le worker : {(resp or {}).get('error', 'injoignable')}")
+            return
+        recent_msgs = get_messages_last_24h(state.messages_by_channel)
         summary = format_messages_for_email(recent_msgs)
 
         from_addr = get_email_address()
         password = get_email_password()
-        to_addr = get_recipient_email()
+        recipients = guild_recipients(state, get_recipient_email)
+        if not recipients:
+            await ctx.send("❌ Aucun destinataire configuré pour ce serveur (data/guilds.json).")
+            return
 
         try:
-            await send_email(summary, from_addr, password, to_addr)
+            await send_email(summary, from_addr, password, recipients)
             await ctx.send("✅ Résumé envoyé (24h) !")
         except Exception as e:
             await ctx.send(f"❌ Échec de l’envoi : {e!s}")
 
     @commands.command(name="test_send_daily_summary", help="Envoie un résumé par e-mail (test immédiat).")
     async def test_send_daily_summary_cmd(self, ctx):
-        summary = format_messages_for_email(self.bot.messages_by_channel)
+        from bot.mails_management import send_email, format_messages_for_email
+        from bot.file_utils import save_messages_to_file
+        state = guild_state(self.bot, ctx.guild)
+        summary = format_messages_for_email(state.messages_by_channel)
         from_addr = get_email_address()
         password = get_email_password()
         to_addr = get_test_recipient_email()
@@ -166,7 +574,7 @@ class EmailCog(commands.Cog):
         except Exception as e:
             await ctx.send(f"❌ Échec de l’envoi : {e!s}")
         finally:
-            save_messages_to_file(self.bot.messages_by_channel)
+            save_messages_to_file(state.messages_by_channel, **_reports_kwargs(state))
 
 # ============================================================
 # 2) Cog : MessagesCog
@@ -177,7 +585,7 @@ class MessagesCog(commands.Cog):
 
     @commands.command(name="list_messages", help="Affiche les messages groupés par canal.")
     async def list_messages_cmd(self, ctx):
-        messages_by_channel = self.bot.messages_by_channel
+        messages_by_channel = guild_state(self.bot, ctx.guild).messages_by_channel
 
         if not messages_by_channel["important"] and not messages_by_channel["general"]:
             await ctx.send("Aucun message n'est stocké pour l'instant.")
@@ -190,6 +598,8 @@ class MessagesCog(commands.Cog):
             for channel, msgs in messages_by_channel["important"].items():
                 lines.append(f"**#{channel}** :")
                 for msg in msgs:
+                    if msg.get("deleted"):
+                        continue
                     author = msg.get("author", "???")
                     date   = msg["timestamp"].strftime("%H:%M")
                     content = msg.get("content", "")
@@ -201,6 +611,8 @@ class MessagesCog(commands.Cog):
             for channel, msgs in messages_by_channel["general"].items():
                 lines.append(f"**#{channel}** :")
                 for msg in msgs:
+                    if msg.get("deleted"):
+                        continue
                     author = msg.get("author", "???")
                     date   = msg["timestamp"].strftime("%H:%M")
                     content = msg.get("content", "")
@@ -210,14 +622,51 @@ class MessagesCog(commands.Cog):
         full_msg = "\n".join(lines)
         await ctx.send(full_msg[:1900] + ("\n(...) [TROP LONG, tronqué]" if len(full_msg) > 1900 else ""))
 
+    # ---- Événements bruts : éditions / suppressions appliquées au buffer en O(1) ----
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        content = payload.data.get("content")
+        state = guild_state(self.bot, payload.guild_id)
+        index = getattr(state, "message_index", None)
+        if content is None or index is None:
+            return
+        matcher = getattr(state, "keyword_matcher", None)
+        journal = _journal(self.bot)
+        if index.apply_edit(payload.message_id, content, matcher):
+            if journal is not None:
+                journal.apply_edit(payload.message_id, index.get(payload.message_id)[2])
+        elif journal is not None and payload.message_id not in index:
+            # déjà sorti du buffer (budget mémoire du mode ingest) : le journal l'a encore
+            journal.apply_edit(payload.message_id, make_buffer_entry("", content, None, matcher, payload.message_id))
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        index = getattr(guild_state(self.bot, payload.guild_id), "message_index", None)
+        if index is not None:
+            index.apply_delete(payload.message_id)
+        journal = _journal(self.bot)
+        if journal is not None:
+            journal.apply_delete(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        index = getattr(guild_state(self.bot, payload.guild_id), "message_index", None)
+        journal = _journal(self.bot)
+        for message_id in payload.message_ids:
+            if index is not None:
+                index.apply_delete(message_id)
+            if journal is not None:
+                journal.apply_delete(message_id)
+
     @commands.command(name="preview_by_day", help="Affiche les messages du jour, groupés par date.")
     async def preview_by_day_cmd(self, ctx):
-        text = format_messages_by_day(self.bot.messages_by_channel)
+        text = format_messages_by_day(guild_state(self.bot, ctx.guild).messages_by_channel)
         await ctx.send(text[:1900] + ("\n(...) [Tronqué]" if len(text) > 1900 else ""))
 
     @commands.command(name="fetch_72h", help="Affiche les messages depuis 72h dans tous les salons.")
     async def fetch_72h_cmd(self, ctx):
-        recent  = get_messages_last_72h(self.bot.messages_by_channel)
+        from bot.mails_management import format_messages_for_email
+        recent  = get_messages_last_72h(guild_state(self.bot, ctx.guild).messages_by_channel)
         summary = format_messages_for_email(recent)
         if not summary.strip():
             await ctx.send("Aucun message ces dernières 72h.")
@@ -226,28 +675,35 @@ class MessagesCog(commands.Cog):
 
     @commands.command(name="fetch_recent", help="Récupère les 'n' derniers messages par salon.")
     async def fetch_recent_cmd(self, ctx, n: int = 10):
-        results  = {"important": {}, "general": {}}
-        excluded = self.bot.excluded_channels
-        imp_ch   = self.bot.important_channels
+        from bot.mails_management import format_messages_for_email
+        state      = guild_state(self.bot, ctx.guild)
+        results    = {"important": {}, "general": {}}
+        classifier = state.channel_classifier
 
-        for channel in ctx.guild.text_channels:
-            if channel.name in excluded:
+        for channel in readable(state, ctx.guild.text_channels):
+            cls = classifier.lookup(channel)
+            if cls.excluded:
                 continue
-            category = "important" if channel.name in imp_ch else "general"
+            category = cls.category
             collected = []
             try:
                 async for msg in channel.history(limit=n):
                     if msg.author.bot:
                         continue
-                    collected.append({
-                        "author": msg.author.name,
-                        "content": msg.content,
-                        "timestamp": msg.created_at
-                    })
+                    collected.append(make_buffer_entry(
+                        msg.author.name, msg.content, msg.created_at, state.keyword_matcher, msg.id
+                    ))
             except discord.Forbidden:
+                _readable_channels(state).remove_channel(channel)
                 continue
             if collected:
-                results[category][channel.name] = collected
+                results[category][cls.name] = collected
+
+        # Fils et posts de forum : aperçu complet (sans checkpoint)
+        for category, channel_name, entry in await crawl_threads(
+            state, ctx.guild, limit=n, concurrency=get_thread_crawl_concurrency()
+        ):
+            results[category].setdefault(channel_name, []).append(entry)
 
         summary = format_messages_for_email(results)
         if not summary.strip():
@@ -267,65 +723,175 @@ class CanauxCog(commands.Cog):
     async def on_ready(self):
         if self._loaded:
             return
-        try:
-            await ensure_storage_loaded(self.bot)
-            self._loaded = True
-        except Exception as e:
-            print("[CanauxCog] ensure_storage_loaded a échoué :", e)
+        results = await asyncio.gather(
+            *(ensure_storage_loaded(state) for state in guild_states(self.bot)),
+            return_exceptions=True,
+        )
+        errors = [r for r in results if isinstance(r, Exception)]
+        for e in errors:
+            log.warning("[CanauxCog] ensure_storage_loaded a échoué : %s", e)
+        self._loaded = not errors
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        """Un message de #bot-storage a été édité → rafraîchir le cache (sans appel API)."""
+        content = payload.data.get("content")
+        if content is None:
+            return
+        key = apply_store_edit(guild_state(self.bot, payload.guild_id), payload.message_id, content)
+        if key:
+            log.info("[CanauxCog] bot-storage '%s' rechargé depuis l'édition du message %s", key, payload.message_id)
 
-    @commands.command(name="affiche", help="Affiche les listes des canaux importants et exclus (ex: !affiche important).")
+    # ---- Événements de canaux → table de classement (et buffer si renommage) ----
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        state = guild_state(self.bot, channel.guild)
+        classifier = getattr(state, "channel_classifier", None)
+        if classifier is not None and isinstance(channel, discord.TextChannel):
+            classifier.update_channel(channel)
+        if isinstance(channel, (discord.TextChannel, discord.ForumChannel)):
+            _readable_channels(state).update_channel(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        state = guild_state(self.bot, channel.guild)
+        classifier = getattr(state, "channel_classifier", None)
+        if classifier is not None:
+            classifier.remove_channel(channel.id)
+        _readable_channels(state).remove_channel(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        state = guild_state(self.bot, after.guild)
+        if isinstance(after, (discord.TextChannel, discord.ForumChannel)) and before.overwrites != after.overwrites:
+            _readable_channels(state).update_channel(after)
+        if not isinstance(after, discord.TextChannel) or before.name == after.name:
+            return
+        old, new = before.name, after.name
+        # l'historique suit le canal renommé (pas de scission du buffer)
+        for msgs_by_ch in state.messages_by_channel.values():
+            if old in msgs_by_ch:
+                merged = msgs_by_ch.pop(old) + msgs_by_ch.get(new, [])
+                merged.sort(key=lambda m: m["timestamp"])
+                msgs_by_ch[new] = merged
+        index = getattr(state, "message_index", None)
+        if index is not None:
+            index.rename_channel(old, new)
+        journal = _journal(self.bot)
+        if journal is not None:
+            journal.rename_channel(after.guild.id, old, new)
+        # les listes (par nom) suivent aussi le renommage
+        for key in ("important", "excluded"):
+            if old in _current_list(state, key):
+                get_store_writer(state).queue(key, add=[new], remove=[old])
+        classifier = getattr(state, "channel_classifier", None)
+        if classifier is not None:
+            classifier.update_channel(after)
+        log.info("[CanauxCog] #%s renommé en #%s : buffer et listes mis à jour", old, new)
+
+    # ---- Permissions : l'ensemble des canaux lisibles suit les rôles ----
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        me = after.guild.me
+        if before.permissions != after.permissions and (after.is_default() or after in getattr(me, "roles", [])):
+            _readable_channels(guild_state(self.bot, after.guild)).rebuild_guild(after.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        _readable_channels(guild_state(self.bot, role.guild)).rebuild_guild(role.guild)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        # rôles du bot modifiés (reçu seulement avec l'intent members)
+        if after.id == self.bot.user.id and before.roles != after.roles:
+            _readable_channels(guild_state(self.bot, after.guild)).rebuild_guild(after.guild)
+
+    @commands.command(name="reload_store", help="Relit les listes depuis #bot-storage (ignore le cache).")
+    async def reload_store_cmd(self, ctx):
+        state = guild_state(self.bot, ctx.guild)
+        await ensure_storage_loaded(state, force=True)
+        await ctx.send(
+            f"🔄 bot-storage rechargé.\nImportants : {state.important_channels}\n"
+            f"Exclus : {state.excluded_channels}\nMots-clés : {state.keywords}"
+        )
+
+    @commands.command(name="affiche", help="Affiche les listes des canaux importants, exclus ou des mots-clés (ex: !affiche important).")
     async def affiche_cmd(self, ctx, target: str):
+        state = guild_state(self.bot, ctx.guild)
         target = target.lower()
         if target == "important":
-            await ctx.send(f"Canaux importants : {self.bot.important_channels}")
+            await ctx.send(f"Canaux importants : {state.important_channels}")
         elif target == "excluded":
-            await ctx.send(f"Canaux exclus : {self.bot.excluded_channels}")
+            await ctx.send(f"Canaux exclus : {state.excluded_channels}")
+        elif target == "keywords":
+            st = state.keyword_matcher.stats()
+            await ctx.send(
+                f"Mots-clés : {state.keywords}\n"
+                f"({st['scanned']} messages scannés, {st['matched']} avec mot-clé, "
+                f"{st['avg_us_per_message']:.1f} µs/message)"
+            )
         else:
-            await ctx.send("Usage : `!affiche important` ou `!affiche excluded`")
-
-    @commands.command(name="add_important", help="Ajoute un canal (nom) aux canaux importants.")
-    async def add_important_cmd(self, ctx, channel_name: str):
-        await ensure_storage_loaded(self.bot)
-        imp = set(self.bot.important_channels)
-        if channel_name in imp:
-            await ctx.send(f"'{channel_name}' est déjà dans les importants.")
-            return
-        imp.add(channel_name)
-        await save_list_to_store(self.bot, "important", list(imp))
-        await ctx.send(f"✅ Ajouté à importants : **{channel_name}**\n→ {self.bot.important_channels}")
-
-    @commands.command(name="remove_important", help="Retire un canal (nom) des canaux importants.")
-    async def remove_important_cmd(self, ctx, channel_name: str):
-        await ensure_storage_loaded(self.bot)
-        imp = set(self.bot.important_channels)
-        if channel_name not in imp:
-            await ctx.send(f"'{channel_name}' n'est pas dans les importants.")
-            return
-        imp.remove(channel_name)
-        await save_list_to_store(self.bot, "important", list(imp))
-        await ctx.send(f"🗑️ Retiré des importants : **{channel_name}**\n→ {self.bot.important_channels}")
-
-    @commands.command(name="add_excluded", help="Ajoute un canal (nom) aux canaux exclus.")
-    async def add_excluded_cmd(self, ctx, channel_name: str):
-        await ensure_storage_loaded(self.bot)
-        exc = set(self.bot.excluded_channels)
-        if channel_name in exc:
-            await ctx.send(f"'{channel_name}' est déjà dans les exclus.")
-            return
-        exc.add(channel_name)
-        await save_list_to_store(self.bot, "excluded", list(exc))
-        await ctx.send(f"✅ Ajouté aux exclus : **{channel_name}**\n→ {self.bot.excluded_channels}")
-
-    @commands.command(name="remove_excluded", help="Retire un canal (nom) des canaux exclus.")
-    async def remove_excluded_cmd(self, ctx, channel_name: str):
-        await ensure_storage_loaded(self.bot)
-        exc = set(self.bot.excluded_channels)
-        if channel_name not in exc:
-            await ctx.send(f"'{channel_name}' n'est pas dans les exclus.")
+            await ctx.send("Usage : `!affiche important`, `!affiche excluded` ou `!affiche keywords`")
+
+    # libellés : (liste, "ajouté à …", "retiré de …")
+    _LABELS = {
+        "important": ("les importants", "à importants", "des importants"),
+        "excluded": ("les exclus", "aux exclus", "des exclus"),
+        "keywords": ("les mots-clés", "aux mots-clés", "des mots-clés"),
+    }
+
+    async def _change_list(self, ctx, key: str, names, add: bool):
+        """Ajoute/retire plusieurs noms d'un coup ; l'écriture #bot-storage est regroupée."""
+        names = [n for n in dict.fromkeys(names) if n]
+        if not names:
+            await ctx.send(f"Usage : `!{ctx.command.name} nom1 [nom2 ...]`")
             return
-        exc.remove(channel_name)
-        await save_list_to_store(self.bot, "excluded", list(exc))
-        await ctx.send(f"🗑️ Retiré des exclus : **{channel_name}**\n→ {self.bot.excluded_channels}")
+        state = guild_state(self.bot, ctx.guild)
+        await ensure_storage_loaded(state)
+        in_list, add_label, remove_label = self._LABELS[key]
+        current = set(_current_list(state, key))
+        if add:
+            todo = [n for n in names if n not in current]
+            skipped = [f"'{n}' est déjà dans {in_list}." for n in names if n in current]
+        else:
+            todo = [n for n in names if n in current]
+            skipped = [f"'{n}' n'est pas dans {in_list}." for n in names if n not in current]
+
+        lines = list(skipped)
+        if todo:
+            writer = get_store_writer(state)
+            if add:
+                writer.queue(key, add=todo)
+                lines.append(f"✅ Ajouté {add_label} : " + ", ".join(f"**{n}**" for n in todo))
+            else:
+                writer.queue(key, remove=todo)
+                lines.append(f"🗑️ Retiré {remove_label} : " + ", ".join(f"**{n}**" for n in todo))
+            lines.append(f"→ {_current_list(state, key)}")
+        await ctx.send("\n".join(lines))
+
+    @commands.command(name="add_important", help="Ajoute un ou plusieurs canaux (noms) aux canaux importants.")
+    async def add_important_cmd(self, ctx, *channel_names: str):
+        await self._change_list(ctx, "important", channel_names, add=True)
+
+    @commands.command(name="remove_important", help="Retire un ou plusieurs canaux (noms) des canaux importants.")
+    async def remove_important_cmd(self, ctx, *channel_names: str):
+        await self._change_list(ctx, "important", channel_names, add=False)
+
+    @commands.command(name="add_excluded", help="Ajoute un ou plusieurs canaux (noms) aux canaux exclus.")
+    async def add_excluded_cmd(self, ctx, *channel_names: str):
+        await self._change_list(ctx, "excluded", channel_names, add=True)
+
+    @commands.command(name="remove_excluded", help="Retire un ou plusieurs canaux (noms) des canaux exclus.")
+    async def remove_excluded_cmd(self, ctx, *channel_names: str):
+        await self._change_list(ctx, "excluded", channel_names, add=False)
+
+    @commands.command(name="add_keyword", help="Ajoute des mots-clés d'escalade, séparés par des virgules (ex: !add_keyword urgent, deadline).")
+    async def add_keyword_cmd(self, ctx, *, keywords: str = ""):
+        await self._change_list(ctx, "keywords", [k.strip() for k in keywords.split(",")], add=True)
+
+    @commands.command(name="remove_keyword", help="Retire des mots-clés d'escalade, séparés par des virgules.")
+    async def remove_keyword_cmd(self, ctx, *, keywords: str = ""):
+        await self._change_list(ctx, "keywords", [k.strip() for k in keywords.split(",")], add=False)
 
 # ============================================================
 # 4) Cog : Debug & Help
@@ -340,16 +906,134 @@ class DebugCog(commands.Cog):
 
     @commands.command(name="test_recent_10", help="Affiche les 10 derniers messages")
     async def test_recent_10_cmd(self, ctx):
-        last_10 = get_last_n_messages(self.bot.messages_by_channel, n=10)
+        from bot.mails_management import format_messages_for_email
+        last_10 = get_last_n_messages(guild_state(self.bot, ctx.guild).messages_by_channel, n=10)
         summary = format_messages_for_email(last_10)
         if summary.strip():
             await ctx.send(summary[:1900] + ("..." if len(summary) > 1900 else ""))
         else:
             await ctx.send("Aucun message dans les 10 derniers.")
 
+    @commands.command(name="stats", help="Métriques du bot (!stats prometheus : format texte Prometheus).")
+    async def stats_cmd(self, ctx, fmt: str = ""):
+        if fmt.lower() in ("prometheus", "prom"):
+            text = REGISTRY.render_prometheus()
+            if _journal(self.bot) is not None:
+                resp = await notify_worker({"op": "metrics"})
+                if resp and resp.get("ok"):
+                    text += "# --- worker ---\n" + resp.get("text", "")
+            await ctx.send(file=discord.File(io.BytesIO(text.encode("utf-8")), filename="metrics.prom"))
+            return
+        lines = REGISTRY.summary()
+        startup = getattr(self.bot, "startup", None)
+        progress = getattr(guild_state(self.bot, ctx.guild), "backfill", None)
+        if isinstance(progress, BackfillProgress) and progress.running:
+            lines = [f"backfill : {progress.summary()}"] + lines
+        if isinstance(startup, StartupClock) and "ready" in startup.marks:
+            lines = [f"démarrage : {startup.summary()}"] + lines
+        monitor = getattr(self.bot, "loop_monitor", None)
+        if monitor is not None:
+            # en tête : le troncage à 1900 caractères ne doit pas masquer les blocages
+            lines = monitor.summary() + lines
+        body = "\n".join(lines)
+        if len(body) > 1900:
+            body = body[:1900] + "\n[...] (tronqué, voir !stats prometheus)"
+        await ctx.send(f"```\n{body}\n```")
+
+    @commands.command(
+        name="memory",
+        help="Mémoire : RSS du processus, canaux qui pèsent le plus dans le buffer, budgets "
+             "(+ sites d'allocation si MEMORY_TRACEMALLOC).",
+    )
+    async def memory_cmd(self, ctx):
+        from bot.memory import memory_report, tracemalloc_lines
+        lines = memory_report(self.bot)
+        # instantané tracemalloc : hors de la boucle
+        lines += await asyncio.to_thread(tracemalloc_lines)
+        body = "\n".join(lines)
+        if len(body) > 1900:
+            body = body[:1900] + "\n[...]"
+        await ctx.send(f"```\n{body}\n```")
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx, error):
+        # erreurs avant l'exécution (commande inconnue, argument invalide, check) ;
+        # celles du callback sont déjà comptées par _after_command
+        if ctx.command is not None and not getattr(ctx, "_metrics_done", False):
+            COMMANDS_TOTAL.inc(command=ctx.command.qualified_name, status="rejected")
+
+    @commands.command(
+        name="profile",
+        help="Profile un job ou une commande (!profile daily | populate | <commande> [args]) : "
+             "top 20 des fonctions + fichiers pstats / piles repliées (rapports/profiles/).",
+    )
+    async def profile_cmd(self, ctx, *, target: str = ""):
+        from bot.profiling import Profiler, ProfilerBusy
+        target = target.strip()
+        if not target:
+            await ctx.send("Usage : !profile daily | populate | <commande> [arguments]")
+            return
+        name = target.split()[0].lower()
+        state = guild_state(self.bot, ctx.guild)
+        scratch_dir = None
+
+        if name in ("daily", "populate"):
+            if _journal(self.bot) is not None:
+                await ctx.send("BOT_MODE=ingest : les rapports tournent dans le worker (y définir BOT_PROFILE=daily).")
+                return
+            if not isinstance(state, GuildContext):
+                await ctx.send("À lancer depuis un salon de la guild à profiler.")
+                return
+            from bot import core  # import tardif (core charge ce module)
+            if name == "daily":
+                # vrai rapport : e-mail envoyé et JSON archivé, comme !send_daily_summary
+                run = functools.partial(core.do_daily_summary_job, state)
+            else:
+                # backfill dans un buffer et un dossier data jetables : ni le buffer réel
+                # ni les checkpoints des fils (thread_checkpoints.json) ne sont touchés
+                scratch_dir = tempfile.TemporaryDirectory(prefix="profile_")
+                config = state.guild_config._replace(data_dir=scratch_dir.name)
+                scratch = GuildContext(self.bot, state.guild_id, config)
+                scratch.channel_classifier = state.channel_classifier
+                scratch.keyword_matcher = state.keyword_matcher
+                scratch.readable_channels = state.readable_channels
+                run = functools.partial(core.populate_initial_messages, scratch, limit=20)
+            label = name
+        else:
+            message = copy.copy(ctx.message)
+            message.content = f"{ctx.prefix}{target}"
+            sub_ctx = await self.bot.get_context(message)
+            if sub_ctx.command is None or sub_ctx.command is ctx.command:
+                await ctx.send(f"Commande inconnue ou non profilable : {name}")
+                return
+            run = functools.partial(self.bot.invoke, sub_ctx)
+            label = sub_ctx.command.qualified_name
+
+        try:
+            profiler = Profiler(label).start()
+        except ProfilerBusy:
+            if scratch_dir is not None:
+                scratch_dir.cleanup()
+            await ctx.send("Un profil est déjà en cours, réessayer plus tard.")
+            return
+        try:
+            await run()
+        finally:
+            report = profiler.stop()
+            if scratch_dir is not None:
+                scratch_dir.cleanup()
+        body = report.format_top()
+        if len(body) > 1900:
+            body = body[:1900] + "\n[...]"
+        await ctx.send(
+            f"```\n{body}\n```",
+            files=[discord.File(report.pstats_path), discord.File(report.collapsed_path)],
+        )
+
     @commands.command(name="test_72h", help="Affiche les messages depuis 72h")
     async def test_72h_cmd(self, ctx):
-        recent  = get_messages_last_72h(self.bot.messages_by_channel)
+        from bot.mails_management import format_messages_for_email
+        recent  = get_messages_last_72h(guild_state(self.bot, ctx.guild).messages_by_channel)
         summary = format_messages_for_email(recent)
         if summary.strip():
             await ctx.send(summary[:1900] + ("..." if len(summary) > 1900 else ""))
@@ -404,14 +1088,41 @@ async def help2_cmd(ctx):
     await ctx.send(embed=embed_init, view=view)
 
 # ============================================================
-# 5) setup() — ajoute tous les cogs
+# 5) Métriques : durée et statut de chaque commande (hooks globaux)
+# ============================================================
+async def _before_command(ctx):
+    ctx._metrics_t0 = time.perf_counter()
+    # BOT_PROFILE : commandes e-mail / messages profilées (hors !profile, déjà sous profil)
+    if not isinstance(getattr(ctx, "cog", None), (EmailCog, MessagesCog)):
+        return
+    from bot.profiling import Profiler, ProfilerBusy, profile_enabled
+    if profile_enabled(ctx.command.qualified_name):
+        try:
+            ctx._profiler = Profiler(ctx.command.qualified_name).start()
+        except ProfilerBusy:
+            pass
+
+async def _after_command(ctx):
+    name = ctx.command.qualified_name
+    COMMAND_SECONDS.observe(time.perf_counter() - getattr(ctx, "_metrics_t0", time.perf_counter()), command=name)
+    COMMANDS_TOTAL.inc(command=name, status="error" if ctx.command_failed else "ok")
+    ctx._metrics_done = True
+    profiler = getattr(ctx, "_profiler", None)
+    if profiler is not None:
+        report = profiler.stop()
+        log.info("[PROFILE] !%s : %.2f s → %s", name, report.wall_s, report.pstats_path)
+
+# ============================================================
+# 6) setup() — ajoute tous les cogs
 # ============================================================
 async def setup(bot: commands.Bot):
+    bot.before_invoke(_before_command)
+    bot.after_invoke(_after_command)
     await bot.add_cog(EmailCog(bot))
     await bot.add_cog(MessagesCog(bot))
     await bot.add_cog(CanauxCog(bot))
     await bot.add_cog(DebugCog(bot))
     bot.add_command(help2_cmd)
-    print("[SETUP] Cogs chargés avec succès.")
+    log.info("[SETUP] Cogs chargés avec succès.")
     return bot
 # Fin de bot/discord_bot_commands.py
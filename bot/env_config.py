@@ -106,3 +106,171 @@ def get_important_msg_id():
 def get_excluded_msg_id():
     v = os.getenv("EXCLUDED_MSG_ID")
     return int(v) if v else None
+
+def get_keywords_msg_id():
+    v = os.getenv("KEYWORDS_MSG_ID")
+    return int(v) if v else None
+
+
+def get_ingest_queue_maxsize(default: int = 10_000):
+    """Taille max de la file d'ingestion (INGEST_QUEUE_MAXSIZE)."""
+    value = os.getenv("INGEST_QUEUE_MAXSIZE")
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def get_ingest_policy(default: str = "drop_oldest"):
+    """Politique si la file d'ingestion est pleine (INGEST_POLICY : drop_new | drop_oldest | spill)."""
+    return os.getenv("INGEST_POLICY", default)
+
+
+def get_shard_count():
+    """Nombre de shards imposé (SHARD_COUNT) ; None → nombre recommandé par Discord."""
+    v = os.getenv("SHARD_COUNT")
+    return int(v) if v else None
+
+
+def get_bot_mode(default: str = "all"):
+    """BOT_MODE : "all" (un seul processus) ou "ingest" (rapports confiés à python -m bot.worker)."""
+    return os.getenv("BOT_MODE", default).strip().lower()
+
+
+def get_journal_path(default: str = os.path.join("data", "journal.sqlite3")):
+    """Journal SQLite partagé entre ingestion et worker (JOURNAL_PATH)."""
+    return os.getenv("JOURNAL_PATH", default)
+
+
+def get_worker_address(default: str = "127.0.0.1:8765"):
+    """Adresse IPC locale du worker (WORKER_IPC_ADDRESS, "hôte:port") → (hôte, port)."""
+    host, _, port = os.getenv("WORKER_IPC_ADDRESS", default).rpartition(":")
+    try:
+        return host or "127.0.0.1", int(port)
+    except ValueError:
+        return "127.0.0.1", 8765
+
+
+def get_worker_ipc_token():
+    """Jeton partagé optionnel pour l'IPC worker (WORKER_IPC_TOKEN)."""
+    return os.getenv("WORKER_IPC_TOKEN") or None
+
+
+def get_worker_processes(default=None):
+    """Processus de rendu du worker (WORKER_PROCESSES) ; défaut : nombre de cœurs."""
+    value = os.getenv("WORKER_PROCESSES")
+    try:
+        return max(1, int(value)) if value else (default or os.cpu_count() or 1)
+    except ValueError:
+        return default or os.cpu_count() or 1
+
+
+def get_journal_retention_days(default: int = 7):
+    """Nombre de jours conservés dans le journal (JOURNAL_RETENTION_DAYS)."""
+    value = os.getenv("JOURNAL_RETENTION_DAYS")
+    try:
+        return int(value) if value else default
+    except ValueError:
+        return default
+
+
+def get_thread_crawl_concurrency(default: int = 4):
+    """Nombre de fils lus en parallèle au rattrapage (THREAD_CRAWL_CONCURRENCY)."""
+    value = os.getenv("THREAD_CRAWL_CONCURRENCY")
+    if value is None:
+        return default
+    try:
+        return max(1, int(value))
+    except ValueError:
+        return default
+
+
+def get_health_address():
+    """
+    Serveur HTTP de santé (/healthz, /readyz, /metrics) : HEALTH_PORT (ex. 8080),
+    HEALTH_HOST (défaut 0.0.0.0). HEALTH_PORT absent → serveur désactivé (None).
+    """
+    port = os.getenv("HEALTH_PORT")
+    if not port:
+        return None
+    try:
+        return os.getenv("HEALTH_HOST", "0.0.0.0"), int(port)
+    except ValueError:
+        return None
+
+
+def get_bot_profile():
+    """
+    BOT_PROFILE : jobs / commandes profilés automatiquement (bot.profiling).
+    "all" (ou "1") → tous ; sinon liste séparée par des virgules
+    (ex. "daily,populate,preview_mail"). Absent → frozenset() (désactivé).
+    """
+    value = os.getenv("BOT_PROFILE", "").strip().lower()
+    if value in ("", "0", "false", "off"):
+        return frozenset()
+    if value in ("1", "true", "on", "all", "*"):
+        return frozenset({"*"})
+    return frozenset(name.strip() for name in value.split(",") if name.strip())
+
+
+def get_memory_budgets(default_channel_kb=None, default_total_mb=None):
+    """
+    Budgets mémoire du buffer (bot.memory) → dict(channel_budget, total_budget, policy) :
+    MEMORY_CHANNEL_BUDGET_KB par canal, MEMORY_BUFFER_BUDGET_MB par guild
+    (absents → valeurs par défaut, illimités si None), MEMORY_POLICY : "evict" (défaut) ou "spill".
+    """
+    def _bytes(name, unit, default):
+        value = os.getenv(name)
+        try:
+            return int(float(value) * unit) if value else (None if default is None else int(default * unit))
+        except ValueError:
+            return None
+
+    return {
+        "channel_budget": _bytes("MEMORY_CHANNEL_BUDGET_KB", 1024, default_channel_kb),
+        "total_budget": _bytes("MEMORY_BUFFER_BUDGET_MB", 1024 * 1024, default_total_mb),
+        "policy": os.getenv("MEMORY_POLICY", "evict").strip().lower(),
+    }
+
+
+def get_tracemalloc_frames(default: int = 0):
+    """Profondeur de pile tracemalloc pour !memory (MEMORY_TRACEMALLOC, 0 = désactivé)."""
+    value = os.getenv("MEMORY_TRACEMALLOC")
+    try:
+        return max(0, int(value)) if value else default
+    except ValueError:
+        return default
+
+
+def get_log_config():
+    """
+    Journalisation (bot.logging_setup) → dict(level, format, sampling, rate_limit) :
+    LOG_LEVEL (INFO), LOG_FORMAT ("json" ou "text"), LOG_SAMPLING
+    ("logger=fraction,…", vide = tout garder), LOG_RATE_LIMIT_S (60, 0 = sans limite).
+    """
+    try:
+        rate_limit = float(os.getenv("LOG_RATE_LIMIT_S", "60"))
+    except ValueError:
+        rate_limit = 60.0
+    return {
+        "level": os.getenv("LOG_LEVEL", "INFO").strip().upper(),
+        "format": os.getenv("LOG_FORMAT", "json").strip().lower(),
+        "sampling": os.getenv("LOG_SAMPLING", ""),
+        "rate_limit": rate_limit,
+    }
+
+
+def get_loop_lag_threshold(default: float = 0.25) -> float:
+    """
+    Seuil de blocage de la boucle asyncio, en secondes (LOOP_LAG_THRESHOLD_MS,
+    défaut 250 ms). 0 → surveillance désactivée.
+    """
+    value = os.getenv("LOOP_LAG_THRESHOLD_MS")
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value) / 1000)
+    except ValueError:
+        return default
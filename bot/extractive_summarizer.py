@@ -0,0 +1,169 @@
+# bot/extractive_summarizer.py
+
+"""
+Description:
+    Résumé extractif (TF-IDF) des canaux "généraux", calculé en lot :
+    toutes les phrases de tous les canaux d'une journée sont placées dans
+    UNE matrice creuse (format COO en NumPy) et scorées en une seule passe
+    vectorisée. Chaque phrase reçoit un score = similarité cosinus avec le
+    centroïde TF-IDF de son canal (= phrase la plus "représentative").
+    Tourne hors-ligne, sur CPU, sans modèle externe.
+Uses: re, time, numpy (optionnel : repli sur naive_summarize si absent)
+Args: (selon la fonction)  ||  Returns: dict {canal: résumé}
+"""
+
+from __future__ import annotations
+
+import re
+import time
+
+try:
+    import numpy as np
+except ImportError:  # numpy absent → on garde le résumé naïf
+    np = None
+
+from bot.summarizer import naive_summarize
+
+# Budget de latence par appel (secondes) avant repli sur naive_summarize
+DEFAULT_BUDGET_S = 0.25
+
+# Même découpage que naive_summarize pour garder un rendu cohérent
+_SENTENCE_SPLIT_RE = re.compile(r"[.!?]")
+_TOKEN_RE = re.compile(r"\w{3,}", re.UNICODE)
+
+
+def _split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT_RE.split(text) if s.strip()]
+
+
+def _join_extract(sentences: list[str], n_total: int, max_sentences: int, max_length: int) -> str:
+    """Assemble l'extrait avec les mêmes conventions que naive_summarize."""
+    extracted = ". ".join(sentences)
+    if n_total > max_sentences:
+        extracted += "."
+    if len(extracted) > max_length:
+        extracted = extracted[:max_length] + " [...]"
+    if n_total > max_sentences:
+        extracted += " (résumé...)"
+    return extracted
+
+
+class BatchSummary(dict):
+    """{canal: résumé} ; fallback=True si c'est le repli naive_summarize (à ne pas cacher comme extractif)."""
+
+    fallback = False
+
+
+def _fallback(channel_blobs: dict[str, str], max_sentences: int, max_length: int) -> BatchSummary:
+    out = BatchSummary(
+        (ch, naive_summarize(blob, max_sentences=max_sentences, max_length=max_length))
+        for ch, blob in channel_blobs.items()
+    )
+    out.fallback = True
+    return out
+
+
+def summarize_channels_batch(
+    channel_blobs: dict[str, str],
+    *,
+    max_sentences: int = 3,
+    max_length: int = 450,
+    budget_s: float = DEFAULT_BUDGET_S,
+) -> BatchSummary:
+    """
+    Résume plusieurs canaux en un seul passage TF-IDF vectorisé.
+    - channel_blobs : {canal: texte concaténé (ex: "Auteur: msg • Auteur: msg")}
+    - budget_s : si le calcul dépasse ce budget, on renvoie naive_summarize
+      (résultat marqué .fallback = True)
+    Chaque canal est scoré avec ses seules phrases (idf par canal) : le lot
+    ne sert qu'à vectoriser, il ne change pas le résultat.
+    Les canaux ayant <= max_sentences phrases sont rendus tels quels (comme naive_summarize).
+    """
+    if not channel_blobs:
+        return BatchSummary()
+    if np is None or budget_s <= 0:
+        return _fallback(channel_blobs, max_sentences, max_length)
+
+    deadline = time.perf_counter() + budget_s
+    channels = list(channel_blobs.keys())
+
+    # 1) Découpage + tokenisation (seule partie en Python pur)
+    sentences_by_ch: list[list[str]] = []
+    vocab: dict[str, int] = {}
+    rows: list[int] = []
+    cols: list[int] = []
+    sent_channel: list[int] = []
+    row = 0
+    for ci, ch in enumerate(channels):
+        sents = _split_sentences(channel_blobs[ch])
+        sentences_by_ch.append(sents)
+        if len(sents) <= max_sentences:
+            continue  # rien à choisir, pas besoin de scorer
+        for s in sents:
+            for tok in _TOKEN_RE.findall(s.lower()):
+                cols.append(vocab.setdefault(tok, len(vocab)))
+                rows.append(row)
+            sent_channel.append(ci)
+            row += 1
+        if time.perf_counter() > deadline:
+            return _fallback(channel_blobs, max_sentences, max_length)
+
+    scores = np.zeros(row, dtype=np.float64)
+    if cols:
+        scores = _score_sentences(
+            np.asarray(rows, dtype=np.int64),
+            np.asarray(cols, dtype=np.int64),
+            np.asarray(sent_channel, dtype=np.int64),
+            n_sentences=row,
+            n_terms=len(vocab),
+        )
+    if time.perf_counter() > deadline:
+        return _fallback(channel_blobs, max_sentences, max_length)
+
+    # 2) Sélection top-k par canal, ordre d'origine conservé
+    out = BatchSummary()
+    offset = 0
+    for ch, sents in zip(channels, sentences_by_ch):
+        if len(sents) <= max_sentences:
+            out[ch] = naive_summarize(channel_blobs[ch], max_sentences=max_sentences, max_length=max_length)
+            continue
+        ch_scores = scores[offset:offset + len(sents)]
+        offset += len(sents)
+        # tri stable : à score égal, la phrase la plus ancienne gagne
+        top = np.sort(np.argsort(-ch_scores, kind="stable")[:max_sentences])
+        out[ch] = _join_extract([sents[i] for i in top], len(sents), max_sentences, max_length)
+    return out
+
+
+def _score_sentences(rows, cols, sent_channel, *, n_sentences: int, n_terms: int):
+    """
+    Score TF-IDF de chaque phrase (cosinus phrase ↔ centroïde de son canal).
+    Tout est calculé sur la matrice creuse (rows, cols) sans boucle Python.
+    """
+    # Fréquences (tf) : dédoublonnage des couples (phrase, terme)
+    keys, tf = np.unique(rows * n_terms + cols, return_counts=True)
+    r = keys // n_terms
+    c = keys % n_terms
+
+    # idf lissé (comme scikit-learn) calculé par canal : log((1+N_canal)/(1+df_canal)) + 1.
+    # Le résumé d'un canal ne dépend que de ses phrases, pas des autres canaux du lot
+    # (le cache par canal de mails_management reste exact, rendu déterministe).
+    ch = sent_channel[r]
+    n_channels = int(sent_channel.max()) + 1
+    ckeys, inv = np.unique(ch * n_terms + c, return_inverse=True)
+    inv = inv.reshape(-1)
+    df = np.bincount(inv)
+    n_per_channel = np.bincount(sent_channel, minlength=n_channels)
+    w = tf * (np.log((1.0 + n_per_channel[ch]) / (1.0 + df[inv])) + 1.0)
+
+    # Normalisation L2 des phrases
+    row_norm = np.sqrt(np.bincount(r, weights=w * w, minlength=n_sentences))
+    w = w / row_norm[r]
+
+    # Centroïde par canal (somme des vecteurs phrases), puis normalisation
+    cw = np.bincount(inv, weights=w)
+    c_norm = np.sqrt(np.bincount(ckeys // n_terms, weights=cw * cw, minlength=n_channels))
+    c_norm[c_norm == 0] = 1.0
+
+    # Produit scalaire phrase · centroïde(canal)
+    return np.bincount(r, weights=w * cw[inv] / c_norm[ch], minlength=n_sentences)
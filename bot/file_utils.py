@@ -1,9 +1,14 @@
 
 import os
 import json
+import logging
 from datetime import datetime
 from discord.ext import commands
 
+from bot.near_duplicates import simhash64
+
+log = logging.getLogger(__name__)
+
 def reset_messages(bot: commands.Bot):
     bot.messages_by_channel["important"].clear()
     bot.messages_by_channel["general"].clear()
@@ -13,14 +18,20 @@ def generate_report_filename():
     # ex. "rapport_2025.02.24_20h45.json"
     return now.strftime("rapport_%Y.%m.%d_%Hh%M.json")
 
-def save_messages_to_file(messages_dict):
+def save_messages_to_file(messages_dict, directory: str = "rapports"):
     """
     Sauvegarde le contenu de messages_dict dans un fichier JSON,
     avec une en-tête comportant date min, date max, nb de messages...
+    directory : dossier des rapports (un sous-dossier par guild hors guild historique).
     """
     all_timestamps = []
     total_msgs = 0
 
+    # Les messages supprimés (pierres tombales) ne sont pas archivés
+    messages_dict = {
+        category: {name: [m for m in msgs if not m.get("deleted")] for name, msgs in channels_map.items()}
+        for category, channels_map in messages_dict.items()
+    }
     for category, channels_map in messages_dict.items():
         for channel_name, msgs in channels_map.items():
             for msg in msgs:
@@ -45,7 +56,8 @@ def save_messages_to_file(messages_dict):
         "messages": messages_dict,  # tout le contenu
     }
     filename = generate_report_filename()
-    full_path = os.path.join("rapports", filename)
+    os.makedirs(directory, exist_ok=True)
+    full_path = os.path.join(directory, filename)
     # On sérialise en JSON (en convertissant datetime en string)
     def custom_serializer(obj):
         if isinstance(obj, datetime):
@@ -54,4 +66,31 @@ def save_messages_to_file(messages_dict):
     with open(full_path, "w", encoding="utf-8") as f:
         json.dump(data_to_save, f, default=custom_serializer, indent=2)
 
-    print(f"[SAVE] Fichier {filename} sauvegardé (nb_msgs={total_msgs}).")
+    log.info("[SAVE] Fichier %s sauvegardé (nb_msgs=%d).", filename, total_msgs)
+
+
+def load_messages_from_file(path: str):
+    """
+    Inverse de save_messages_to_file : relit un rapport JSON et renvoie
+    (metadata, messages_dict) au format du buffer (timestamps en datetime).
+    Les anciens rapports sans empreinte / mots-clés sont complétés
+    (empreinte recalculée, mots-clés vides).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read()
+    if not raw.strip():
+        raise ValueError(f"Rapport vide : {path}")
+    data = json.loads(raw)
+    messages_dict = {"important": {}, "general": {}}
+    for category, channels_map in data.get("messages", {}).items():
+        for channel_name, msgs in channels_map.items():
+            entries = []
+            for msg in msgs:
+                entry = dict(msg)
+                entry["timestamp"] = datetime.fromisoformat(msg["timestamp"])
+                if entry.get("fingerprint") is None:
+                    entry["fingerprint"] = simhash64(entry.get("content", ""))
+                entry.setdefault("keywords", [])
+                entries.append(entry)
+            messages_dict.setdefault(category, {})[channel_name] = entries
+    return data.get("metadata", {}), messages_dict
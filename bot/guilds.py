@@ -0,0 +1,216 @@
+# bot/guilds.py
+
+"""
+Description:
+    Fonctionnement multi-serveurs (plusieurs guilds, AutoShardedBot).
+    Chaque guild a son propre état : buffer de messages, listes (importants /
+    exclus / mots-clés), #bot-storage, copie locale de la config, file
+    d'ingestion, destinataires et heure de l'envoi quotidien.
+    - GuildConfig : réglages d'une guild, lus dans data/guilds.json
+      {"<guild_id>": {"recipients": [...], "daily_at": "07:00",
+                      "storage_channel_id": 123, "data_dir": "..."}}
+      La guild qui contient BOT_STORAGE_CHANNEL_ID (.env) garde le
+      fonctionnement historique (legacy) : data/, rapports/, RECIPIENT_EMAIL.
+    - GuildContext : vue « bot » d'une guild. Les attributs d'état
+      (GUILD_FIELDS) sont propres à la guild ; le reste (user, get_channel,
+      fetch_channel, command_prefix…) est délégué au bot. Les fonctions qui
+      prennent `bot` (ensure_storage_loaded, populate_initial_messages,
+      IngestionPipeline, StoreWriter…) s'appliquent donc telles quelles à une guild.
+    - GuildRegistry : {guild_id: GuildContext}
+Uses: json, os, bot.classification, bot.config_store, bot.keywords, bot.message_index, bot.permissions
+Args: (selon la fonction)  ||  Returns: (contexte de guild)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import NamedTuple
+
+from bot.classification import ChannelClassifier
+from bot.config_store import LocalConfigStore
+from bot.keywords import KeywordMatcher
+from bot.message_index import MessageIndex
+from bot.permissions import ReadableChannels
+
+log = logging.getLogger(__name__)
+
+GUILDS_CONFIG_PATH = os.path.join("data", "guilds.json")
+STORAGE_CHANNEL_NAME = "bot-storage"
+
+# Attributs « bot » propres à chaque guild
+GUILD_FIELDS = frozenset({
+    "messages_by_channel",
+    "important_channels",
+    "excluded_channels",
+    "keywords",
+    "keyword_matcher",
+    "channel_classifier",
+    "message_index",
+    "readable_channels",
+    "local_config",
+    "store_writer",
+    "_store",
+    "_store_loading",
+    "ingestion",
+    "buffer_memory",
+    "backfill",
+    "store_sync_task",
+    "populate_task",
+    "daily_task",
+})
+
+
+class GuildConfig(NamedTuple):
+    data_dir: str
+    reports_dir: str = "rapports"
+    storage_channel_id: int | None = None   # None → canal nommé "bot-storage" dans la guild
+    recipients: tuple[str, ...] = ()        # vide + legacy → RECIPIENT_EMAIL (.env)
+    daily_at: tuple[int, int] = (7, 0)      # heure Europe/Brussels
+    legacy: bool = False
+
+
+def _parse_daily_at(value: str) -> tuple[int, int]:
+    try:
+        hour, minute = (int(x) for x in str(value).split(":", 1))
+        if 0 <= hour < 24 and 0 <= minute < 60:
+            return hour, minute
+    except ValueError:
+        pass
+    log.warning("[GUILDS] daily_at invalide (%r) → 07:00", value)
+    return 7, 0
+
+
+def load_guild_configs(path: str = GUILDS_CONFIG_PATH) -> dict[int, dict]:
+    """Réglages bruts par guild (fichier absent → {})."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        return {int(k): v for k, v in raw.items() if isinstance(v, dict)}
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def guild_config_for(guild, raw_configs: dict[int, dict], legacy_storage_id: int | None = None) -> GuildConfig:
+    raw = raw_configs.get(guild.id, {})
+    legacy = legacy_storage_id is not None and guild.get_channel(legacy_storage_id) is not None
+    default_dir = "data" if legacy else os.path.join("data", "guilds", str(guild.id))
+    return GuildConfig(
+        data_dir=raw.get("data_dir") or default_dir,
+        reports_dir="rapports" if legacy else os.path.join("rapports", str(guild.id)),
+        storage_channel_id=raw.get("storage_channel_id") or (legacy_storage_id if legacy else None),
+        recipients=tuple(raw.get("recipients") or ()),
+        daily_at=_parse_daily_at(raw.get("daily_at", "07:00")),
+        legacy=legacy,
+    )
+
+
+class GuildContext:
+    """État d'une guild, utilisable partout où une fonction attend `bot`."""
+
+    def __init__(self, bot, guild_id: int, config: GuildConfig):
+        object.__setattr__(self, "_bot", bot)
+        object.__setattr__(self, "guild_id", guild_id)
+        object.__setattr__(self, "guild_config", config)
+        self.messages_by_channel = {"important": {}, "general": {}}
+        self.important_channels = []
+        self.excluded_channels = []
+        self.keywords = []
+        self.keyword_matcher = KeywordMatcher()
+        self.channel_classifier = ChannelClassifier()
+        self.message_index = MessageIndex()
+        self.readable_channels = ReadableChannels()
+        self.local_config = LocalConfigStore(config.data_dir)
+
+    def __getattr__(self, name):
+        # appelé seulement si l'attribut n'existe pas sur le contexte
+        if name in GUILD_FIELDS:
+            raise AttributeError(name)
+        return getattr(self._bot, name)
+
+    def __setattr__(self, name, value):
+        if name in GUILD_FIELDS:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._bot, name, value)
+
+    def __repr__(self) -> str:
+        return f"<GuildContext guild_id={self.guild_id}>"
+
+    @property
+    def guild(self):
+        return self._bot.get_guild(self.guild_id)
+
+    @property
+    def guilds(self) -> list:
+        guild = self.guild
+        return [guild] if guild is not None else []
+
+
+class GuildRegistry:
+    """{guild_id: GuildContext}, créés à la connexion ou à l'arrivée dans une guild."""
+
+    def __init__(self, bot, raw_configs: dict[int, dict] | None = None, legacy_storage_id: int | None = None):
+        self.bot = bot
+        self.raw_configs = raw_configs or {}
+        self.legacy_storage_id = legacy_storage_id
+        self._by_id: dict[int, GuildContext] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(list(self._by_id.values()))
+
+    def get(self, guild_id: int | None) -> GuildContext | None:
+        return self._by_id.get(guild_id)
+
+    def ensure(self, guild) -> tuple[GuildContext, bool]:
+        """Contexte de la guild ; (contexte, True) s'il vient d'être créé."""
+        state = self._by_id.get(guild.id)
+        if state is not None:
+            return state, False
+        config = guild_config_for(guild, self.raw_configs, self.legacy_storage_id)
+        state = self._by_id[guild.id] = GuildContext(self.bot, guild.id, config)
+        return state, True
+
+    def remove(self, guild_id: int) -> GuildContext | None:
+        return self._by_id.pop(guild_id, None)
+
+    def legacy(self) -> GuildContext | None:
+        return next((s for s in self._by_id.values() if s.guild_config.legacy), None)
+
+
+def guild_state(bot, guild=None):
+    """
+    Contexte de la guild (objet guild ou ID) ; sans guild (MP) → guild historique.
+    Bot sans registre (tests, mono-guild) → le bot lui-même.
+    """
+    registry = getattr(bot, "guild_contexts", None)
+    if not isinstance(registry, GuildRegistry):
+        return bot
+    guild_id = getattr(guild, "id", guild)
+    state = registry.get(guild_id) if guild_id is not None else registry.legacy()
+    return state if state is not None else bot
+
+
+def guild_states(bot) -> list:
+    """Tous les contextes de guild (ou [bot] sans registre)."""
+    registry = getattr(bot, "guild_contexts", None)
+    return list(registry) if isinstance(registry, GuildRegistry) else [bot]
+
+
+def guild_recipients(bot, default) -> list[str]:
+    """
+    Destinataires du rapport ; `default()` (RECIPIENT_EMAIL) pour la guild historique.
+    Valeurs vides (RECIPIENT_EMAIL absent) écartées : liste vide = pas d'envoi.
+    """
+    config = getattr(bot, "guild_config", None)
+    if not isinstance(config, GuildConfig):
+        recipients = [default()]
+    elif config.recipients:
+        recipients = list(config.recipients)
+    else:
+        recipients = [default()] if config.legacy else []
+    return [r for r in recipients if r]
@@ -0,0 +1,153 @@
+# bot/health.py
+
+"""
+Description:
+    Petit serveur HTTP de santé, sur la boucle du bot (aiohttp, déjà
+    installé avec discord.py), activé par HEALTH_PORT :
+    - GET /healthz : vivant (200 tant que le client n'est pas fermé) + télémétrie
+      JSON : latence gateway, secondes depuis le dernier message, buffer par
+      catégorie, file d'ingestion, dernier / prochain rapport, dernier envoi
+      SMTP (résultat, durée), mémoire du processus, blocages de la boucle,
+      durée du démarrage et avancement du backfill de chaque guild
+    - GET /readyz  : prêt (200) si le gateway est connecté et chaque guild démarrée, sinon 503
+    - GET /metrics : exposition Prometheus (bot.metrics.REGISTRY)
+    Sondes Railway / Uptime Kuma sans passer par une commande Discord.
+Uses: aiohttp.web, bot.guilds, bot.memory, bot.metrics, bot.startup
+Args: (bot)  ||  Returns: (réponses HTTP JSON / texte)
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+from bot.guilds import GuildRegistry, guild_states
+from bot.memory import process_memory
+from bot.startup import BackfillProgress, StartupClock
+from bot.metrics import (
+    REGISTRY,
+    DAILY_LAST_RUN,
+    DAILY_NEXT_RUN,
+    SMTP_LAST_SECONDS,
+    SMTP_LAST_SUCCESS,
+    SMTP_TOTAL,
+)
+
+log = logging.getLogger(__name__)
+
+
+def _iso(ts: float | None) -> str | None:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+
+def _gateway_latency_ms(bot) -> float | None:
+    latency = getattr(bot, "latency", None)
+    if latency is None or not math.isfinite(latency):
+        return None  # pas encore de heartbeat
+    return round(latency * 1000, 1)
+
+
+def telemetry(bot) -> dict:
+    now = time.time()
+    buffer = {"important": 0, "general": 0}
+    buffer_bytes = 0
+    queue_depth = dropped = 0
+    backfill_running = []
+    backfill = {}
+    for state in guild_states(bot):
+        for category, channels in getattr(state, "messages_by_channel", {}).items():
+            buffer[category] = buffer.get(category, 0) + sum(len(msgs) for msgs in channels.values())
+        memory = getattr(state, "buffer_memory", None)
+        if memory is not None:
+            buffer_bytes += memory.total()
+        ingestion = getattr(state, "ingestion", None)
+        if ingestion is not None:
+            stats = ingestion.stats()
+            queue_depth += stats["depth"]
+            dropped += stats["dropped"]
+        task = getattr(state, "populate_task", None)
+        if task is not None and not task.done():
+            backfill_running.append(getattr(state, "guild_id", None))
+        progress = getattr(state, "backfill", None)
+        if isinstance(progress, BackfillProgress):
+            backfill[str(getattr(state, "guild_id", None))] = progress.snapshot()
+
+    last_message = getattr(bot, "last_message_at", None)
+    monitor = getattr(bot, "loop_monitor", None)
+    startup = getattr(bot, "startup", None)
+    smtp_ok = SMTP_LAST_SUCCESS.value()
+    return {
+        "uptime_s": round(REGISTRY.uptime(), 1),
+        "gateway_latency_ms": _gateway_latency_ms(bot),
+        "seconds_since_last_message": round(now - last_message, 1) if last_message else None,
+        "buffer": buffer,
+        "buffer_bytes": buffer_bytes,
+        "ingestion": {"queue_depth": queue_depth, "dropped": dropped},
+        "backfill_running": backfill_running,
+        "backfill": backfill,
+        "startup": startup.snapshot() if isinstance(startup, StartupClock) else None,
+        "daily": {
+            "last_run": _iso(DAILY_LAST_RUN.value()),
+            "next_runs": {labels["job"]: _iso(ts) for labels, ts in DAILY_NEXT_RUN.series()},
+        },
+        "smtp": {
+            "last_success": None if smtp_ok is None else bool(smtp_ok),
+            "last_duration_s": SMTP_LAST_SECONDS.value(),
+            "sent_ok": SMTP_TOTAL.value(result="ok"),
+            "sent_error": SMTP_TOTAL.value(result="error"),
+        },
+        "memory": process_memory(),
+        "event_loop": monitor.snapshot() if monitor is not None else None,
+    }
+
+
+def readiness(bot) -> list[str]:
+    """Raisons de ne pas être prêt (liste vide = prêt)."""
+    reasons = []
+    if bot.is_closed():
+        reasons.append("client Discord fermé")
+    elif not bot.is_ready():
+        reasons.append("gateway pas encore prêt")
+    registry = getattr(bot, "guild_contexts", None)
+    if isinstance(registry, GuildRegistry):
+        if not len(registry):
+            reasons.append("aucune guild démarrée")
+        for state in registry:
+            if getattr(state, "ingestion", None) is None:
+                reasons.append(f"guild {state.guild_id} : file d'ingestion absente")
+    return reasons
+
+
+def build_app(bot) -> web.Application:
+    async def healthz(request):
+        status = 503 if bot.is_closed() else 200
+        return web.json_response({"status": "ok" if status == 200 else "closed", **telemetry(bot)}, status=status)
+
+    async def readyz(request):
+        reasons = readiness(bot)
+        return web.json_response({"ready": not reasons, "reasons": reasons}, status=503 if reasons else 200)
+
+    async def metrics(request):
+        return web.Response(
+            text=REGISTRY.render_prometheus(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    app = web.Application()
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/readyz", readyz)
+    app.router.add_get("/metrics", metrics)
+    return app
+
+
+async def start_health_server(bot, host: str, port: int) -> web.AppRunner:
+    """Démarre le serveur sur la boucle courante ; runner.cleanup() pour l'arrêter."""
+    runner = web.AppRunner(build_app(bot), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    log.info("[HEALTH] /healthz, /readyz, /metrics sur http://%s:%d", host, port)
+    return runner
@@ -0,0 +1,320 @@
+# bot/ingestion.py
+
+"""
+Description:
+    Pipeline d'ingestion des messages live.
+    - on_message → submit() : chemin rapide, met juste un enregistrement
+      compact dans une asyncio.Queue bornée (aucun calcul, aucune E/S)
+    - run() : tâche consommatrice qui vide la file par lots et fait le travail
+      (classement, empreinte SimHash, mots-clés, ajout au buffer, sinks)
+      ; un message mal formé est compté (stats()["errors"]) et ignoré, le
+      reste du lot est appliqué
+    - file pleine : politique "drop_new", "drop_oldest" ou "spill" (débordement
+      sur disque en JSON lines, ré-injecté quand la file se vide)
+    - budgets mémoire du buffer (bot.memory) appliqués après chaque lot
+    - stats() : profondeur, pic, pertes, débordements, erreurs, latence file → buffer
+Uses: asyncio, json, time, bot.near_duplicates, bot.keywords, bot.metrics
+Args: (selon la méthode)  ||  Returns: (selon la méthode)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import NamedTuple
+
+from bot.classification import is_thread
+from bot.keywords import KeywordMatcher
+from bot.metrics import INGEST_BATCH_SECONDS, INGESTED_MESSAGES
+from bot.near_duplicates import simhash64
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAXSIZE = 10_000
+DEFAULT_BATCH_SIZE = 200
+POLICIES = ("drop_new", "drop_oldest", "spill")
+SPILL_PATH = os.path.join("data", "ingestion_spill.jsonl")
+
+
+class IngestRecord(NamedTuple):
+    message_id: int
+    channel: object       # discord.TextChannel (ou tout objet avec .id / .name)
+    author: str
+    content: str
+    created_at: datetime
+    enqueued_at: float    # time.perf_counter() à la mise en file
+
+
+def make_buffer_entry(
+    author: str,
+    content: str,
+    timestamp: datetime,
+    matcher: KeywordMatcher | None = None,
+    message_id: int | None = None,
+) -> dict:
+    """Entrée du buffer messages_by_channel (+ index calculés une fois à l'ingestion)."""
+    return {
+        "id":          message_id,
+        "author":      author,
+        "content":     content,
+        "timestamp":   timestamp,
+        "fingerprint": simhash64(content),
+        "keywords":    sorted(matcher.scan(content)) if matcher else [],
+    }
+
+
+class IngestionPipeline:
+    def __init__(
+        self,
+        bot,
+        *,
+        maxsize: int = DEFAULT_MAXSIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        policy: str = "drop_oldest",
+        spill_path: str = SPILL_PATH,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Politique inconnue : {policy} (attendu : {', '.join(POLICIES)})")
+        self.bot = bot
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.policy = policy
+        self.spill_path = spill_path
+        # sinks supplémentaires : callables(list[tuple[cat, canal, entrée]]) appelés après chaque lot
+        self.sinks: list = []
+        self._task: asyncio.Task | None = None
+        # métriques
+        self.enqueued = 0
+        self.processed = 0
+        self.batches = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.errors = 0             # messages mal formés ignorés (le reste du lot passe)
+        self.high_water = 0
+        self.max_batch = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+
+    # ---------- chemin rapide (on_message) ----------
+
+    def submit(self, message) -> bool:
+        """Met un message en file sans bloquer. False si le message a été écarté."""
+        record = IngestRecord(
+            message.id, message.channel, message.author.name,
+            message.content, message.created_at, time.perf_counter(),
+        )
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            return self._on_full(record)
+        self.enqueued += 1
+        depth = self.queue.qsize()
+        if depth > self.high_water:
+            self.high_water = depth
+        return True
+
+    def _on_full(self, record: IngestRecord) -> bool:
+        if self.policy == "drop_new":
+            self.dropped += 1
+            return False
+        if self.policy == "drop_oldest":
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.dropped += 1
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+            return True
+        self._spill(record)
+        return True
+
+    def _spill(self, record: IngestRecord) -> None:
+        line = json.dumps({
+            "message_id": record.message_id,
+            "channel_id": record.channel.id,
+            "channel_name": record.channel.name,
+            "author": record.author,
+            "content": record.content,
+            "created_at": record.created_at.isoformat(),
+        }, ensure_ascii=False)
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.spilled += 1
+        except OSError:
+            self.dropped += 1
+
+    def _parse_spilled(self, line: str) -> IngestRecord:
+        d = json.loads(line)
+        channel = self.bot.get_channel(d["channel_id"]) or SimpleNamespace(id=d["channel_id"], name=d["channel_name"])
+        return IngestRecord(
+            d["message_id"], channel, d["author"], d["content"],
+            datetime.fromisoformat(d["created_at"]), time.perf_counter(),
+        )
+
+    def _reload_spill(self) -> None:
+        """
+        File vide : ré-injecte ce qui a débordé sur disque (dans la limite de la
+        place). Une ligne illisible (ex: tronquée par un arrêt brutal) est comptée
+        dans `errors` et ignorée ; le fichier n'est réécrit qu'après la relecture.
+        """
+        if not os.path.exists(self.spill_path):
+            return
+        with open(self.spill_path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        rest = []
+        for i, line in enumerate(lines):
+            if self.queue.full():
+                rest = lines[i:]
+                break
+            try:
+                record = self._parse_spilled(line)
+            except (ValueError, KeyError, TypeError) as e:
+                self.errors += 1
+                log.warning("[INGEST] Ligne %d de %s illisible, ignorée : %s", i + 1, self.spill_path, e)
+                continue
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        if rest:
+            tmp = self.spill_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(rest)
+            os.replace(tmp, self.spill_path)
+        else:
+            os.remove(self.spill_path)
+
+    # ---------- consommateur ----------
+
+    def apply_batch(self, records: list[IngestRecord]) -> list[tuple[str, str, dict]]:
+        """Classe les messages et les ajoute au buffer. Renvoie les entrées ajoutées."""
+        classifier = self.bot.channel_classifier
+        matcher = getattr(self.bot, "keyword_matcher", None)
+        buffer = self.bot.messages_by_channel
+        index = getattr(self.bot, "message_index", None)
+        memory = getattr(self.bot, "buffer_memory", None)
+        added = []
+        now = time.perf_counter()
+        excluded = duplicates = errors = 0
+        for rec in records:
+            lag = now - rec.enqueued_at
+            self._lag_total += lag
+            self._lag_max = max(self._lag_max, lag)
+            try:
+                cls = classifier.lookup(rec.channel)
+                if cls.excluded:
+                    excluded += 1
+                    continue
+                if index is not None and rec.message_id is not None and rec.message_id in index:
+                    duplicates += 1   # déjà récupéré par le backfill qui tourne en parallèle
+                    continue
+                entry = make_buffer_entry(rec.author, rec.content, rec.created_at, matcher, rec.message_id)
+                if is_thread(rec.channel):
+                    entry["thread"] = rec.channel.name
+            except Exception as e:
+                errors += 1
+                log.warning("[INGEST] Message %s ignoré : %s", getattr(rec, "message_id", None), e, exc_info=True)
+                continue
+            buffer[cls.category].setdefault(cls.name, []).append(entry)
+            if index is not None:
+                index.add(rec.message_id, cls.category, cls.name, entry)
+            if memory is not None:
+                memory.add(cls.category, cls.name, entry)
+            added.append((cls.category, cls.name, entry))
+        for sink in self.sinks:
+            sink(added)
+        if memory is not None and added:
+            memory.enforce(buffer, index, channels={(cat, name) for cat, name, _ in added})
+        self.processed += len(records)
+        self.errors += errors
+        self.batches += 1
+        self.max_batch = max(self.max_batch, len(records))
+        INGESTED_MESSAGES.inc(len(added), result="added")
+        if excluded:
+            INGESTED_MESSAGES.inc(excluded, result="excluded")
+        if duplicates:
+            INGESTED_MESSAGES.inc(duplicates, result="duplicate")
+        if errors:
+            INGESTED_MESSAGES.inc(errors, result="error")
+        INGEST_BATCH_SECONDS.observe(time.perf_counter() - now)
+        # un événement par lot : à échantillonner si besoin (LOG_SAMPLING="bot.ingestion=0.01")
+        log.debug("[INGEST] Lot de %d message(s) : %d ajouté(s), %d exclu(s)", len(records), len(added), excluded,
+                  extra={"batch": len(records)})
+        return added
+
+    def _drain_nowait(self, first: IngestRecord | None = None) -> list[IngestRecord]:
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def run(self) -> None:
+        while True:
+            first = await self.queue.get()
+            batch = self._drain_nowait(first)
+            try:
+                self.apply_batch(batch)
+            except Exception as e:
+                log.exception("[INGEST] Lot de %d messages non appliqué : %s", len(batch), e)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if self.queue.empty() and self.policy == "spill":
+                try:
+                    self._reload_spill()
+                except Exception as e:
+                    log.exception("[INGEST] Relecture de %s impossible : %s", self.spill_path, e)
+            await asyncio.sleep(0)  # laisser respirer la boucle entre deux lots
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        """Arrête le consommateur après avoir appliqué ce qui reste en file."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        while not self.queue.empty():
+            batch = self._drain_nowait()
+            self.apply_batch(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.queue.qsize(),
+            "maxsize": self.queue.maxsize,
+            "high_water": self.high_water,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "batches": self.batches,
+            "max_batch": self.max_batch,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "errors": self.errors,
+            "policy": self.policy,
+            "avg_lag_ms": (self._lag_total / self.processed * 1000) if self.processed else 0.0,
+            "max_lag_ms": self._lag_max * 1000,
+        }
+
+
+def looks_like_command(bot, message) -> bool:
+    """Test bon marché : le message commence-t-il par le préfixe des commandes ?"""
+    prefix = getattr(bot, "command_prefix", "!")
+    content = message.content or ""
+    if isinstance(prefix, str):
+        return content.startswith(prefix)
+    if isinstance(prefix, (list, tuple)):
+        return content.startswith(tuple(prefix))
+    return True  # préfixe dynamique (callable) : on laisse discord.py décider
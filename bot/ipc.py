@@ -0,0 +1,102 @@
+# bot/ipc.py
+
+"""
+Description:
+    IPC locale entre le processus d'ingestion (bot.core) et le processus de
+    rapports (bot.worker) : une requête JSON par ligne sur TCP 127.0.0.1,
+    une réponse JSON par ligne. Jeton partagé optionnel (WORKER_IPC_TOKEN).
+    Requêtes : {"op": "ping"} | {"op": "refresh"} | {"op": "report", "guild_id": 123, "test": false}
+    Délai de réponse par opération (OP_TIMEOUTS) : "report" couvre la lecture
+    du journal, le rendu et l'envoi SMTP, bien plus long qu'un "ping".
+Uses: asyncio, json, bot.env_config
+Args: (selon la fonction)  ||  Returns: dict (réponse du worker)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+
+from bot.env_config import get_worker_address, get_worker_ipc_token
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_TIMEOUT_S = 5.0
+# rendu dans le pool + SMTP (connexion, STARTTLS, login, envoi : 30 s chacun au pire)
+OP_TIMEOUTS = {"report": 180.0}
+
+
+class ReplyTimeout(asyncio.TimeoutError):
+    """Requête remise au worker, mais pas de réponse dans le délai : il la traite peut-être encore."""
+
+
+def op_timeout(payload: dict) -> float:
+    return OP_TIMEOUTS.get(payload.get("op"), DEFAULT_TIMEOUT_S)
+
+
+async def serve(handler, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, token: str | None = None):
+    """Démarre le serveur ; `handler(requête) -> réponse` est une coroutine."""
+
+    async def _client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                try:
+                    req = json.loads(line)
+                    if token and req.get("token") != token:
+                        resp = {"ok": False, "error": "jeton IPC invalide"}
+                    else:
+                        resp = await handler(req)
+                except Exception as e:
+                    resp = {"ok": False, "error": str(e)}
+                writer.write((json.dumps(resp, ensure_ascii=False) + "\n").encode("utf-8"))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(_client, host, port)
+
+
+async def request(
+    payload: dict,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    token: str | None = None,
+    timeout: float | None = None,
+) -> dict:
+    """
+    Envoie une requête au worker et attend sa réponse (OSError / TimeoutError si
+    injoignable). timeout=None : délai propre à l'opération (OP_TIMEOUTS).
+    """
+    if timeout is None:
+        timeout = op_timeout(payload)
+    if token:
+        payload = {**payload, "token": token}
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), min(timeout, DEFAULT_TIMEOUT_S))
+    try:
+        writer.write((json.dumps(payload) + "\n").encode("utf-8"))
+        await writer.drain()
+        try:
+            line = await asyncio.wait_for(reader.readline(), timeout)
+        except asyncio.TimeoutError:
+            raise ReplyTimeout(f"pas de réponse après {timeout:.0f} s") from None
+        return json.loads(line) if line else {"ok": False, "error": "connexion fermée"}
+    finally:
+        writer.close()
+
+
+async def notify_worker(payload: dict) -> dict | None:
+    """
+    Requête au worker configuré (WORKER_IPC_ADDRESS) ; None s'il est injoignable.
+    Requête remise mais restée sans réponse : {"ok": False, "pending": True, ...}
+    (ne pas relancer un "report" à l'aveugle : l'e-mail part peut-être encore).
+    """
+    host, port = get_worker_address()
+    try:
+        return await request(payload, host, port, token=get_worker_ipc_token())
+    except ReplyTimeout as e:
+        logging.getLogger(__name__).warning("[IPC] Worker sans réponse (%s:%d) : %s", host, port, e)
+        return {"ok": False, "pending": True, "error": f"{e} (le worker traite peut-être encore la demande)"}
+    except (OSError, asyncio.TimeoutError) as e:
+        logging.getLogger(__name__).warning("[IPC] Worker injoignable (%s:%d) : %s", host, port, e)
+        return None
@@ -0,0 +1,265 @@
+# bot/journal.py
+
+"""
+Description:
+    Journal SQLite local des messages ingérés (mode deux processus).
+    - Le processus d'ingestion (bot.core, BOT_MODE=ingest) y écrit chaque
+      lot (sink de l'IngestionPipeline), les éditions et les suppressions.
+    - Le processus de rapports (python -m bot.worker) relit le buffer d'une
+      guild depuis ce journal pour rendre, archiver et envoyer le résumé.
+    Mode WAL : un écrivain et plusieurs lecteurs (autres processus) sans blocage.
+    - start_writer() (processus d'ingestion) : les écritures passent par un
+      thread dédié, jamais par la boucle asyncio du gateway. Sa connexion a un
+      délai d'attente court (WRITER_BUSY_TIMEOUT_S) ; "database is locked"
+      (le worker écrit au même moment : mark_report, prune) → nouvel essai
+      avec attente croissante, les écritures suivantes restant en file.
+Uses: json, logging, queue, sqlite3, threading
+Args: (selon la méthode)  ||  Returns: messages_by_channel {"important": {...}, "general": {...}}
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+log = logging.getLogger(__name__)
+
+JOURNAL_PATH = os.path.join("data", "journal.sqlite3")
+WRITER_BUSY_TIMEOUT_S = 0.25
+WRITER_RETRY_MAX_S = 5.0
+WRITER_CLOSE_TIMEOUT_S = 10.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    message_id  INTEGER PRIMARY KEY,
+    guild_id    INTEGER NOT NULL,
+    category    TEXT NOT NULL,
+    channel     TEXT NOT NULL,
+    thread      TEXT,
+    author      TEXT,
+    content     TEXT,
+    created_at  TEXT NOT NULL,
+    fingerprint TEXT,
+    keywords    TEXT,
+    edited      INTEGER NOT NULL DEFAULT 0,
+    deleted     INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_messages_guild_ts ON messages (guild_id, created_at);
+CREATE TABLE IF NOT EXISTS guilds (
+    guild_id    INTEGER PRIMARY KEY,
+    name        TEXT,
+    config      TEXT
+);
+CREATE TABLE IF NOT EXISTS reports (
+    guild_id    INTEGER PRIMARY KEY,
+    last_sent_at TEXT
+);
+"""
+
+
+def _iso(ts: datetime) -> str:
+    """Horodatage UTC ISO : l'ordre lexicographique = l'ordre chronologique."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc).isoformat()
+
+
+class MessageJournal:
+    def __init__(self, path: str = JOURNAL_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self.writes = 0
+        self.write_retries = 0
+        self.write_errors = 0
+        self._queue: queue.Queue | None = None
+        self._thread: threading.Thread | None = None
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(WRITER_CLOSE_TIMEOUT_S)
+            if self._thread.is_alive():
+                log.error("[JOURNAL] %d écriture(s) non appliquée(s) à la fermeture", self._queue.qsize())
+            self._thread = self._queue = None
+        self._db.close()
+
+    # ---------- thread d'écriture ----------
+
+    def start_writer(self) -> None:
+        """Écritures faites hors de la boucle par un thread dédié (sans effet pour ":memory:")."""
+        if self._thread is not None or self.path == ":memory:":
+            return
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run_writer, name="journal-writer", daemon=True)
+        self._thread.start()
+
+    def flush(self) -> None:
+        """Attend que les écritures en file soient appliquées (bloquant : asyncio.to_thread)."""
+        if self._queue is not None:
+            self._queue.join()
+
+    def pending_writes(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _write(self, fn, *args) -> None:
+        if self._queue is None:
+            fn(self._db, *args)
+        else:
+            self._queue.put((fn, args))
+
+    def _run_writer(self) -> None:
+        db = sqlite3.connect(self.path, timeout=WRITER_BUSY_TIMEOUT_S)
+        db.execute("PRAGMA synchronous=NORMAL")
+        try:
+            while True:
+                item = self._queue.get()
+                try:
+                    if item is None:
+                        return
+                    self._apply_with_retry(db, *item)
+                finally:
+                    self._queue.task_done()
+        finally:
+            db.close()
+
+    def _apply_with_retry(self, db, fn, args) -> None:
+        delay = WRITER_BUSY_TIMEOUT_S
+        while True:
+            try:
+                fn(db, *args)
+                return
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) and "busy" not in str(e):
+                    self.write_errors += 1
+                    log.exception("[JOURNAL] Écriture impossible")
+                    return
+                self.write_retries += 1
+                log.warning("[JOURNAL] Base verrouillée, nouvel essai dans %.2f s (%d en file)",
+                            delay, self._queue.qsize())
+                time.sleep(delay)
+                delay = min(delay * 2, WRITER_RETRY_MAX_S)
+            except Exception:
+                self.write_errors += 1
+                log.exception("[JOURNAL] Écriture impossible")
+                return
+
+    # ---------- écriture (processus d'ingestion) ----------
+
+    def append(self, guild_id: int, entries) -> int:
+        """entries : [(catégorie, canal, entrée du buffer)] ; doublons (même message_id) ignorés."""
+        rows = [
+            (
+                m.get("id"), guild_id, cat, ch, m.get("thread"), m.get("author"), m.get("content"),
+                _iso(m["timestamp"]),
+                None if m.get("fingerprint") is None else format(m["fingerprint"], "x"),
+                json.dumps(m.get("keywords") or [], ensure_ascii=False),
+                int(bool(m.get("edited"))), int(bool(m.get("deleted"))),
+            )
+            for cat, ch, m in entries
+        ]
+        self._write(self._insert, rows)
+        return len(rows)
+
+    def _insert(self, db, rows) -> None:
+        with db:
+            db.executemany(
+                "INSERT OR IGNORE INTO messages (message_id, guild_id, category, channel, thread, author,"
+                " content, created_at, fingerprint, keywords, edited, deleted)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        self.writes += len(rows)
+
+    @staticmethod
+    def _execute(db, sql: str, params) -> None:
+        with db:
+            db.execute(sql, params)
+
+    def sink(self, guild_id: int):
+        """Callable à ajouter à IngestionPipeline.sinks pour la guild."""
+        return lambda added: self.append(guild_id, added) if added else 0
+
+    def apply_edit(self, message_id: int, entry: dict) -> None:
+        fp = entry.get("fingerprint")
+        self._write(
+            self._execute,
+            "UPDATE messages SET content = ?, fingerprint = ?, keywords = ?, edited = 1 WHERE message_id = ?",
+            (entry.get("content"), None if fp is None else format(fp, "x"),
+             json.dumps(entry.get("keywords") or [], ensure_ascii=False), message_id),
+        )
+
+    def apply_delete(self, message_id: int) -> None:
+        self._write(self._execute, "UPDATE messages SET deleted = 1 WHERE message_id = ?", (message_id,))
+
+    def rename_channel(self, guild_id: int, old: str, new: str) -> None:
+        self._write(
+            self._execute,
+            "UPDATE messages SET channel = ? WHERE guild_id = ? AND channel = ?", (new, guild_id, old),
+        )
+
+    def set_guild(self, guild_id: int, name: str, config: dict) -> None:
+        """Réglages de la guild (GuildConfig) pour le worker, qui n'a pas accès à Discord."""
+        self._write(
+            self._execute,
+            "INSERT OR REPLACE INTO guilds (guild_id, name, config) VALUES (?, ?, ?)",
+            (guild_id, name, json.dumps(config)),
+        )
+
+    # ---------- lecture (worker) ----------
+
+    def guilds(self) -> list[tuple[int, str, dict]]:
+        rows = self._db.execute("SELECT guild_id, name, config FROM guilds ORDER BY guild_id").fetchall()
+        return [(gid, name, json.loads(config or "{}")) for gid, name, config in rows]
+
+    def load_buffer(self, guild_id: int, since: datetime | None = None) -> dict:
+        """Reconstruit messages_by_channel d'une guild (messages supprimés exclus)."""
+        query = ("SELECT category, channel, thread, author, content, created_at, fingerprint, keywords,"
+                 " edited, message_id FROM messages WHERE guild_id = ? AND deleted = 0")
+        params: list = [guild_id]
+        if since is not None:
+            query += " AND created_at >= ?"
+            params.append(_iso(since))
+        query += " ORDER BY created_at, message_id"
+        buffer: dict = {"important": {}, "general": {}}
+        for cat, ch, thread, author, content, created_at, fp, kws, edited, mid in self._db.execute(query, params):
+            entry = {
+                "id": mid,
+                "author": author,
+                "content": content,
+                "timestamp": datetime.fromisoformat(created_at),
+                "fingerprint": None if fp is None else int(fp, 16),
+                "keywords": json.loads(kws or "[]"),
+            }
+            if thread:
+                entry["thread"] = thread
+            if edited:
+                entry["edited"] = True
+            buffer.setdefault(cat, {}).setdefault(ch, []).append(entry)
+        return buffer
+
+    def last_report(self, guild_id: int) -> datetime | None:
+        row = self._db.execute("SELECT last_sent_at FROM reports WHERE guild_id = ?", (guild_id,)).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def mark_report(self, guild_id: int, at: datetime) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO reports (guild_id, last_sent_at) VALUES (?, ?)", (guild_id, _iso(at))
+            )
+
+    def prune(self, before: datetime) -> int:
+        """Oublie les messages plus anciens que `before` (rétention du journal)."""
+        with self._db:
+            cur = self._db.execute("DELETE FROM messages WHERE created_at < ?", (_iso(before),))
+        return cur.rowcount
@@ -0,0 +1,115 @@
+# bot/keywords.py
+
+"""
+Description:
+    Mots-clés d'escalade ("urgent", "réunion", "deadline", prénoms…).
+    Tous les mots-clés sont compilés dans UN automate Aho-Corasick : chaque
+    message est parcouru une seule fois, en temps linéaire dans sa longueur,
+    quel que soit le nombre de mots-clés. Insensible à la casse et aux accents,
+    avec contrôle des frontières de mots ("Anne" ne matche pas "année").
+Uses: collections.deque, time, unicodedata
+Args: (selon la méthode)  ||  Returns: (ensemble des mots-clés trouvés)
+"""
+
+from __future__ import annotations
+
+import time
+import unicodedata
+from collections import deque
+
+
+def normalize(text: str) -> str:
+    """Minuscule + suppression des accents (réunion → reunion)."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+class KeywordMatcher:
+    """Automate Aho-Corasick compilé à partir d'une liste de mots-clés."""
+
+    def __init__(self, keywords=()):
+        self.keywords = sorted({k.strip() for k in keywords if k and k.strip()})
+        # goto[state] = {char: state} ; fail[state] ; out[state] = [(mot-clé, longueur)]
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[str, int]]] = [[]]
+        for kw in self.keywords:
+            self._insert(kw)
+        self._build_failure_links()
+        # Instrumentation (coût par message)
+        self.scanned = 0
+        self.matched = 0
+        self.total_ns = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.keywords)
+
+    def _insert(self, keyword: str) -> None:
+        norm = normalize(keyword)
+        state = 0
+        for ch in norm:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((keyword, len(norm)))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text: str | None) -> set[str]:
+        """Renvoie l'ensemble des mots-clés présents (mots entiers) dans text."""
+        if not self.keywords or not text:
+            return set()
+        t0 = time.perf_counter_ns()
+        norm = normalize(text)
+        found: set[str] = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        n = len(norm)
+        for i, ch in enumerate(norm):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for keyword, length in out[state]:
+                start = i - length + 1
+                if (start == 0 or not norm[start - 1].isalnum()) and (i + 1 == n or not norm[i + 1].isalnum()):
+                    found.add(keyword)
+        self.scanned += 1
+        self.matched += bool(found)
+        self.total_ns += time.perf_counter_ns() - t0
+        return found
+
+    def stats(self) -> dict:
+        return {
+            "keywords": len(self.keywords),
+            "states": len(self._goto),
+            "scanned": self.scanned,
+            "matched": self.matched,
+            "avg_us_per_message": (self.total_ns / self.scanned / 1000) if self.scanned else 0.0,
+        }
+
+
+def rescan_buffer(messages_dict: dict, matcher: KeywordMatcher) -> int:
+    """Recalcule m["keywords"] pour tout le buffer (après modification de la liste)."""
+    n = 0
+    for channels in messages_dict.values():
+        for msgs in channels.values():
+            for m in msgs:
+                m["keywords"] = sorted(matcher.scan(m.get("content", "")))
+                n += 1
+    return n
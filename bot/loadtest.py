@@ -0,0 +1,333 @@
+# bot/loadtest.py
+
+"""
+Description:
+    Test de charge du chemin d'ingestion, sans réseau :
+        python -m bot.loadtest --messages 20000 --rate 2000 --pattern burst
+    - un vrai commands.Bot (jamais connecté) avec les cogs de
+      bot.discord_bot_commands et une guild factice (GuildContext + IngestionPipeline)
+    - de faux discord.Message sont livrés à core.on_message au rythme voulu :
+      "steady" (régulier), "burst" (rafales de --burst-size messages) ou
+      "poisson" (arrivées aléatoires, graine fixe) ; une part --command-ratio
+      sont des commandes (!ping, !test_recent_10…) qui passent par bot.process_commands
+    - comme le gateway, chaque événement est une tâche asyncio : la latence par
+      événement va de l'arrivée prévue à la fin de on_message (attente de la boucle comprise)
+    - rapport : percentiles de latence, retard de la boucle (sonde à 10 ms),
+      débit jusqu'au buffer, statistiques de la file, croissance mémoire du buffer
+    - porte de régression : --max-p99-ms, --max-loop-lag-ms, --min-throughput,
+      --max-dropped → code de sortie 1 si un seuil est dépassé
+Uses: asyncio, random, discord.ext.commands, bot.core, bot.guilds, bot.ingestion
+Args: (ligne de commande)  ||  Returns: code de sortie (0 = OK, 1 = seuil dépassé)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import discord
+from discord.ext import commands
+
+from bot import core
+from bot.bench import AUTHORS, CHANNEL_NAMES, make_sentence
+from bot.guilds import GuildRegistry
+from bot.ingestion import IngestionPipeline
+from bot.memory import approx_size
+
+PATTERNS = ("steady", "burst", "poisson")
+DEFAULT_COMMANDS = ("!ping", "!test_recent_10", "!list_messages")
+LOOP_PROBE_INTERVAL = 0.010
+GUILD_ID = 900_000_000_000_000_001
+BOT_USER_ID = 900_000_000_000_000_002
+
+
+# ---------- Faux objets Discord ----------
+
+class _LoadContext(commands.Context):
+    """Contexte de commande dont send() ne fait qu'être compté (pas d'appel HTTP)."""
+
+    async def send(self, content=None, **kwargs):
+        self.bot.replies += 1
+        return None
+
+
+class LoadTestBot(commands.Bot):
+    """commands.Bot jamais connecté : process_commands fonctionne, les réponses sont comptées."""
+
+    def __init__(self):
+        super().__init__(command_prefix="!", intents=core.intents, help_command=None)
+        self._connection.user = SimpleNamespace(id=BOT_USER_ID, name="bot", bot=True)
+        self.replies = 0
+        self.command_errors = 0
+        self.add_listener(self._count_error, "on_command_error")
+
+    async def get_context(self, origin, *, cls=_LoadContext):
+        return await super().get_context(origin, cls=cls)
+
+    async def _count_error(self, ctx, error):
+        self.command_errors += 1
+
+
+def make_guild(n_channels: int) -> SimpleNamespace:
+    guild = SimpleNamespace(id=GUILD_ID, name="guild-de-charge", forums=[])
+    guild.text_channels = [
+        SimpleNamespace(id=GUILD_ID + 10 + i, name=f"{CHANNEL_NAMES[i % len(CHANNEL_NAMES)]}-{i}", guild=guild)
+        for i in range(n_channels)
+    ]
+    guild.get_channel = {c.id: c for c in guild.text_channels}.get
+    return guild
+
+
+def make_message(bot, message_id: int, channel, author, content: str) -> SimpleNamespace:
+    """Le strict nécessaire de discord.Message pour on_message et process_commands."""
+    return SimpleNamespace(
+        id=message_id,
+        content=content,
+        author=author,
+        channel=channel,
+        guild=channel.guild,
+        created_at=datetime.now(timezone.utc),
+        attachments=[],
+        mentions=[],
+        type=discord.MessageType.default,
+        _state=bot._connection,
+    )
+
+
+def arrival_times(n: int, rate: float, pattern: str = "steady", *, burst_size: int = 50, seed: int = 0) -> list[float]:
+    """Instants d'arrivée (s depuis le début) de n messages, `rate` messages/s en moyenne."""
+    if pattern not in PATTERNS:
+        raise ValueError(f"Motif inconnu : {pattern} (attendu : {', '.join(PATTERNS)})")
+    if pattern == "steady":
+        return [i / rate for i in range(n)]
+    if pattern == "burst":
+        return [(i // burst_size) * burst_size / rate for i in range(n)]
+    rnd = random.Random(seed)
+    t, out = 0.0, []
+    for _ in range(n):
+        out.append(t)
+        t += rnd.expovariate(rate)
+    return out
+
+
+# ---------- Mesures ----------
+
+def percentile(values: list[float], q: float) -> float:
+    """Rang le plus proche (q entre 0 et 1) ; 0.0 pour une liste vide."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _probe_loop_lag(samples: list[float], interval: float = LOOP_PROBE_INTERVAL) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        t0 = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - t0 - interval))
+
+
+async def run_load(
+    *,
+    n_messages: int = 5000,
+    rate: float = 1000.0,
+    pattern: str = "steady",
+    burst_size: int = 50,
+    n_channels: int = 12,
+    command_ratio: float = 0.01,
+    command_mix=DEFAULT_COMMANDS,
+    maxsize: int = 10_000,
+    policy: str = "drop_oldest",
+    seed: int = 0,
+    with_cogs: bool = True,
+    drain_timeout: float = 30.0,
+) -> dict:
+    """Lance une charge complète et renvoie le rapport (dict)."""
+    previous_bot = core.bot
+    bot = LoadTestBot()
+    bot.loop = asyncio.get_running_loop()
+    core.init_bot_state(bot)
+    guild = make_guild(n_channels)
+    rnd = random.Random(seed)
+
+    with tempfile.TemporaryDirectory(prefix="loadtest_") as data_dir:
+        bot.guild_contexts = GuildRegistry(bot, {guild.id: {"data_dir": data_dir}})
+        state, _ = bot.guild_contexts.ensure(guild)
+        state.important_channels = [c.name for c in guild.text_channels[: max(1, n_channels // 4)]]
+        state.channel_classifier.rebuild([guild], state.important_channels, [])
+        state.ingestion = IngestionPipeline(
+            state, maxsize=maxsize, policy=policy, spill_path=f"{data_dir}/ingestion_spill.jsonl",
+        )
+        core.bot = bot
+        try:
+            if with_cogs:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    await bot.load_extension("bot.discord_bot_commands")
+            state.ingestion.start()
+
+            authors = [SimpleNamespace(id=i + 1, name=name, bot=False) for i, name in enumerate(AUTHORS)]
+            messages = []
+            for i in range(n_messages):
+                if command_mix and rnd.random() < command_ratio:
+                    content = rnd.choice(command_mix)
+                else:
+                    content = make_sentence(rnd)
+                messages.append(make_message(
+                    bot, GUILD_ID + 1_000 + i, rnd.choice(guild.text_channels), rnd.choice(authors), content,
+                ))
+            n_commands = sum(1 for m in messages if m.content.startswith("!"))
+            schedule = arrival_times(n_messages, rate, pattern, burst_size=burst_size, seed=seed)
+
+            buffer_before = approx_size(state.messages_by_channel)
+            lag_samples: list[float] = []
+            latencies: list[float] = []
+            probe = asyncio.create_task(_probe_loop_lag(lag_samples))
+            loop = asyncio.get_running_loop()
+
+            async def _deliver(message, due: float):
+                # comme discord.py : un événement = une tâche
+                await core.on_message(message)
+                latencies.append(loop.time() - due)
+
+            start = loop.time()
+            tasks = []
+            for message, t in zip(messages, schedule):
+                due = start + t
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(_deliver(message, due)))
+            await asyncio.gather(*tasks)
+            produced_at = loop.time()
+            try:
+                await asyncio.wait_for(state.ingestion.queue.join(), drain_timeout)
+            except asyncio.TimeoutError:
+                pass
+            drained_at = loop.time()
+            probe.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await probe
+
+            buffer_after = approx_size(state.messages_by_channel)
+            stats = state.ingestion.stats()
+            buffered = sum(len(v) for cat in state.messages_by_channel.values() for v in cat.values())
+            return {
+                "messages": n_messages,
+                "commands": n_commands,
+                "pattern": pattern,
+                "target_rate": rate,
+                "send_duration_s": produced_at - start,
+                "drain_duration_s": drained_at - start,
+                "throughput_msg_s": stats["processed"] / (drained_at - start) if drained_at > start else 0.0,
+                "latency_ms": {
+                    "p50": percentile(latencies, 0.50) * 1000,
+                    "p95": percentile(latencies, 0.95) * 1000,
+                    "p99": percentile(latencies, 0.99) * 1000,
+                    "max": max(latencies, default=0.0) * 1000,
+                },
+                "loop_lag_ms": {
+                    "p50": percentile(lag_samples, 0.50) * 1000,
+                    "p99": percentile(lag_samples, 0.99) * 1000,
+                    "max": max(lag_samples, default=0.0) * 1000,
+                },
+                "ingestion": stats,
+                "buffered": buffered,
+                "buffer_bytes": {
+                    "before": buffer_before,
+                    "after": buffer_after,
+                    "per_message": (buffer_after - buffer_before) / buffered if buffered else 0.0,
+                },
+                "replies": bot.replies,
+                "command_errors": bot.command_errors,
+            }
+        finally:
+            core.bot = previous_bot
+            await state.ingestion.stop()
+            for task in asyncio.all_tasks():
+                # tâches d'événements discord.py encore en vol (on_command, on_command_completion)
+                if task.get_name().startswith("discord.py:"):
+                    task.cancel()
+
+
+def check_gates(report: dict, *, max_p99_ms=None, max_loop_lag_ms=None, min_throughput=None, max_dropped=None) -> list[str]:
+    """Seuils dépassés (liste vide = OK)."""
+    problems = []
+    if max_p99_ms is not None and report["latency_ms"]["p99"] > max_p99_ms:
+        problems.append(f"latence p99 {report['latency_ms']['p99']:.2f} ms > {max_p99_ms} ms")
+    if max_loop_lag_ms is not None and report["loop_lag_ms"]["max"] > max_loop_lag_ms:
+        problems.append(f"retard de boucle max {report['loop_lag_ms']['max']:.2f} ms > {max_loop_lag_ms} ms")
+    if min_throughput is not None and report["throughput_msg_s"] < min_throughput:
+        problems.append(f"débit {report['throughput_msg_s']:.0f} msg/s < {min_throughput} msg/s")
+    if max_dropped is not None and report["ingestion"]["dropped"] > max_dropped:
+        problems.append(f"{report['ingestion']['dropped']} message(s) perdu(s) > {max_dropped}")
+    return problems
+
+
+def print_report(report: dict) -> None:
+    lat, lag, ing, mem = report["latency_ms"], report["loop_lag_ms"], report["ingestion"], report["buffer_bytes"]
+    print(f"[LOAD] {report['messages']} messages ({report['commands']} commandes), motif {report['pattern']}, "
+          f"cible {report['target_rate']:.0f} msg/s")
+    print(f"[LOAD] envoi {report['send_duration_s']:.2f} s, file vidée à {report['drain_duration_s']:.2f} s "
+          f"→ {report['throughput_msg_s']:.0f} msg/s jusqu'au buffer")
+    print(f"[LOAD] latence on_message : p50 {lat['p50']:.3f} ms  p95 {lat['p95']:.3f} ms  "
+          f"p99 {lat['p99']:.3f} ms  max {lat['max']:.3f} ms")
+    print(f"[LOAD] retard de boucle : p50 {lag['p50']:.3f} ms  p99 {lag['p99']:.3f} ms  max {lag['max']:.3f} ms")
+    print(f"[LOAD] file : pic {ing['high_water']}/{ing['maxsize']}, perdus {ing['dropped']}, "
+          f"débordés {ing['spilled']}, attente moyenne {ing['avg_lag_ms']:.2f} ms (max {ing['max_lag_ms']:.2f} ms)")
+    print(f"[LOAD] buffer : {report['buffered']} messages, {mem['before'] / 1024:.0f} → {mem['after'] / 1024:.0f} KiB "
+          f"(≈ {mem['per_message']:.0f} octets/message)")
+    print(f"[LOAD] commandes : {report['replies']} réponse(s), {report['command_errors']} erreur(s)")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bot.loadtest", description="Test de charge de core.on_message.")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=1000.0, help="messages/s en moyenne")
+    parser.add_argument("--pattern", choices=PATTERNS, default="steady")
+    parser.add_argument("--burst-size", type=int, default=50)
+    parser.add_argument("--channels", type=int, default=12)
+    parser.add_argument("--command-ratio", type=float, default=0.01)
+    parser.add_argument("--queue-maxsize", type=int, default=10_000)
+    parser.add_argument("--policy", choices=("drop_new", "drop_oldest", "spill"), default="drop_oldest")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cogs", action="store_true", help="ne charge pas bot.discord_bot_commands")
+    parser.add_argument("--json", action="store_true", help="rapport JSON sur stdout")
+    parser.add_argument("--max-p99-ms", type=float)
+    parser.add_argument("--max-loop-lag-ms", type=float)
+    parser.add_argument("--min-throughput", type=float)
+    parser.add_argument("--max-dropped", type=int)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    report = asyncio.run(run_load(
+        n_messages=args.messages, rate=args.rate, pattern=args.pattern, burst_size=args.burst_size,
+        n_channels=args.channels, command_ratio=args.command_ratio, maxsize=args.queue_maxsize,
+        policy=args.policy, seed=args.seed, with_cogs=not args.no_cogs,
+    ))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+        print(f"[LOAD] durée totale {time.perf_counter() - t0:.2f} s")
+
+    problems = check_gates(
+        report, max_p99_ms=args.max_p99_ms, max_loop_lag_ms=args.max_loop_lag_ms,
+        min_throughput=args.min_throughput, max_dropped=args.max_dropped,
+    )
+    for p in problems:
+        print(f"[REGRESSION] {p}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+# bot/logging_setup.py
+
+"""
+Description:
+    Journalisation non bloquante du bot et du worker.
+    - setup_logging() : les loggers n'écrivent que dans une file en mémoire
+      (QueueHandler, jamais bloquante) ; un QueueListener (thread) fait les
+      écritures sur stdout. Une console lente ou saturée ne retarde plus la boucle.
+    - LOG_FORMAT=json (défaut) : une ligne JSON par événement (ts, level,
+      logger, msg, champs extra=…, exc) ; LOG_FORMAT=text : format lisible
+    - échantillonnage par logger (LOG_SAMPLING="bot.ingestion=0.1,discord.gateway=0.01") :
+      seule cette fraction des événements DEBUG / INFO est gardée
+    - limiteur de répétitions (LOG_RATE_LIMIT_S, défaut 60) : un même
+      avertissement (même logger, même message, ex. Forbidden sur un canal)
+      au plus une fois par fenêtre ; le nombre de répétitions ignorées est
+      ajouté à la ligne suivante
+    Filtrage avant la mise en file : un événement écarté ne coûte presque rien.
+Uses: json, logging.handlers, queue, threading, bot.env_config
+Args: (niveau, format, échantillonnage, fenêtre)  ||  Returns: QueueListener
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from bot.env_config import get_log_config
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+TEXT_DATEFMT = "%Y-%m-%d %H:%M:%S"
+
+# loggers bavards, remis à un niveau raisonnable
+QUIET_LOGGERS = {
+    "discord.gateway": logging.WARNING,
+    "discord.client": logging.INFO,
+    "aiohttp.access": logging.WARNING,
+}
+
+# attributs standard d'un LogRecord : le reste vient de extra={…}
+_STANDARD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Comme QueueHandler, mais la trace d'exception reste à part (champ "exc" en JSON)."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Garde une fraction des événements < WARNING des loggers configurés (préfixe le plus long)."""
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = dict(rates)
+        self._seen: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _rate(self, name: str) -> float | None:
+        best = None
+        for prefix, rate in self.rates.items():
+            if (name == prefix or name.startswith(prefix + ".")) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        return self.rates[best] if best is not None else None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate is None or rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        # déterministe : le premier événement puis 1 sur round(1/rate), par logger
+        with self._lock:
+            n = self._seen.get(record.name, 0)
+            self._seen[record.name] = n + 1
+        return n % max(1, round(1 / rate)) == 0
+
+
+class RateLimitFilter(logging.Filter):
+    """Un même avertissement (logger, niveau, message) au plus une fois par fenêtre."""
+
+    MAX_KEYS = 10_000
+
+    def __init__(self, interval: float = 60.0, clock=time.monotonic):
+        super().__init__()
+        self.interval = interval
+        self.clock = clock
+        # {clé: [début de la fenêtre, répétitions ignorées]}
+        self._seen: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.interval <= 0:
+            return True
+        message = record.getMessage()
+        key = (record.name, record.levelno, message)
+        now = self.clock()
+        with self._lock:
+            state = self._seen.get(key)
+            if state is not None and now - state[0] < self.interval:
+                state[1] += 1
+                return False
+            suppressed = state[1] if state is not None else 0
+            if len(self._seen) >= self.MAX_KEYS:
+                self._prune(now)
+            self._seen[key] = [now, 0]
+        if suppressed:
+            record.msg = f"{message} ({suppressed} répétition(s) ignorée(s))"
+            record.args = ()
+            record.suppressed = suppressed
+        return True
+
+    def _prune(self, now: float) -> None:
+        for key in [k for k, (start, _n) in self._seen.items() if now - start >= self.interval]:
+            del self._seen[key]
+
+
+def parse_sampling(spec: str) -> dict[str, float]:
+    """"bot.ingestion=0.1,discord.gateway=0.01" → {logger: fraction gardée}."""
+    rates = {}
+    for part in spec.split(","):
+        name, sep, value = part.partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(value)))
+        except ValueError:
+            continue
+    return rates
+
+
+def setup_logging(
+    level: str | None = None,
+    fmt: str | None = None,
+    sampling: dict[str, float] | None = None,
+    rate_limit: float | None = None,
+    stream=None,
+) -> logging.handlers.QueueListener:
+    """
+    Remplace les handlers du logger racine par un QueueHandler (filtres
+    d'échantillonnage et de répétitions) relié à un QueueListener qui écrit
+    sur `stream` (stdout). Réglages absents → variables LOG_* (get_log_config).
+    """
+    global _listener
+    config = get_log_config()
+    level = level or config["level"]
+    fmt = fmt or config["format"]
+    sampling = parse_sampling(config["sampling"]) if sampling is None else sampling
+    rate_limit = config["rate_limit"] if rate_limit is None else rate_limit
+
+    stop_logging()
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT, TEXT_DATEFMT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()   # non bornée : put() ne bloque jamais
+    handler = _QueueHandler(log_queue)
+    if sampling:
+        handler.addFilter(SamplingFilter(sampling))
+    handler.addFilter(RateLimitFilter(rate_limit))
+
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    for name, quiet_level in QUIET_LOGGERS.items():
+        logging.getLogger(name).setLevel(quiet_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Vide la file et arrête le thread d'écriture (à l'arrêt du processus)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
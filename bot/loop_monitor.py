@@ -0,0 +1,160 @@
+# bot/loop_monitor.py
+
+"""
+Description:
+    Surveillance du retard de la boucle asyncio (appels bloquants).
+    - une tâche « battement » dort `interval` en boucle ; l'écart entre le
+      réveil prévu et le réveil réel est le retard de la boucle (métrique
+      bot_event_loop_lag_seconds)
+    - un thread de garde vérifie les battements : si la boucle ne bat plus
+      depuis plus de `threshold`, il capture la pile du thread de la boucle
+      (sys._current_frames) pendant qu'elle est encore bloquée, donc
+      l'appel fautif (json.dump, setlocale, formatage…)
+    - au réveil, le blocage est journalisé avec sa durée et son site d'appel
+      (première frame du projet en partant du haut de pile), et compté par
+      site pour !stats et /healthz
+    Seuil : LOOP_LAG_THRESHOLD_MS (défaut 250 ms, 0 = désactivé).
+Uses: asyncio, logging, sys, threading, traceback, bot.metrics
+Args: (seuil, période)  ||  Returns: LoopLagMonitor
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from bot.metrics import LOOP_BLOCKS, LOOP_LAG
+
+log = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_INTERVAL = 0.1
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+_UNKNOWN_SITE = "(non capturé : blocage plus court que la garde)"
+
+
+def blocking_site(stack: traceback.StackSummary) -> str:
+    """Site d'appel à accuser : frame du projet la plus profonde (hors ce module), sinon la plus profonde."""
+    for frame in reversed(stack):
+        path = os.path.abspath(frame.filename)
+        if path.startswith(_PROJECT_DIR) and path != os.path.abspath(__file__):
+            return f"{os.path.relpath(path, os.path.dirname(_PROJECT_DIR))}:{frame.lineno} {frame.name}"
+    if stack:
+        frame = stack[-1]
+        return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+    return _UNKNOWN_SITE
+
+
+class LoopLagMonitor:
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, interval: float = DEFAULT_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self.blocks = 0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        # {site: [nombre, durée totale, durée max]}
+        self.sites: dict[str, list] = {}
+        self._beat_state = (0, time.perf_counter())   # (numéro du battement, instant)
+        self._captured: tuple[int, traceback.StackSummary] | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    # ---------- démarrage / arrêt ----------
+
+    def start(self) -> "LoopLagMonitor":
+        """À appeler depuis la boucle surveillée."""
+        self._loop_thread_id = threading.get_ident()
+        self._task = asyncio.get_running_loop().create_task(self._beat())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._thread.start()
+        return self
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    # ---------- battement (sur la boucle) ----------
+
+    async def _beat(self) -> None:
+        beat = 0
+        while True:
+            beat += 1
+            started = time.perf_counter()
+            self._beat_state = (beat, started)
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            LOOP_LAG.observe(lag)
+            if lag >= self.threshold:
+                captured, self._captured = self._captured, None
+                stack = captured[1] if captured and captured[0] == beat else None
+                self.record_block(lag, stack)
+
+    def record_block(self, lag: float, stack: traceback.StackSummary | None) -> str:
+        site = blocking_site(stack) if stack else _UNKNOWN_SITE
+        self.blocks += 1
+        entry = self.sites.setdefault(site, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += lag
+        entry[2] = max(entry[2], lag)
+        LOOP_BLOCKS.inc(site=site)
+        detail = "".join(traceback.format_list(stack[-8:])) if stack else ""
+        log.warning("[LOOP] Boucle bloquée %.0f ms — %s\n%s", lag * 1000, site, detail.rstrip())
+        return site
+
+    # ---------- garde (thread) ----------
+
+    def _watch(self) -> None:
+        last_captured = 0
+        while not self._stop.wait(self.threshold / 2):
+            beat, started = self._beat_state
+            if beat == last_captured:
+                continue
+            if time.perf_counter() - started > self.interval + self.threshold:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._captured = (beat, traceback.extract_stack(frame))
+                last_captured = beat
+
+    # ---------- lecture ----------
+
+    def top_sites(self, n: int = 5) -> list[tuple[str, int, float, float]]:
+        """[(site, nombre, total s, max s)] triés par temps bloqué total."""
+        ranked = sorted(self.sites.items(), key=lambda kv: kv[1][1], reverse=True)
+        return [(site, c, total, vmax) for site, (c, total, vmax) in ranked[:n]]
+
+    def snapshot(self) -> dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "last_lag_ms": round(self.last_lag * 1000, 2),
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "blocks": self.blocks,
+            "top_sites": [
+                {"site": site, "count": c, "total_ms": round(total * 1000), "max_ms": round(vmax * 1000)}
+                for site, c, total, vmax in self.top_sites()
+            ],
+        }
+
+    def summary(self) -> list[str]:
+        lines = [
+            f"boucle : retard max {self.max_lag * 1000:.0f} ms, "
+            f"{self.blocks} blocage(s) ≥ {self.threshold * 1000:.0f} ms"
+        ]
+        for site, c, total, vmax in self.top_sites():
+            lines.append(f"  {site} : {c}× (total {total * 1000:.0f} ms, max {vmax * 1000:.0f} ms)")
+        return lines
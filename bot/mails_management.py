@@ -13,10 +13,16 @@ Entrées:
         "general":   { "nom_canal": [ ... ] }
       }
 
-    - send_email(body, from_addr, password, to_addr, *, host=None, port=None, timeout=None, subject=None)
+    - send_email(body, from_addr, password, to_addr (str ou liste), *, host=None, port=None, timeout=None, subject=None)
 
 Dépendances internes:
     - bot.summarizer.naive_summarize (pour condenser les canaux généraux)
+    - bot.extractive_summarizer.summarize_channels_batch (résumé TF-IDF en lot, par jour)
+    - bot.summary_cache.SUMMARY_CACHE (mémoïsation des résumés, clé = empreinte du contenu)
+    - bot.near_duplicates (SimHash + LSH pour regrouper les annonces recopiées)
+    - bot.topics.cluster_topics (section "Sujets du jour")
+    Les trois derniers (numpy) ne sont importés qu'au premier rendu :
+    le démarrage du bot n'en paie pas le coût.
 """
 
 from __future__ import annotations
@@ -32,6 +38,17 @@ from email.mime.text import MIMEText
 import zoneinfo
 
 from bot.summarizer import naive_summarize
+from bot.summary_cache import SUMMARY_CACHE, SummaryCache, make_key
+
+# ---------- Imports tardifs (numpy) ----------
+
+def summarize_channels_batch(channels: dict[str, str], **kwargs):
+    from bot.extractive_summarizer import summarize_channels_batch as batch
+    return batch(channels, **kwargs)
+
+def cluster_topics(items, **kwargs):
+    from bot.topics import cluster_topics as cluster
+    return cluster(items, **kwargs)
 
 # ---------- Config par défaut ----------
 
@@ -42,6 +59,9 @@ DEFAULT_SMTP_HOST = "ssl0.ovh.net"
 DEFAULT_SMTP_PORT = 587
 DEFAULT_SMTP_TIMEOUT = 30.0
 
+# Moteur de résumé des canaux généraux : "extractive" (TF-IDF en lot) ou "naive"
+DEFAULT_SUMMARIZER = "extractive"
+
 # ---------- Nettoyage / filtrage ----------
 
 # Emojis Unicode communs (approximation suffisante ici)
@@ -50,6 +70,7 @@ _URL_RE = re.compile(r"https?://\S+")
 _WS_RE = re.compile(r"\s+")
 # Messages ultra-courts type "ok", "merci", "👍" qu’on souhaite ignorer
 _SHORT_OK_RE = re.compile(r"^(ok|okay|thx|merci|thanks|\+1)$", re.IGNORECASE)
+_EMPTY_PARAGRAPH = "— (aucun élément pertinent)"
 
 def _clean_text(s: str) -> str:
     """Trim + supprime les liens nus + compacte les espaces."""
@@ -96,23 +117,127 @@ def _dedupe_consecutive(msgs: list[dict]) -> list[dict]:
         last_key = key
     return out
 
-def _summarize_channel_paragraph(msgs: list[dict], max_chars: int = 500) -> str:
-    """
-    Construit un paragraphe condensé pour un canal "général".
-    On concatène "Auteur: message", puis on applique naive_summarize.
-    """
+def _channel_blob(msgs: list[dict]) -> str:
+    """Concatène "Auteur: message" (hors bruit) ; chaîne vide si rien de pertinent."""
     parts = []
     for m in msgs:
         a = m.get("author", "???")
         c = _clean_text(m.get("content", ""))
         if _is_noise(c):
             continue
-        parts.append(f"{a}: {c}")
-    if not parts:
-        return "— (aucun élément pertinent)"
-    blob = " • ".join(parts)
+        parts.append(f"{a}: {c}{_also_in_suffix(m)}")
+    return " • ".join(parts)
+
+def _collapse_near_duplicates(
+    entries: list[tuple[str, str, dict]],
+    max_distance: int | None = None,
+) -> list[tuple[str, str, dict]]:
+    """
+    Garde la première occurrence (canaux importants d'abord, puis ordre chrono)
+    de chaque groupe de quasi-doublons ; les autres canaux sont listés dans
+    m["_also_in"]. Empreinte lue dans m["fingerprint"] (calculée à l'ingestion)
+    ou calculée à la volée pour les anciens messages.
+    """
+    from bot.near_duplicates import DEFAULT_MAX_DISTANCE, NearDuplicateIndex, simhash64
+    index = NearDuplicateIndex(max_distance=DEFAULT_MAX_DISTANCE if max_distance is None else max_distance)
+    canonical: dict[int, tuple[str, dict]] = {}
+    kept: list[tuple[str, str, dict]] = []
+    ordered = sorted(entries, key=lambda e: (e[0] != "important", e[2]["_local_ts"]))
+    for cat, ch, m in ordered:
+        fp = m.get("fingerprint")
+        if fp is None:
+            fp = simhash64(m.get("content", ""))
+        if fp is None:
+            kept.append((cat, ch, m))
+            continue
+        gid = index.add(fp)
+        if gid not in canonical:
+            canonical[gid] = (ch, m)
+            kept.append((cat, ch, m))
+            continue
+        first_ch, first = canonical[gid]
+        also = first.setdefault("_also_in", [])
+        if ch != first_ch and ch not in also:
+            also.append(ch)
+    return kept
+
+def _also_in_suffix(m: dict) -> str:
+    also = m.get("_also_in")
+    if not also:
+        return ""
+    return " (aussi dans " + ", ".join(f"#{ch}" for ch in also) + ")"
+
+def _thread_prefix(m: dict) -> str:
+    thread = m.get("thread")
+    return f"🧵 {thread} — " if thread else ""
+
+def _keywords_suffix(m: dict) -> str:
+    kws = m.get("keywords")
+    if not kws:
+        return ""
+    return " 🔔 [" + ", ".join(kws) + "]"
+
+def _summarize_channel_paragraph(msgs: list[dict], max_chars: int = 500) -> str:
+    """
+    Construit un paragraphe condensé pour un canal "général".
+    On concatène "Auteur: message", puis on applique naive_summarize.
+    """
+    blob = _channel_blob(msgs)
+    if not blob:
+        return _EMPTY_PARAGRAPH
     return naive_summarize(blob, max_sentences=3, max_length=max_chars)
 
+def _summarize_general_channels(
+    channel_msgs: dict[str, list[dict]],
+    max_chars: int = 500,
+    backend: str = DEFAULT_SUMMARIZER,
+    cache: SummaryCache | None = SUMMARY_CACHE,
+    day: str | None = None,
+) -> dict[str, str]:
+    """
+    Résume tous les canaux généraux d'une journée d'un coup.
+    backend="extractive" : un seul passage TF-IDF vectorisé pour tous les canaux
+    (repli automatique sur naive_summarize si le budget de latence est dépassé).
+    cache : résumés mémorisés par empreinte des messages nettoyés + paramètres ;
+    seuls les canaux absents du cache passent par le moteur (le résumé extractif
+    d'un canal ne dépend que de ses messages). Un repli naive_summarize (budget
+    dépassé) est caché sous la clé "naive", pas sous la clé extractive.
+    day : jour local (YYYY-MM-DD) ; étiquette (canal, jour) pour l'invalidation
+    après édition/suppression d'un message.
+    """
+    out: dict[str, str] = {}
+    todo: dict[str, str] = {}
+    keys: dict[str, str] = {}
+    for ch, msgs in channel_msgs.items():
+        blob = _channel_blob(msgs)
+        if not blob:
+            out[ch] = _EMPTY_PARAGRAPH
+            continue
+        if cache is not None:
+            keys[ch] = make_key([blob], backend=backend, max_chars=max_chars, max_sentences=3)
+            cached = cache.get(keys[ch])
+            if cached is not None:
+                out[ch] = cached
+                continue
+        todo[ch] = blob
+
+    if todo:
+        fell_back = False
+        if backend == "extractive":
+            computed = summarize_channels_batch(todo, max_sentences=3, max_length=max_chars)
+            fell_back = getattr(computed, "fallback", False)
+        else:
+            computed = {ch: naive_summarize(b, max_sentences=3, max_length=max_chars) for ch, b in todo.items()}
+        for ch, text in computed.items():
+            out[ch] = text
+            if cache is not None:
+                key = keys[ch]
+                if fell_back:
+                    key = make_key([todo[ch]], backend="naive", max_chars=max_chars, max_sentences=3)
+                cache.put(key, text, tag=(ch, day))
+
+    return {ch: out[ch] for ch in channel_msgs}
+
 # ---------- Construction du corps d’e-mail ----------
 
 def format_messages_for_email(
@@ -122,13 +247,26 @@ def format_messages_for_email(
     max_items_important_per_channel: int = 8,
     summarize_general: bool = True,
     max_items_general_per_channel: int = 8,
+    summarizer_backend: str = DEFAULT_SUMMARIZER,
+    summary_cache: SummaryCache | None = SUMMARY_CACHE,
+    collapse_near_duplicates: bool = True,
+    promote_keywords: bool = True,
+    group_topics: bool = True,
 ) -> str:
     """
     Construit un texte propre:
       - Groupé par JOUR local
       - Canaux __importants__ : liste horodatée (HH:MM — Auteur : msg), limite par canal
       - __Autres canaux__ : paragraphe résumé (ou liste compacte si summarize_general=False)
-      - Filtrage: liens nus, emojis seuls, “ok/merci”, messages < 4 chars, doublons consécutifs
+        summarizer_backend : "extractive" (TF-IDF en lot par jour) ou "naive"
+        summary_cache : cache LRU des résumés (None pour désactiver)
+      - Filtrage: liens nus, emojis seuls, “ok/merci”, messages < 4 chars, doublons consécutifs,
+        messages supprimés (m["deleted"], voir bot.message_index)
+      - collapse_near_duplicates : une annonce recopiée dans plusieurs canaux (ou re-postée
+        un autre jour) n'apparaît qu'une fois, avec la liste des autres canaux
+      - promote_keywords : un message d'un canal général contenant un mot-clé d'escalade
+        (m["keywords"], rempli à l'ingestion) est listé dans les canaux importants
+      - group_topics : section __Sujets du jour__ (k-means sur vecteurs hachés), si assez de messages
     """
     # Collecte pour l'entête (période couverte / compteur brut)
     all_ts: list[datetime] = []
@@ -148,16 +286,14 @@ def format_messages_for_email(
         hi = _to_local(max(all_ts), tz_name)
         date_span = f"{lo.strftime('%d/%m/%Y %H:%M')} → {hi.strftime('%d/%m/%Y %H:%M')} ({tz.key})"
 
-    # Groupage par jour local
-    by_day: dict[str, dict[str, dict[str, list[dict]]]] = defaultdict(
-        lambda: {"important": defaultdict(list), "general": defaultdict(list)}
-    )
-
+    # Nettoyage + dédoublonnage (exact, consécutif) par canal
+    entries: list[tuple[str, str, dict]] = []
     for cat in ("important", "general"):
         for ch, lst in messages_dict.get(cat, {}).items():
-            # nettoyage + dédoublonnage
             cleaned: list[dict] = []
             for m in lst:
+                if m.get("deleted"):
+                    continue
                 c = _clean_text(m.get("content", ""))
                 if _is_noise(c):
                     continue
@@ -170,11 +306,26 @@ def format_messages_for_email(
                 ts = m.get("timestamp")
                 if not isinstance(ts, datetime):
                     continue
-                local = _to_local(ts, tz_name)
-                key = local.strftime("%Y-%m-%d")
-                m2 = dict(m)
-                m2["_local_ts"] = local
-                by_day[key][cat][ch].append(m2)
+                m["_local_ts"] = _to_local(ts, tz_name)
+                entries.append((cat, ch, m))
+
+    # Quasi-doublons inter-canaux / inter-jours → une seule entrée
+    if collapse_near_duplicates:
+        entries = _collapse_near_duplicates(entries)
+
+    # Mots-clés d'escalade (détectés à l'ingestion) → remontés dans "Canaux importants"
+    if promote_keywords:
+        entries = [
+            ("important", ch, m) if (cat == "general" and m.get("keywords")) else (cat, ch, m)
+            for cat, ch, m in entries
+        ]
+
+    # Groupage par jour local
+    by_day: dict[str, dict[str, dict[str, list[dict]]]] = defaultdict(
+        lambda: {"important": defaultdict(list), "general": defaultdict(list)}
+    )
+    for cat, ch, m in entries:
+        by_day[m["_local_ts"].strftime("%Y-%m-%d")][cat][ch].append(m)
 
     # Construction texte
     lines: list[str] = []
@@ -202,19 +353,27 @@ def format_messages_for_email(
                     c = m.get("content", "")
                     if len(c) > 240:
                         c = c[:240] + " […]"
-                    lines.append(f"- {t} — **{a}** : {c}")
+                    lines.append(f"- {t} — {_thread_prefix(m)}**{a}** : {c}{_also_in_suffix(m)}{_keywords_suffix(m)}")
                 lines.append("")
 
         # ---- Autres canaux ----
         gen = by_day[day_key]["general"]
         if gen:
             lines.append("__Autres canaux__\n")
-            for ch, msgs in gen.items():
-                msgs_sorted = sorted(msgs, key=lambda m: m["_local_ts"])[-max_items_general_per_channel:]
+            gen_sorted = {
+                ch: sorted(msgs, key=lambda m: m["_local_ts"])[-max_items_general_per_channel:]
+                for ch, msgs in gen.items()
+            }
+            paragraphs = (
+                _summarize_general_channels(
+                    gen_sorted, max_chars=450, backend=summarizer_backend, cache=summary_cache, day=day_key
+                )
+                if summarize_general else {}
+            )
+            for ch, msgs_sorted in gen_sorted.items():
                 lines.append(f"**#{ch}**")
                 if summarize_general:
-                    para = _summarize_channel_paragraph(msgs_sorted, max_chars=450)
-                    lines.append(para + "\n")
+                    lines.append(paragraphs[ch] + "\n")
                 else:
                     for m in msgs_sorted:
                         t = m["_local_ts"].strftime("%H:%M")
@@ -222,7 +381,28 @@ def format_messages_for_email(
                         c = m.get("content", "")
                         if len(c) > 200:
                             c = c[:200] + " […]"
-                        lines.append(f"- {t} — {a}: {c}")
+                        lines.append(f"- {t} — {_thread_prefix(m)}{a}: {c}{_also_in_suffix(m)}")
+                    lines.append("")
+
+        # ---- Sujets du jour (regroupement inter-canaux) ----
+        if group_topics:
+            day_items = [
+                (ch, m)
+                for cat in ("important", "general")
+                for ch, msgs in by_day[day_key][cat].items()
+                for m in msgs
+            ]
+            topics = cluster_topics(day_items)
+            if topics:
+                lines.append("__Sujets du jour__\n")
+                for topic in topics:
+                    chans = ", ".join(f"#{ch}" for ch in topic["channels"])
+                    lines.append(f"**{' · '.join(topic['terms'])}** — {topic['size']} messages ({chans})")
+                    for ch, m in topic["examples"]:
+                        c = m.get("content", "")
+                        if len(c) > 160:
+                            c = c[:160] + " […]"
+                        lines.append(f"- #{ch} — {m.get('author', '???')} : {c}")
                     lines.append("")
         lines.append("")  # espace entre jours
 
@@ -237,17 +417,21 @@ def _send_email_sync(
     body: str,
     from_addr: str,
     password: str,
-    to_addr: str,
+    to_addr: str | list[str],
     *,
     host: str,
     port: int,
     timeout: float | None,
     subject: str | None = None,
 ) -> None:
-    """Envoie un e-mail texte (UTF-8) en SMTP de manière synchrone."""
+    """
+    Envoie un e-mail texte (UTF-8) en SMTP de manière synchrone.
+    Plusieurs destinataires → liste : une adresse par destinataire SMTP,
+    jointes par ", " seulement dans l'en-tête To:.
+    """
     msg = MIMEMultipart()
     msg["From"] = from_addr
-    msg["To"] = to_addr
+    msg["To"] = to_addr if isinstance(to_addr, str) else ", ".join(to_addr)
     msg["Subject"] = subject or "Rapport quotidien – Discord Coalition FFJ"
     msg.attach(MIMEText(body, "plain", _charset="utf-8"))
 
@@ -258,13 +442,13 @@ def _send_email_sync(
     with smtplib.SMTP(host, port, **kwargs) as server:
         server.starttls()
         server.login(from_addr, password)
-        server.sendmail(from_addr, to_addr, msg.as_string())
+        server.sendmail(from_addr, to_addr if isinstance(to_addr, str) else list(to_addr), msg.as_string())
 
 async def send_email(
     body: str,
     from_addr: str,
     password: str,
-    to_addr: str,
+    to_addr: str | list[str],
     *,
     host: str | None = None,
     port: int | None = None,
@@ -0,0 +1,364 @@
+# bot/memory.py
+
+"""
+Description:
+    Comptabilité mémoire du buffer messages_by_channel, par canal et catégorie.
+    - BufferMemory (state.buffer_memory, une par guild) : octets approximatifs
+      par (catégorie, canal), tenus à jour à l'ingestion (add) et recalculés
+      exactement au backfill, au rapport et à !memory (recount)
+    - budgets (MEMORY_CHANNEL_BUDGET_KB par canal, MEMORY_BUFFER_BUDGET_MB par
+      guild ; bornés par défaut en BOT_MODE=ingest, sinon illimités) : au-delà,
+      les messages les plus anciens sortent du buffer
+        "evict" → oubliés
+        "spill" → écrits en JSON lines (<data_dir>/buffer_spill.jsonl) puis
+                  réintégrés au rapport quotidien suivant, fichier vidé ensuite
+    - tracemalloc (MEMORY_TRACEMALLOC=<profondeur>) : lignes qui allouent le
+      plus, et croissance depuis le précédent !memory
+    - memory_report(bot) : lignes de la commande !memory
+Uses: heapq, json, sys, tracemalloc, bot.guilds, bot.metrics
+Args: (selon la fonction)  ||  Returns: (selon la fonction)
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+from bot.guilds import guild_states
+from bot.metrics import BUFFER_EVICTED
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+log = logging.getLogger(__name__)
+
+POLICIES = ("evict", "spill")
+SPILL_FILENAME = "buffer_spill.jsonl"
+# BOT_MODE=ingest : pas de rapport (donc pas de purge) dans ce processus ; le
+# journal a tout, le buffer ne sert qu'au dédoublonnage et aux éditions récentes
+INGEST_CHANNEL_BUDGET_KB = 256
+INGEST_BUFFER_BUDGET_MB = 16
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# tracemalloc (importé seulement s'il est activé) : instantané du précédent
+# !memory (croissance entre deux appels)
+_last_snapshot: tracemalloc.Snapshot | None = None
+
+
+# ---------- Mesures ----------
+
+def approx_size(obj, _seen: set | None = None) -> int:
+    """Taille approximative (octets) d'un buffer : dicts, listes et scalaires, sans double comptage."""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k, seen) + approx_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approx_size(v, seen) for v in obj)
+    return size
+
+
+def entry_size(entry: dict) -> int:
+    """Octets d'une entrée du buffer (clés partagées entre entrées non comptées)."""
+    size = sys.getsizeof(entry)
+    for value in entry.values():
+        size += sys.getsizeof(value)
+        if isinstance(value, (list, tuple)):
+            size += sum(sys.getsizeof(v) for v in value)
+    return size
+
+
+def process_memory() -> dict:
+    """RSS courant (Linux, /proc) et pic de RSS (getrusage), en octets ; None si indisponible."""
+    rss = peak = None
+    try:
+        with open("/proc/self/statm", "r") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is not None:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = maxrss if os.uname().sysname == "Darwin" else maxrss * 1024  # Linux : Kio
+    return {"rss_bytes": rss, "peak_rss_bytes": peak}
+
+
+def _age(entry: dict) -> float:
+    ts = entry.get("timestamp")
+    if not isinstance(ts, datetime):
+        return 0.0
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (ts - _EPOCH).total_seconds()
+
+
+def _kib(n: float) -> str:
+    return f"{n / 1024:,.0f} Kio".replace(",", " ")
+
+
+# ---------- Comptabilité + budgets ----------
+
+class BufferMemory:
+    def __init__(
+        self,
+        channel_budget: int | None = None,
+        total_budget: int | None = None,
+        policy: str = "evict",
+        spill_path: str | None = None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Politique inconnue : {policy} (attendu : {', '.join(POLICIES)})")
+        if policy == "spill" and not spill_path:
+            raise ValueError("Politique spill sans fichier de débordement")
+        self.channel_budget = channel_budget
+        self.total_budget = total_budget
+        self.policy = policy
+        self.spill_path = spill_path
+        self.bytes: dict[tuple[str, str], int] = {}
+        self.evicted = 0
+        self.spilled = 0
+        self.spill_errors = 0       # lignes illisibles du fichier de débordement, ignorées
+
+    # --- comptage ---
+
+    def add(self, category: str, channel: str, entry: dict) -> None:
+        key = (category, channel)
+        self.bytes[key] = self.bytes.get(key, 0) + entry_size(entry)
+
+    def recount(self, buffer: dict) -> int:
+        """Recalcul exact (éditions, compactage, backfill). Renvoie le total."""
+        self.bytes = {
+            (category, channel): sum(entry_size(m) for m in msgs)
+            for category, channels in buffer.items()
+            for channel, msgs in channels.items()
+        }
+        return self.total()
+
+    def total(self) -> int:
+        return sum(self.bytes.values())
+
+    def top(self, buffer: dict, n: int = 10) -> list[tuple[str, str, int, int]]:
+        """[(catégorie, canal, octets, messages)] les plus gros d'abord."""
+        ranked = sorted(self.bytes.items(), key=lambda kv: kv[1], reverse=True)[:n]
+        return [(cat, ch, size, len(buffer.get(cat, {}).get(ch, ()))) for (cat, ch), size in ranked]
+
+    # --- budgets ---
+
+    def enforce(self, buffer: dict, index=None, channels=None) -> int:
+        """
+        Applique les budgets (canaux `channels` seulement pour le budget par
+        canal, tous sinon) ; les plus anciens sortent en premier. Renvoie le
+        nombre de messages sortis du buffer.
+        """
+        removed: list[tuple[str, str, dict]] = []
+        if self.channel_budget:
+            for key in list(channels if channels is not None else self.bytes):
+                if self.bytes.get(key, 0) > self.channel_budget:
+                    removed += self._drop_oldest(buffer, key, self.bytes[key] - self.channel_budget)
+        if self.total_budget and self.total() > self.total_budget:
+            removed += self._drop_globally_oldest(buffer, self.total() - self.total_budget)
+        if removed:
+            self._dispose(removed, index)
+        return len(removed)
+
+    def _drop_oldest(self, buffer: dict, key: tuple[str, str], excess: int) -> list:
+        category, channel = key
+        msgs = buffer.get(category, {}).get(channel, [])
+        freed = k = 0
+        while k < len(msgs) and freed < excess:
+            freed += entry_size(msgs[k])
+            k += 1
+        dropped = [(category, channel, m) for m in msgs[:k]]
+        del msgs[:k]
+        self.bytes[key] = max(0, self.bytes.get(key, 0) - freed)
+        return dropped
+
+    def _drop_globally_oldest(self, buffer: dict, excess: int) -> list:
+        # tas des têtes de liste (chaque canal est chronologique)
+        heads = [
+            (_age(msgs[0]), category, channel)
+            for category, chans in buffer.items()
+            for channel, msgs in chans.items()
+            if msgs
+        ]
+        heapq.heapify(heads)
+        cut: dict[tuple[str, str], int] = {}
+        freed = 0
+        while heads and freed < excess:
+            _, category, channel = heapq.heappop(heads)
+            msgs = buffer[category][channel]
+            k = cut.get((category, channel), 0)
+            size = entry_size(msgs[k])
+            freed += size
+            self.bytes[(category, channel)] = max(0, self.bytes.get((category, channel), 0) - size)
+            cut[(category, channel)] = k + 1
+            if k + 1 < len(msgs):
+                heapq.heappush(heads, (_age(msgs[k + 1]), category, channel))
+        dropped = []
+        for (category, channel), k in cut.items():
+            msgs = buffer[category][channel]
+            dropped += [(category, channel, m) for m in msgs[:k]]
+            del msgs[:k]
+        return dropped
+
+    def _dispose(self, removed: list[tuple[str, str, dict]], index=None) -> None:
+        if index is not None:
+            for _cat, channel, entry in removed:
+                index.forget(channel, entry)
+        if self.policy == "spill":
+            try:
+                self._spill(removed)
+                self.spilled += len(removed)
+                BUFFER_EVICTED.inc(len(removed), policy="spill")
+                log.info("[MEMORY] %d message(s) déplacé(s) sur disque (%s).", len(removed), self.spill_path)
+                return
+            except OSError as e:
+                log.warning("[MEMORY] Débordement impossible (%s) : messages oubliés.", e)
+        self.evicted += len(removed)
+        BUFFER_EVICTED.inc(len(removed), policy="evict")
+        log.info("[MEMORY] %d message(s) ancien(s) retiré(s) du buffer (budget).", len(removed))
+
+    # --- débordement sur disque ---
+
+    def _spill(self, removed: list[tuple[str, str, dict]]) -> None:
+        os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for category, channel, entry in removed:
+                if entry.get("deleted"):
+                    continue
+                record = dict(entry)
+                if isinstance(record.get("timestamp"), datetime):
+                    record["timestamp"] = record["timestamp"].isoformat()
+                f.write(json.dumps({"category": category, "channel": channel, "entry": record},
+                                   ensure_ascii=False) + "\n")
+
+    def load_spilled(self) -> dict:
+        """
+        {catégorie: {canal: [entrées]}} relu depuis le fichier de débordement.
+        Une ligne illisible (ex: tronquée par un arrêt brutal) est journalisée et
+        ignorée : elle ne doit pas faire échouer le rapport quotidien.
+        """
+        spilled: dict = {}
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return spilled
+        with open(self.spill_path, "r", encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    d = json.loads(line)
+                    entry = d["entry"]
+                    if isinstance(entry.get("timestamp"), str):
+                        entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+                    category, channel = d["category"], d["channel"]
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    self.spill_errors += 1
+                    log.warning("[MEMORY] Ligne %d de %s illisible, ignorée : %s", lineno, self.spill_path, e)
+                    continue
+                spilled.setdefault(category, {}).setdefault(channel, []).append(entry)
+        return spilled
+
+    def merged_with_spill(self, buffer: dict) -> dict:
+        """Buffer du rapport : messages débordés (plus anciens) suivis du buffer en mémoire."""
+        spilled = self.load_spilled()
+        if not spilled:
+            return buffer
+        merged = {category: dict(channels) for category, channels in buffer.items()}
+        for category, channels in spilled.items():
+            target = merged.setdefault(category, {})
+            for channel, entries in channels.items():
+                target[channel] = entries + target.get(channel, [])
+        return merged
+
+    def clear_spill(self) -> None:
+        if self.spill_path and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+    def stats(self) -> dict:
+        return {
+            "bytes": self.total(),
+            "channel_budget": self.channel_budget,
+            "total_budget": self.total_budget,
+            "policy": self.policy,
+            "evicted": self.evicted,
+            "spilled": self.spilled,
+            "spill_errors": self.spill_errors,
+        }
+
+
+# ---------- tracemalloc ----------
+
+def start_tracing(frames: int) -> None:
+    if frames <= 0:
+        return
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        log.info("[MEMORY] tracemalloc actif (%d frame(s))", frames)
+
+
+def tracemalloc_lines(n: int = 8) -> list[str]:
+    """Plus gros sites d'allocation, puis croissance depuis l'appel précédent (vide si inactif)."""
+    global _last_snapshot
+    tracemalloc = sys.modules.get("tracemalloc")   # jamais importé → jamais démarré
+    if tracemalloc is None or not tracemalloc.is_tracing():
+        return []
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"tracemalloc : {_kib(current)} suivis (pic {_kib(peak)})"]
+    for stat in snapshot.statistics("lineno")[:n]:
+        frame = stat.traceback[0]
+        lines.append(f"  {_kib(stat.size):>10}  {os.path.basename(frame.filename)}:{frame.lineno}")
+    if _last_snapshot is not None:
+        growth = [s for s in snapshot.compare_to(_last_snapshot, "lineno") if s.size_diff > 0][:n]
+        if growth:
+            lines.append("croissance depuis le dernier !memory :")
+            for stat in growth:
+                frame = stat.traceback[0]
+                lines.append(f"  +{_kib(stat.size_diff):>9}  {os.path.basename(frame.filename)}:{frame.lineno}")
+    _last_snapshot = snapshot
+    return lines
+
+
+# ---------- !memory ----------
+
+def memory_report(bot, top: int = 10) -> list[str]:
+    mem = process_memory()
+    lines = []
+    if mem["rss_bytes"] is not None:
+        peak = f" (pic {_kib(mem['peak_rss_bytes'])})" if mem["peak_rss_bytes"] else ""
+        lines.append(f"processus : RSS {_kib(mem['rss_bytes'])}{peak}")
+    for state in guild_states(bot):
+        buffer = getattr(state, "messages_by_channel", None)
+        if not buffer:
+            continue
+        accounting = getattr(state, "buffer_memory", None) or BufferMemory()
+        total = accounting.recount(buffer)
+        n_msgs = sum(len(msgs) for channels in buffer.values() for msgs in channels.values())
+        name = getattr(getattr(state, "guild", None), "name", None) or "hors-guild"
+        st = accounting.stats()
+        budgets = []
+        if st["channel_budget"]:
+            budgets.append(f"{_kib(st['channel_budget'])}/canal")
+        if st["total_budget"]:
+            budgets.append(f"{_kib(st['total_budget'])} au total")
+        budget_txt = f", budget {' + '.join(budgets)} ({st['policy']})" if budgets else ""
+        lines.append(f"{name} : buffer {_kib(total)}, {n_msgs} messages{budget_txt}")
+        if st["evicted"] or st["spilled"]:
+            lines.append(f"  sortis du buffer : {st['evicted']} oubliés, {st['spilled']} sur disque")
+        if st["spill_errors"]:
+            lines.append(f"  lignes de débordement illisibles ignorées : {st['spill_errors']}")
+        for category, channel, size, count in accounting.top(buffer, top):
+            lines.append(f"  {_kib(size):>10}  {category}/{channel} ({count} msg)")
+    return lines or ["Aucun buffer en mémoire."]
@@ -0,0 +1,106 @@
+# bot/message_index.py
+
+"""
+Description:
+    Index {message_id: entrée du buffer} pour appliquer en O(1) les
+    événements bruts de Discord :
+    - on_raw_message_edit   → contenu (et empreinte / mots-clés) mis à jour en place
+    - on_raw_message_delete / on_raw_bulk_message_delete → pierre tombale
+      (m["deleted"] = True) ; les rendus ignorent ces entrées, compact()
+      les retire physiquement du buffer.
+    Chaque modification invalide le résumé en cache du canal pour ce jour.
+Uses: bot.near_duplicates, bot.summary_cache
+Args: (selon la méthode)  ||  Returns: (canal touché ou None)
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import zoneinfo
+
+from bot.near_duplicates import simhash64
+from bot.summary_cache import SUMMARY_CACHE
+
+DEFAULT_TZ = "Europe/Brussels"
+
+
+def local_day(ts: datetime, tz_name: str = DEFAULT_TZ) -> str:
+    """Jour local (YYYY-MM-DD) d'un horodatage : c'est le découpage de l'e-mail."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(zoneinfo.ZoneInfo(tz_name)).strftime("%Y-%m-%d")
+
+
+class MessageIndex:
+    def __init__(self, cache=SUMMARY_CACHE):
+        self._by_id: dict[int, tuple[str, str, dict]] = {}
+        self.cache = cache
+        self.edits = 0
+        self.deletes = 0
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def add(self, message_id: int | None, category: str, channel: str, entry: dict) -> None:
+        if message_id is not None:
+            self._by_id[message_id] = (category, channel, entry)
+
+    def __contains__(self, message_id) -> bool:
+        return message_id in self._by_id
+
+    def get(self, message_id: int):
+        return self._by_id.get(message_id)
+
+    def _invalidate(self, channel: str, entry: dict) -> None:
+        ts = entry.get("timestamp")
+        if self.cache is not None and isinstance(ts, datetime):
+            self.cache.invalidate(channel, local_day(ts))
+
+    def apply_edit(self, message_id: int, content: str, matcher=None) -> str | None:
+        """Nouveau contenu d'un message connu. Renvoie le canal touché, ou None."""
+        hit = self._by_id.get(message_id)
+        if hit is None:
+            return None
+        _cat, channel, entry = hit
+        if entry.get("content") == content:
+            return None
+        entry["content"] = content
+        entry["fingerprint"] = simhash64(content)
+        entry["keywords"] = sorted(matcher.scan(content)) if matcher else entry.get("keywords", [])
+        entry["edited"] = True
+        self.edits += 1
+        self._invalidate(channel, entry)
+        return channel
+
+    def apply_delete(self, message_id: int) -> str | None:
+        hit = self._by_id.pop(message_id, None)
+        if hit is None:
+            return None
+        _cat, channel, entry = hit
+        entry["deleted"] = True
+        self.deletes += 1
+        self._invalidate(channel, entry)
+        return channel
+
+    def forget(self, channel: str, entry: dict) -> None:
+        """Entrée sortie du buffer (budget mémoire) : plus indexée, résumé du jour invalidé."""
+        if entry.get("id") is not None:
+            self._by_id.pop(entry["id"], None)
+        self._invalidate(channel, entry)
+
+    def rename_channel(self, old: str, new: str) -> None:
+        for mid, (cat, channel, entry) in self._by_id.items():
+            if channel == old:
+                self._by_id[mid] = (cat, new, entry)
+
+    def compact(self, messages_dict: dict) -> int:
+        """Retire les pierres tombales du buffer. Renvoie le nombre d'entrées retirées."""
+        removed = 0
+        for channels in messages_dict.values():
+            for name, msgs in channels.items():
+                kept = [m for m in msgs if not m.get("deleted")]
+                removed += len(msgs) - len(kept)
+                channels[name] = kept
+        return removed
+
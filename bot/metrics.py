@@ -0,0 +1,294 @@
+# bot/metrics.py
+
+"""
+Description:
+    Registre de métriques léger (sans dépendance) : compteurs, jauges et
+    histogrammes de latence, avec étiquettes.
+    - REGISTRY : registre du processus ; les métriques du bot sont déclarées en bas
+      de ce module (commandes, étapes du rapport quotidien, backfill, ingestion)
+    - add_collector(fn) : fonction appelée avant chaque lecture, pour les jauges
+      calculées à la demande (profondeur des files, taille des buffers)
+    - render_prometheus() : format texte d'exposition Prometheus (0.0.4)
+    - summary() : lignes lisibles pour la commande !stats
+Uses: bisect, contextlib, threading, time
+Args: (selon la méthode)  ||  Returns: (selon la méthode)
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Secondes : de la commande instantanée au rapport quotidien complet
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} : étiquettes attendues {self.labelnames}, reçues {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _labels_text(self, key: tuple, extra: str = "") -> str:
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def series(self) -> list[tuple[dict, object]]:
+        with self._lock:
+            items = list(self._values.items())
+        return [(dict(zip(self.labelnames, key)), value) for key, value in items]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def total(self) -> float:
+        return sum(self._values.values())
+
+    def _render(self) -> list[str]:
+        return [f"{self.name}{self._labels_text(k)} {_fmt(v)}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float | None:
+        return self._values.get(self._key(labels))
+
+    def _render(self) -> list[str]:
+        return [f"{self.name}{self._labels_text(k)} {_fmt(v)}" for k, v in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [comptes par seau (+Inf en dernier), somme, nombre, max]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0, 0.0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+            state[3] = max(state[3], value)
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """with HIST.time(stage="format"): … → durée observée même si le bloc lève."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def stats(self, **labels) -> dict:
+        """{count, sum, avg, max, p50, p95} (quantiles estimés par interpolation dans les seaux)."""
+        state = self._values.get(self._key(labels))
+        if not state or not state[2]:
+            return {"count": 0, "sum": 0.0, "avg": 0.0, "max": 0.0, "p50": 0.0, "p95": 0.0}
+        counts, total, n, vmax = state
+        return {
+            "count": n, "sum": total, "avg": total / n, "max": vmax,
+            "p50": self._quantile(counts, n, vmax, 0.50),
+            "p95": self._quantile(counts, n, vmax, 0.95),
+        }
+
+    def _quantile(self, counts: list[int], n: int, vmax: float, q: float) -> float:
+        rank = q * n
+        seen = 0
+        for i, c in enumerate(counts):
+            if seen + c >= rank and c:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else vmax
+                return min(vmax, lo + (hi - lo) * (rank - seen) / c)
+            seen += c
+        return vmax
+
+    def _render(self) -> list[str]:
+        lines = []
+        for key, (counts, total, n, _vmax) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, c in zip((*self.buckets, float("inf")), counts):
+                cumulative += c
+                le = 'le="%s"' % _fmt(bound)
+                lines.append(f"{self.name}_bucket{self._labels_text(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels_text(key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{self._labels_text(key)} {n}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list = []
+        self.started_at = time.time()
+
+    def _get_or_create(self, cls, name: str, help: str, labelnames, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+        elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"Métrique {name} déjà déclarée autrement ({metric.kind}, {metric.labelnames})")
+        return metric
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames=()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def add_collector(self, fn) -> None:
+        """fn() est appelée avant chaque lecture (jauges calculées à la demande)."""
+        self._collectors.append(fn)
+
+    def collect(self) -> None:
+        for fn in list(self._collectors):
+            try:
+                fn()
+            except Exception as e:
+                log.warning("[METRICS] Collecteur %s en échec : %s", getattr(fn, "__name__", fn), e)
+
+    def uptime(self) -> float:
+        return time.time() - self.started_at
+
+    def render_prometheus(self) -> str:
+        """Format texte d'exposition Prometheus."""
+        self.collect()
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric._render())
+        lines.append("# HELP bot_uptime_seconds Secondes depuis le démarrage du processus")
+        lines.append("# TYPE bot_uptime_seconds gauge")
+        lines.append(f"bot_uptime_seconds {self.uptime():.3f}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> list[str]:
+        """Lignes lisibles (!stats) : une ligne par série, histogrammes en ms."""
+        self.collect()
+        lines = [f"uptime {self.uptime() / 3600:.1f} h"]
+        for name, metric in sorted(self._metrics.items()):
+            for labels, value in metric.series():
+                label_txt = ",".join(f"{k}={v}" for k, v in labels.items())
+                head = f"{name}{{{label_txt}}}" if label_txt else name
+                if isinstance(metric, Histogram):
+                    st = metric.stats(**labels)
+                    lines.append(
+                        f"{head} n={st['count']} moy={st['avg'] * 1000:.1f}ms "
+                        f"p50={st['p50'] * 1000:.1f}ms p95={st['p95'] * 1000:.1f}ms max={st['max'] * 1000:.1f}ms"
+                    )
+                else:
+                    lines.append(f"{head} {value:g}")
+        return lines
+
+
+REGISTRY = MetricsRegistry()
+
+# ---------- Métriques du bot ----------
+
+COMMAND_SECONDS = REGISTRY.histogram(
+    "bot_command_duration_seconds", "Durée des commandes !xxx (du début du callback à la fin)", ("command",))
+COMMANDS_TOTAL = REGISTRY.counter(
+    "bot_commands_total", "Commandes exécutées (ok, error) ou refusées avant exécution (rejected)",
+    ("command", "status"))
+DAILY_STAGE_SECONDS = REGISTRY.histogram(
+    "bot_daily_job_stage_seconds", "Durée des étapes du rapport quotidien (format, smtp, save)", ("stage",))
+SMTP_TOTAL = REGISTRY.counter("bot_smtp_sends_total", "Envois SMTP du rapport", ("result",))
+SMTP_LAST_SECONDS = REGISTRY.gauge("bot_smtp_last_duration_seconds", "Durée du dernier envoi SMTP")
+SMTP_LAST_SUCCESS = REGISTRY.gauge("bot_smtp_last_success", "1 si le dernier envoi SMTP a réussi, 0 sinon")
+DAILY_LAST_RUN = REGISTRY.gauge("bot_daily_job_last_run_timestamp_seconds", "Fin du dernier rapport quotidien (epoch)")
+DAILY_NEXT_RUN = REGISTRY.gauge(
+    "bot_daily_job_next_run_timestamp_seconds", "Prochaine exécution planifiée (epoch), par tâche", ("job",))
+BACKFILL_CHANNEL_SECONDS = REGISTRY.histogram(
+    "bot_backfill_channel_seconds", "Durée du backfill (populate_initial_messages) par canal", ("channel",))
+BACKFILL_MESSAGES = REGISTRY.counter("bot_backfill_messages_total", "Messages récupérés au backfill", ("category",))
+INGESTED_MESSAGES = REGISTRY.counter(
+    "bot_ingested_messages_total", "Messages live traités par la file d'ingestion", ("result",))
+INGEST_BATCH_SECONDS = REGISTRY.histogram(
+    "bot_ingest_batch_seconds", "Durée d'application d'un lot d'ingestion au buffer",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0))
+INGEST_QUEUE_DEPTH = REGISTRY.gauge("bot_ingest_queue_depth", "Messages en attente dans la file d'ingestion", ("guild",))
+BUFFER_MESSAGES = REGISTRY.gauge("bot_buffer_messages", "Messages en mémoire (buffer du rapport)", ("guild", "category"))
+BUFFER_BYTES = REGISTRY.gauge(
+    "bot_buffer_bytes", "Octets approximatifs du buffer du rapport (bot.memory)", ("guild", "category"))
+BUFFER_EVICTED = REGISTRY.counter(
+    "bot_buffer_evicted_messages_total", "Messages sortis du buffer par budget mémoire (evict, spill)", ("policy",))
+STARTUP_SECONDS = REGISTRY.gauge(
+    "bot_startup_seconds", "Durée des phases du démarrage jusqu'au premier on_ready (bot.startup)", ("phase",))
+LOOP_LAG = REGISTRY.histogram(
+    "bot_event_loop_lag_seconds", "Retard de la boucle asyncio (réveil réel - réveil prévu)",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+LOOP_BLOCKS = REGISTRY.counter(
+    "bot_event_loop_blocks_total", "Blocages de la boucle au-delà du seuil, par site d'appel", ("site",))
+
+
+def smtp_result(ok: bool, seconds: float) -> None:
+    """Enregistre le résultat d'un envoi SMTP (compteur + dernière valeur)."""
+    SMTP_TOTAL.inc(result="ok" if ok else "error")
+    SMTP_LAST_SECONDS.set(seconds)
+    SMTP_LAST_SUCCESS.set(1 if ok else 0)
@@ -0,0 +1,128 @@
+# bot/near_duplicates.py
+
+"""
+Description:
+    Détection de quasi-doublons (annonce recopiée dans plusieurs canaux,
+    message re-posté avec une coquille corrigée, etc.).
+    - simhash64(texte) : empreinte 64 bits calculée une fois, à l'ingestion
+    - NearDuplicateIndex : index LSH (4 bandes de 16 bits) ; par le principe
+      des tiroirs, deux empreintes à distance de Hamming <= 3 partagent au
+      moins une bande → recherche en O(taille du seau), pas O(buffer).
+Uses: re, hashlib, numpy (optionnel : calcul des bits vectorisé, importé au premier calcul)
+Args: (selon la fonction)  ||  Returns: (empreinte int, ou identifiant de groupe)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+
+# numpy est importé au premier calcul (pas au démarrage du bot) ; None = absent
+_UNSET = object()
+np = _UNSET
+
+
+def _numpy():
+    global np
+    if np is _UNSET:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np
+
+FINGERPRINT_BITS = 64
+BANDS = 4
+BAND_BITS = FINGERPRINT_BITS // BANDS
+DEFAULT_MAX_DISTANCE = 3
+# En dessous, trop peu de n-grammes pour une empreinte fiable ("ok merci !")
+MIN_CHARS = 24
+SHINGLE_SIZE = 4
+
+_URL_RE = re.compile(r"https?://\S+")
+_NON_WORD_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def _normalize(text: str) -> str:
+    text = _URL_RE.sub(" ", text.lower())
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+def _shingle_hashes(norm: str) -> list[int]:
+    grams = {norm[i:i + SHINGLE_SIZE] for i in range(len(norm) - SHINGLE_SIZE + 1)}
+    return [
+        int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little")
+        for g in grams
+    ]
+
+
+def simhash64(text: str | None) -> int | None:
+    """Empreinte SimHash 64 bits du texte normalisé ; None si texte trop court."""
+    norm = _normalize(text or "")
+    if len(norm) < MIN_CHARS:
+        return None
+    hashes = _shingle_hashes(norm)
+
+    np = _numpy()
+    if np is not None:
+        # (n, 64) bits → vote majoritaire par colonne
+        bits = np.unpackbits(
+            np.asarray(hashes, dtype=np.uint64).view(np.uint8).reshape(-1, 8),
+            axis=1,
+            bitorder="little",
+        )
+        votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(hashes)
+        return int(np.packbits(votes, bitorder="little").view(np.uint64)[0])
+
+    counts = [0] * FINGERPRINT_BITS
+    for h in hashes:
+        for b in range(FINGERPRINT_BITS):
+            counts[b] += 1 if (h >> b) & 1 else -1
+    return sum(1 << b for b, c in enumerate(counts) if c > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _bands(fp: int):
+    mask = (1 << BAND_BITS) - 1
+    for i in range(BANDS):
+        yield i, (fp >> (i * BAND_BITS)) & mask
+
+
+class NearDuplicateIndex:
+    """
+    Regroupe les empreintes proches. add() renvoie l'identifiant du groupe
+    existant le plus proche (distance <= max_distance) ou en crée un nouveau.
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance doit être < {BANDS} (nombre de bandes LSH)")
+        self.max_distance = max_distance
+        self._buckets: dict[tuple[int, int], list[int]] = {}
+        self._fingerprints: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def find(self, fp: int) -> int | None:
+        best, best_d = None, self.max_distance + 1
+        for band in _bands(fp):
+            for gid in self._buckets.get(band, ()):
+                d = hamming(fp, self._fingerprints[gid])
+                if d < best_d:
+                    best, best_d = gid, d
+        return best
+
+    def add(self, fp: int) -> int:
+        gid = self.find(fp)
+        if gid is not None:
+            return gid
+        gid = len(self._fingerprints)
+        self._fingerprints.append(fp)
+        for band in _bands(fp):
+            self._buckets.setdefault(band, []).append(gid)
+        return gid
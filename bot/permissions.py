@@ -0,0 +1,81 @@
+# bot/permissions.py
+
+"""
+Description:
+    Ensemble des canaux lisibles par le bot, calculé depuis
+    channel.permissions_for(guild.me) (voir le canal + lire l'historique).
+    Les crawlers (backfill, !fetch_recent, fils) ne parcourent que cet
+    ensemble : plus d'appel history() perdu sur un canal interdit (Forbidden),
+    ni de budget de rate-limit gaspillé.
+    Mis à jour sur les événements de rôles, du membre du bot et des canaux.
+Uses: bot.classification
+Args: (selon la méthode)  ||  Returns: (canaux lisibles)
+"""
+
+from __future__ import annotations
+
+from bot.classification import is_thread
+
+
+def can_read(channel, member) -> bool:
+    """Le membre peut-il voir le canal ET lire son historique ?"""
+    if member is None:
+        return True  # membre inconnu (cache pas prêt) : on laisse l'appel décider
+    perms = channel.permissions_for(member)
+    return bool(perms.view_channel and perms.read_message_history)
+
+
+class ReadableChannels:
+    """{channel_id} lisibles par le bot, par guild."""
+
+    def __init__(self):
+        self._by_guild: dict[int, set[int]] = {}
+        self.recomputes = 0
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._by_guild.values())
+
+    def __contains__(self, channel) -> bool:
+        ids = self._by_guild.get(channel.guild.id)
+        if ids is None:
+            return True
+        # un fil public est lisible si son canal parent l'est
+        return (channel.parent_id if is_thread(channel) else channel.id) in ids
+
+    def rebuild_guild(self, guild) -> None:
+        """Recalcule la guild (démarrage, rôles ou rôles du bot modifiés)."""
+        me = guild.me
+        self._by_guild[guild.id] = {
+            channel.id
+            for channel in [*guild.text_channels, *getattr(guild, "forums", [])]
+            if can_read(channel, me)
+        }
+        self.recomputes += 1
+
+    def rebuild(self, guilds) -> None:
+        for guild in guilds:
+            self.rebuild_guild(guild)
+
+    def update_channel(self, channel) -> bool:
+        """Canal créé ou permissions du canal modifiées. Renvoie sa lisibilité."""
+        ids = self._by_guild.setdefault(channel.guild.id, set())
+        readable = can_read(channel, channel.guild.me)
+        if readable:
+            ids.add(channel.id)
+        else:
+            ids.discard(channel.id)
+        return readable
+
+    def remove_channel(self, channel) -> None:
+        """Canal supprimé, ou Forbidden reçu malgré tout (permissions changées sans événement)."""
+        self._by_guild.get(channel.guild.id, set()).discard(channel.id)
+
+    def filter(self, channels) -> list:
+        """Garde les canaux lisibles (guild jamais calculée → tous gardés)."""
+        return [c for c in channels if c in self]
+
+
+def readable(bot, channels) -> list:
+    """Filtre `channels` par bot.readable_channels s'il existe."""
+    rc = getattr(bot, "readable_channels", None)
+    return rc.filter(channels) if isinstance(rc, ReadableChannels) else list(channels)
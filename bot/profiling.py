@@ -0,0 +1,196 @@
+# bot/profiling.py
+
+"""
+Description:
+    Profilage à la demande des jobs et commandes, sur les données réelles.
+    - Profiler(label) : cProfile (déterministe) + échantillonneur de piles
+      (thread qui lit la pile du thread profilé toutes les 5 ms) ; à l'arrêt,
+      écrit dans rapports/profiles/ :
+        <label>_<date>.pstats     → python -m pstats, snakeviz…
+        <label>_<date>.collapsed  → piles repliées (flamegraph.pl, speedscope)
+      et renvoie un ProfileReport (20 fonctions les plus coûteuses, cumulé).
+    - profiled_job(name) : décorateur des jobs async (daily, populate),
+      actif si BOT_PROFILE le demande ("all" ou "daily,populate,preview_mail").
+    - profile_enabled(name) : même test pour les hooks de commandes (EmailCog, MessagesCog).
+    Un seul profil à la fois (ProfilerBusy sinon). Sur la boucle asyncio, le
+    profil couvre tout ce qui s'y exécute pendant la mesure, pas seulement le job.
+Uses: cProfile, pstats (importés au premier profil), threading, bot.env_config
+Args: (label, dossier)  ||  Returns: ProfileReport
+"""
+
+from __future__ import annotations
+
+import collections
+import functools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple
+
+from bot.env_config import get_bot_profile
+
+log = logging.getLogger(__name__)
+
+PROFILE_DIR = os.path.join("rapports", "profiles")
+TOP_N = 20
+SAMPLE_INTERVAL = 0.005
+
+# cProfile s'accroche au thread courant : deux profils imbriqués se marcheraient dessus
+_active = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Un profil est déjà en cours."""
+
+
+def profile_enabled(name: str) -> bool:
+    names = get_bot_profile()
+    return "*" in names or name in names
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Échantillonne la pile d'un thread (celui de la boucle) depuis un thread dédié."""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: collections.Counter[str] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            parts = []
+            while frame is not None:
+                parts.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if parts:
+                self.counts[";".join(reversed(parts))] += 1
+
+    def collapsed(self) -> list[str]:
+        """Lignes « racine;…;feuille nombre », les plus fréquentes d'abord."""
+        return [f"{stack} {n}" for stack, n in self.counts.most_common()]
+
+
+class ProfileReport(NamedTuple):
+    label: str
+    wall_s: float
+    samples: int
+    pstats_path: str
+    collapsed_path: str
+    # [(appels, propre s, cumulé s, "fichier:ligne(fonction)")], par temps cumulé décroissant
+    top: list
+
+    def format_top(self) -> str:
+        lines = [
+            f"{self.label} : {self.wall_s:.2f} s, {self.samples} échantillons",
+            f"{'appels':>9} {'propre ms':>10} {'cumul ms':>10}  fonction",
+        ]
+        for calls, tottime, cumtime, where in self.top:
+            lines.append(f"{calls:>9} {tottime * 1000:>10.1f} {cumtime * 1000:>10.1f}  {where}")
+        return "\n".join(lines)
+
+
+def top_functions(stats: pstats.Stats, n: int = TOP_N) -> list[tuple[str, float, float, str]]:
+    rows = []
+    for (filename, lineno, func), (cc, nc, tt, ct, _callers) in stats.stats.items():
+        calls = str(nc) if nc == cc else f"{nc}/{cc}"
+        rows.append((calls, tt, ct, f"{os.path.basename(filename)}:{lineno}({func})"))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows[:n]
+
+
+class Profiler:
+    """with Profiler("daily"): … ou start()/stop() (hooks avant / après commande)."""
+
+    def __init__(self, label: str, *, out_dir: str | None = None, sample_interval: float = SAMPLE_INTERVAL):
+        self.label = re.sub(r"[^\w.-]+", "_", label)
+        self.out_dir = out_dir
+        self.sample_interval = sample_interval
+        self.report: ProfileReport | None = None
+        self._profile: cProfile.Profile | None = None
+        self._sampler: StackSampler | None = None
+        self._t0 = 0.0
+
+    def start(self) -> "Profiler":
+        if not _active.acquire(blocking=False):
+            raise ProfilerBusy("un profil est déjà en cours")
+        import cProfile
+        self._sampler = StackSampler(threading.get_ident(), self.sample_interval).start()
+        self._profile = cProfile.Profile()
+        self._t0 = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def stop(self) -> ProfileReport:
+        try:
+            self._profile.disable()
+            wall = time.perf_counter() - self._t0
+            self._sampler.stop()
+        finally:
+            _active.release()
+
+        out_dir = self.out_dir or PROFILE_DIR
+        os.makedirs(out_dir, exist_ok=True)
+        base = os.path.join(out_dir, f"{self.label}_{datetime.now().strftime('%Y.%m.%d_%Hh%Mm%S')}")
+        import pstats
+        stats = pstats.Stats(self._profile)
+        stats.dump_stats(base + ".pstats")
+        collapsed = self._sampler.collapsed()
+        with open(base + ".collapsed", "w", encoding="utf-8") as f:
+            f.write("\n".join(collapsed) + ("\n" if collapsed else ""))
+
+        self.report = ProfileReport(
+            label=self.label,
+            wall_s=wall,
+            samples=sum(self._sampler.counts.values()),
+            pstats_path=base + ".pstats",
+            collapsed_path=base + ".collapsed",
+            top=top_functions(stats),
+        )
+        return self.report
+
+    def __enter__(self) -> "Profiler":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+
+def profiled_job(name: str):
+    """Décorateur de job async : profilé si BOT_PROFILE contient `name` (ou "all")."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not profile_enabled(name):
+                return await fn(*args, **kwargs)
+            try:
+                profiler = Profiler(name).start()
+            except ProfilerBusy:
+                return await fn(*args, **kwargs)
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                report = profiler.stop()
+                log.info("[PROFILE] %s : %.2f s → %s", name, report.wall_s, report.pstats_path)
+        return wrapper
+    return decorator
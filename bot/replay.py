@@ -0,0 +1,144 @@
+# bot/replay.py
+
+"""
+Description:
+    Rejoue le pipeline de rapport sur un rapport archivé (rapports/*.json) :
+        python -m bot.replay rapports/rapport_2025.09.22_10h08.json
+        python -m bot.replay rapports/<fichier>.json --update-golden
+    - relit le rapport au format du buffer (file_utils.load_messages_from_file)
+    - re-rend l'e-mail (résumé extractif sans cache, résumé naïf, cache chaud)
+      et format_messages_by_day, avec temps et pic mémoire (bot.bench.measure)
+    - compare l'e-mail rendu à sa copie de référence tests/golden/<rapport>.email.txt
+      (diff unifié ; code de sortie 1 si l'e-mail a changé)
+    Entrée réaliste + contrôle de non-régression pour le travail sur le formateur.
+Uses: argparse, difflib, locale, bot.bench, bot.file_utils, bot.mails_management, bot.summarizer
+Args: chemins des rapports JSON  ||  Returns: code de sortie (0 = identique, 1 = différent)
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import locale
+import os
+import sys
+import time
+
+from bot.bench import measure
+from bot.file_utils import load_messages_from_file
+from bot.mails_management import format_messages_for_email
+from bot.summarizer import format_messages_by_day
+from bot.summary_cache import SummaryCache
+
+GOLDEN_DIR = os.path.join("tests", "golden")
+MAX_DIFF_LINES = 80
+
+
+def golden_path(report_path: str, golden_dir: str = GOLDEN_DIR) -> str:
+    stem = os.path.splitext(os.path.basename(report_path))[0]
+    return os.path.join(golden_dir, f"{stem}.email.txt")
+
+
+def render_email(messages_dict: dict) -> str:
+    """Rendu de référence : réglages par défaut, sans cache (résultat reproductible)."""
+    return format_messages_for_email(messages_dict, summary_cache=None)
+
+
+def diff_against_golden(rendered: str, golden_file: str) -> list[str] | None:
+    """Lignes du diff unifié (vide = identique) ; None si la copie de référence n'existe pas."""
+    try:
+        with open(golden_file, "r", encoding="utf-8") as f:
+            expected = f.read()
+    except OSError:
+        return None
+    return list(difflib.unified_diff(
+        expected.splitlines(), rendered.splitlines(),
+        fromfile=golden_file, tofile="rendu actuel", lineterm="",
+    ))
+
+
+def time_pipeline(messages_dict: dict, repeat: int = 3) -> list:
+    """Mesures (BenchResult) des étapes de rendu sur le rapport rejoué."""
+    warm = SummaryCache()
+    format_messages_for_email(messages_dict, summary_cache=warm)  # remplit le cache
+    # format_messages_by_day change LC_TIME : restauré pour ne pas influencer l'e-mail
+    saved_locale = locale.setlocale(locale.LC_TIME)
+    try:
+        return [
+            measure("email (extractif, sans cache)", lambda: render_email(messages_dict), repeat=repeat),
+            measure("email (naïf)", lambda: format_messages_for_email(
+                messages_dict, summarizer_backend="naive", summary_cache=None), repeat=repeat),
+            measure("email (cache chaud)", lambda: format_messages_for_email(
+                messages_dict, summary_cache=warm), repeat=repeat),
+            measure("format_messages_by_day", lambda: format_messages_by_day(messages_dict), repeat=repeat),
+        ]
+    finally:
+        locale.setlocale(locale.LC_TIME, saved_locale)
+
+
+def replay(path: str, *, golden_dir: str = GOLDEN_DIR, update_golden: bool = False,
+           repeat: int = 3, show: bool = False) -> bool:
+    """Rejoue un rapport. Renvoie False si l'e-mail diffère de sa copie de référence."""
+    t0 = time.perf_counter()
+    metadata, messages_dict = load_messages_from_file(path)
+    load_ms = (time.perf_counter() - t0) * 1000
+    n = sum(len(msgs) for channels in messages_dict.values() for msgs in channels.values())
+    n_channels = sum(len(channels) for channels in messages_dict.values())
+    print(f"[REPLAY] {path} : {n} messages, {n_channels} canaux "
+          f"({metadata.get('oldest_message')} → {metadata.get('newest_message')}), relu en {load_ms:.1f} ms")
+
+    rendered = render_email(messages_dict)
+    for r in time_pipeline(messages_dict, repeat=repeat):
+        if r.error is not None:
+            print(f"[REPLAY] {r.name:<30} ignoré : {r.error}")
+            continue
+        print(f"[REPLAY] {r.name:<30} médiane {r.median_s * 1000:8.1f} ms  "
+              f"meilleur {r.best_s * 1000:8.1f} ms  pic {r.peak_kib:8.0f} KiB")
+    if show:
+        print(rendered)
+
+    golden_file = golden_path(path, golden_dir)
+    if update_golden:
+        os.makedirs(golden_dir, exist_ok=True)
+        with open(golden_file, "w", encoding="utf-8") as f:
+            f.write(rendered)
+        print(f"[REPLAY] Copie de référence écrite : {golden_file}")
+        return True
+
+    diff = diff_against_golden(rendered, golden_file)
+    if diff is None:
+        print(f"[REPLAY] Pas de copie de référence ({golden_file}) : lancer avec --update-golden.")
+        return True
+    if not diff:
+        print(f"[REPLAY] E-mail identique à {golden_file} ({len(rendered)} caractères).")
+        return True
+    print(f"[REPLAY] E-mail DIFFÉRENT de {golden_file} :", file=sys.stderr)
+    for line in diff[:MAX_DIFF_LINES]:
+        print(line, file=sys.stderr)
+    if len(diff) > MAX_DIFF_LINES:
+        print(f"… ({len(diff) - MAX_DIFF_LINES} lignes de diff en plus)", file=sys.stderr)
+    return False
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bot.replay", description="Rejoue le rapport sur des archives.")
+    parser.add_argument("reports", nargs="+", help="rapports/*.json")
+    parser.add_argument("--golden-dir", default=GOLDEN_DIR)
+    parser.add_argument("--update-golden", action="store_true", help="remplace la copie de référence")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--show", action="store_true", help="affiche l'e-mail rendu")
+    args = parser.parse_args(argv)
+
+    ok = True
+    for path in args.reports:
+        try:
+            ok &= replay(path, golden_dir=args.golden_dir, update_golden=args.update_golden,
+                         repeat=args.repeat, show=args.show)
+        except (OSError, ValueError) as e:
+            print(f"[REPLAY] {path} illisible : {e}", file=sys.stderr)
+            ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,8 @@ from datetime import datetime, timedelta
 import logging
 import zoneinfo
 
+from bot.metrics import DAILY_NEXT_RUN
+
 log = logging.getLogger(__name__)
 
 async def run_daily_07h_europe_brussels(job_coro):
@@ -11,16 +13,25 @@ async def run_daily_07h_europe_brussels(job_coro):
     Lance `job_coro` chaque jour à 07:00 Europe/Brussels.
     `job_coro` doit être une coroutine SANS argument.
     """
+    await run_daily_at(job_coro, 7, 0)
+
+async def run_daily_at(job_coro, hour: int = 7, minute: int = 0, *, name: str = "daily"):
+    """
+    Lance `job_coro` chaque jour à hour:minute Europe/Brussels
+    (une tâche par guild ; utilisé par bot.core et bot.worker).
+    name : nom de la tâche pour la métrique de prochaine exécution (/healthz).
+    """
     tz = zoneinfo.ZoneInfo("Europe/Brussels")
     await asyncio.sleep(0)  # yield au loop
 
     while True:
         now = datetime.now(tz)
-        target = now.replace(hour=7, minute=0, second=0, microsecond=0)
+        target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
         if target <= now:
             target = target + timedelta(days=1)
 
         sleep_s = (target - now).total_seconds()
+        DAILY_NEXT_RUN.set(target.timestamp(), job=name)
         log.info("[CORE] Prochaine exécution à %s (dans %d s)", target.isoformat(), int(sleep_s))
 
         try:
@@ -0,0 +1,144 @@
+# bot/startup.py
+
+"""
+Description:
+    Mesure du démarrage et suivi du backfill.
+    - StartupClock : jalons du démarrage (imports, init, connexion…) depuis le
+      tout début de bot.core ; summary() est affiché au premier on_ready et
+      chaque phase est exposée dans bot_startup_seconds{phase}.
+    - BackfillProgress : avancement du backfill d'une guild (canaux traités /
+      total, messages, phase), mis à jour par populate_initial_messages pendant
+      qu'il tourne en tâche de fond ; journalisé toutes les LOG_EVERY secondes,
+      visible dans /healthz et !stats. Les commandes et l'ingestion live
+      fonctionnent pendant ce temps.
+    - preload_modules() : importe les modules lourds (numpy via les résumés,
+      sujets, quasi-doublons) dans un thread après on_ready, pour que le
+      premier message ou le premier rapport ne paie pas l'import sur la boucle.
+Uses: importlib, logging, time
+Args: (horloge)  ||  Returns: jalons / instantanés (dict)
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+# importés à la demande par le code, préchargés hors de la boucle après on_ready
+PRELOAD_MODULES = ("bot.extractive_summarizer", "bot.topics", "bot.mails_management")
+
+
+class StartupClock:
+    """Jalons du démarrage, en secondes depuis t0 ; chaque jalon n'est pris qu'une fois."""
+
+    def __init__(self, t0: float | None = None, clock=time.perf_counter):
+        self.clock = clock
+        self.t0 = clock() if t0 is None else t0
+        self.marks: dict[str, float] = {}
+
+    def mark(self, name: str) -> float:
+        if name not in self.marks:
+            self.marks[name] = self.clock() - self.t0
+        return self.marks[name]
+
+    def phases(self) -> list[tuple[str, float]]:
+        """[(jalon, durée depuis le jalon précédent)], dans l'ordre où ils ont été pris."""
+        out, previous = [], 0.0
+        for name, at in self.marks.items():
+            out.append((name, at - previous))
+            previous = at
+        return out
+
+    def total(self) -> float:
+        return max(self.marks.values(), default=0.0)
+
+    def summary(self) -> str:
+        detail = ", ".join(f"{name} {seconds:.2f} s" for name, seconds in self.phases())
+        return f"prêt en {self.total():.2f} s ({detail})"
+
+    def snapshot(self) -> dict:
+        return {
+            "total_s": round(self.total(), 3),
+            "phases_s": {name: round(seconds, 3) for name, seconds in self.phases()},
+        }
+
+
+class BackfillProgress:
+    """Avancement du backfill d'une guild : pending → channels → threads → done (ou failed)."""
+
+    LOG_EVERY = 5.0
+
+    def __init__(self, label: str = "", clock=time.monotonic):
+        self.label = label
+        self.clock = clock
+        self.phase = "pending"
+        self.channels_total = 0
+        self.channels_done = 0
+        self.messages = 0
+        self.skipped = 0            # déjà reçus par l'ingestion live
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._last_log = 0.0
+
+    def start(self, channels_total: int) -> None:
+        self.phase = "channels"
+        self.channels_total = channels_total
+        self.started_at = self._last_log = self.clock()
+
+    def channel_done(self, messages: int, skipped: int = 0) -> None:
+        self.channels_done += 1
+        self.messages += messages
+        self.skipped += skipped
+        now = self.clock()
+        if now - self._last_log >= self.LOG_EVERY:
+            self._last_log = now
+            log.info("[BACKFILL] %s : %s", self.label, self.summary())
+
+    def threads(self) -> None:
+        self.phase = "threads"
+
+    def add_messages(self, messages: int, skipped: int = 0) -> None:
+        self.messages += messages
+        self.skipped += skipped
+
+    def finish(self, failed: bool = False) -> None:
+        self.phase = "failed" if failed else "done"
+        self.finished_at = self.clock()
+
+    @property
+    def running(self) -> bool:
+        return self.phase in ("channels", "threads")
+
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at if self.finished_at is not None else self.clock()) - self.started_at
+
+    def summary(self) -> str:
+        return (f"{self.phase}, {self.channels_done}/{self.channels_total} canaux, "
+                f"{self.messages} messages ({self.skipped} déjà reçus), {self.elapsed():.1f} s")
+
+    def snapshot(self) -> dict:
+        return {
+            "phase": self.phase,
+            "channels_done": self.channels_done,
+            "channels_total": self.channels_total,
+            "messages": self.messages,
+            "skipped": self.skipped,
+            "elapsed_s": round(self.elapsed(), 1),
+        }
+
+
+def preload_modules(names=PRELOAD_MODULES) -> float:
+    """Importe `names` (à lancer via asyncio.to_thread) ; renvoie la durée en secondes."""
+    t0 = time.perf_counter()
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            log.warning("[STARTUP] Préchargement de %s impossible", name, exc_info=True)
+    from bot.near_duplicates import _numpy
+    _numpy()
+    return time.perf_counter() - t0
@@ -0,0 +1,128 @@
+# bot/summary_cache.py
+
+"""
+Description:
+    Cache LRU (avec expiration TTL) des résumés de canaux.
+    La clé est une empreinte (blake2b) de la séquence de messages nettoyés
+    et des paramètres du résumé : tant que les messages d'un canal ne
+    changent pas, !preview_mail et l'envoi quotidien réutilisent le résumé
+    déjà calculé, quel que soit le moteur configuré.
+Uses: collections.OrderedDict, hashlib, time
+Args: (selon la méthode)  ||  Returns: (résumé en cache ou None)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 512
+DEFAULT_TTL_S = 6 * 3600.0
+
+
+def make_key(parts, **params) -> str:
+    """
+    Empreinte stable d'une séquence de textes + paramètres du résumé.
+    Ex: make_key(["Anne: salut", "Bea: ok"], backend="extractive", max_chars=450)
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for name in sorted(params):
+        h.update(f"{name}={params[name]!r}\x1f".encode("utf-8"))
+    h.update(b"\x1e")
+    for p in parts:
+        h.update(p.encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+class SummaryCache:
+    """LRU borné en taille, entrées expirées après ttl_s secondes, compteurs hit/miss."""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl_s: float = DEFAULT_TTL_S, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._data: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        # étiquette (ex: (canal, jour)) → clés, pour l'invalidation ciblée
+        self._tags: dict[tuple, set[str]] = {}
+        self._key_tag: dict[str, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if self._clock() >= expires_at:
+            self._drop(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _untag(self, key: str) -> None:
+        tag = self._key_tag.pop(key, None)
+        keys = self._tags.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+
+    def _drop(self, key: str) -> None:
+        """Retire une entrée et sa clé de son étiquette (expiration, éviction LRU)."""
+        del self._data[key]
+        self._untag(key)
+
+    def put(self, key: str, value: str, tag: tuple | None = None) -> None:
+        if tag is not None and self._key_tag.get(key) != tag:
+            self._untag(key)
+            self._tags.setdefault(tag, set()).add(key)
+            self._key_tag[key] = tag
+        self._data[key] = (self._clock() + self.ttl_s, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._drop(next(iter(self._data)))
+            self.evictions += 1
+
+    def invalidate(self, *tag) -> int:
+        """Retire les entrées étiquetées `tag` (ex: invalidate("général", "2025-09-22"))."""
+        removed = 0
+        for key in self._tags.pop(tuple(tag), ()):
+            self._key_tag.pop(key, None)
+            if self._data.pop(key, None) is not None:
+                removed += 1
+        self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._tags.clear()
+        self._key_tag.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+        }
+
+
+# Instance partagée par le formatage des e-mails
+SUMMARY_CACHE = SummaryCache()
@@ -0,0 +1,198 @@
+# bot/threads.py
+
+"""
+Description:
+    Récupération des fils (threads) et posts de forum, actifs et archivés.
+    - list_threads() : fils actifs (guild.active_threads) + fils archivés
+      récents de chaque salon texte / forum, listés en parallèle
+    - crawl_threads() : lit l'historique de chaque fil avec un pool borné de
+      workers (THREAD_CRAWL_CONCURRENCY) ; chaque fil hérite du classement
+      de son canal parent (clé du buffer = nom du parent, m["thread"] = nom du fil)
+    - ThreadCheckpoints : dernier message lu par fil (data/thread_checkpoints.json) ;
+      un fil sans nouveau message depuis le checkpoint n'est même pas interrogé,
+      les autres ne sont lus qu'à partir du checkpoint. Le buffer, lui, est en
+      mémoire : un checkpoint n'est utilisé que si son message est encore dans
+      bot.message_index (sinon — redémarrage, éviction — le fil est relu)
+Uses: asyncio, json, discord, bot.ingestion
+Args: (selon la fonction)  ||  Returns: list[tuple[catégorie, canal, entrée]]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+from bot.ingestion import make_buffer_entry
+from bot.permissions import readable
+
+log = logging.getLogger(__name__)
+
+CHECKPOINTS_PATH = os.path.join("data", "thread_checkpoints.json")
+DEFAULT_CONCURRENCY = 4
+DEFAULT_ARCHIVED_MAX_AGE_H = 72
+
+
+class ThreadCheckpoints:
+    """{thread_id: dernier message_id lu}, persisté en JSON."""
+
+    def __init__(self, path: str = CHECKPOINTS_PATH):
+        self.path = path
+        self._data: dict[int, int] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._data = {int(k): int(v) for k, v in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            self._data = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, thread_id: int) -> int | None:
+        return self._data.get(thread_id)
+
+    def set(self, thread_id: int, message_id: int) -> None:
+        if message_id > self._data.get(thread_id, 0):
+            self._data[thread_id] = message_id
+
+    def save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({str(k): v for k, v in self._data.items()}, f)
+        except OSError as e:
+            log.warning("[THREADS] Checkpoints des fils non sauvegardés : %s", e)
+
+
+async def run_bounded(items, worker, concurrency: int = DEFAULT_CONCURRENCY) -> list:
+    """
+    Applique `worker` (coroutine) à chaque item avec au plus `concurrency`
+    appels simultanés. Résultats dans l'ordre des items ; une exception
+    d'un item est renvoyée à sa place (les autres continuent).
+    """
+    items = list(items)
+    results: list = [None] * len(items)
+    queue: asyncio.Queue = asyncio.Queue()
+    for pair in enumerate(items):
+        queue.put_nowait(pair)
+
+    async def _worker():
+        while True:
+            try:
+                i, item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                results[i] = await worker(item)
+            except Exception as e:
+                results[i] = e
+
+    await asyncio.gather(*(_worker() for _ in range(max(1, min(concurrency, len(items))))))
+    return results
+
+
+async def list_threads(
+    guild,
+    *,
+    archived_max_age_h: float = DEFAULT_ARCHIVED_MAX_AGE_H,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    now: datetime | None = None,
+    parents: list | None = None,
+) -> list:
+    """
+    Fils actifs + fils publics archivés depuis moins de `archived_max_age_h` heures.
+    parents : canaux dont on liste les fils archivés (défaut : salons texte + forums).
+    """
+    try:
+        active = await guild.active_threads()
+    except discord.HTTPException:
+        active = list(guild.threads)  # repli : cache du gateway
+    threads = {t.id: t for t in active}
+
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(hours=archived_max_age_h)
+    if parents is None:
+        parents = [*guild.text_channels, *getattr(guild, "forums", [])]
+
+    async def _archived(parent):
+        found = []
+        try:
+            # triés du plus récemment archivé au plus ancien
+            async for t in parent.archived_threads(limit=None):
+                if t.archive_timestamp < cutoff:
+                    break
+                found.append(t)
+        except (discord.Forbidden, discord.HTTPException):
+            pass
+        return found
+
+    for found in await run_bounded(parents, _archived, concurrency):
+        if isinstance(found, list):
+            for t in found:
+                threads.setdefault(t.id, t)
+    return list(threads.values())
+
+
+async def crawl_threads(
+    bot,
+    guild,
+    *,
+    limit: int = 20,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    checkpoints: ThreadCheckpoints | None = None,
+    archived_max_age_h: float = DEFAULT_ARCHIVED_MAX_AGE_H,
+) -> list[tuple[str, str, dict]]:
+    """
+    Lit les `limit` derniers messages (hors bots) de chaque fil, en parallèle borné.
+    Avec `checkpoints`, seuls les messages postérieurs au dernier lu sont récupérés,
+    à condition que ce dernier soit encore dans bot.message_index.
+    Renvoie [(catégorie, nom du canal parent, entrée)], dans l'ordre chronologique par fil.
+    """
+    classifier = bot.channel_classifier
+    matcher = getattr(bot, "keyword_matcher", None)
+    index = getattr(bot, "message_index", None)
+    parents = readable(bot, [*guild.text_channels, *getattr(guild, "forums", [])])
+    threads = readable(bot, await list_threads(
+        guild, archived_max_age_h=archived_max_age_h, concurrency=concurrency, parents=parents,
+    ))
+    skipped = 0
+
+    async def _crawl(thread):
+        nonlocal skipped
+        cls = classifier.lookup(thread)
+        if cls.excluded:
+            return []
+        after = checkpoints.get(thread.id) if checkpoints else None
+        if after is not None and (index is None or after not in index):
+            after = None   # buffer perdu depuis (redémarrage) : le checkpoint ne garantit plus rien
+        if after is not None and thread.last_message_id is not None and thread.last_message_id <= after:
+            skipped += 1
+            return []
+        kwargs = {"limit": limit, "oldest_first": False}
+        if after is not None:
+            kwargs["after"] = discord.Object(id=after)
+        collected = []
+        async for msg in thread.history(**kwargs):
+            if msg.author.bot:
+                continue
+            entry = make_buffer_entry(msg.author.name, msg.content, msg.created_at, matcher, msg.id)
+            entry["thread"] = thread.name
+            collected.append((cls.category, cls.name, entry))
+        collected.reverse()
+        if checkpoints is not None and collected:
+            checkpoints.set(thread.id, max(e["id"] for _, _, e in collected))
+        return collected
+
+    out: list[tuple[str, str, dict]] = []
+    for thread, res in zip(threads, await run_bounded(threads, _crawl, concurrency)):
+        if isinstance(res, Exception):
+            log.warning("[THREADS] Fil '%s' non lu : %s", thread.name, res, extra={"channel": thread.name})
+            continue
+        out.extend(res)
+    if checkpoints is not None:
+        checkpoints.save()
+    log.info("[THREADS] %d fil(s), %d message(s), %d fil(s) inchangé(s)", len(threads), len(out), skipped)
+    return out
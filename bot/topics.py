@@ -0,0 +1,197 @@
+# bot/topics.py
+
+"""
+Description:
+    Regroupement des messages du jour par sujet ("Sujets du jour").
+    - hash_vectorize : chaque message → vecteur de taille fixe (hashing trick
+      signé, pas de vocabulaire à maintenir), normalisé L2
+    - minibatch_kmeans : k-means sphérique par mini-lots (Sculley 2010), NumPy pur
+    - cluster_topics : sujets = groupes couvrant au moins deux canaux, avec
+      mots-clés représentatifs et messages les plus proches du centroïde
+    Tourne sur CPU, hors-ligne ; benchmark : python -m bot.topics
+Uses: re, zlib, collections.Counter, numpy (optionnel : pas de section si absent)
+Args: (selon la fonction)  ||  Returns: (liste de sujets, dicts)
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import time
+import zlib
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+N_FEATURES = 2 ** 10
+MAX_TOPICS = 8
+# En dessous, regrouper par sujet n'apporte rien (les canaux suffisent)
+MIN_MESSAGES = 10
+MIN_TOPIC_SIZE = 3
+
+_TOKEN_RE = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+_STOPWORDS = frozenset("""
+    les des une est pas que qui pour dans sur avec par plus mais vous nous elle ils elles
+    son ses sont aux ces cette cet été être avoir fait faire comme tout tous toutes très
+    bien aussi donc alors car leur leurs notre nos votre vos mes tes mon ton lui moi toi
+    même encore déjà peut ont avait était sera suis ici là quand bonjour merci the and
+""".split())
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+def hash_vectorize(token_lists: list[list[str]], n_features: int = N_FEATURES):
+    """
+    Matrice (n_messages, n_features) float32 : hashing trick signé (crc32),
+    puis normalisation L2 des lignes. Lignes nulles si aucun token.
+    """
+    rows, cols, signs = [], [], []
+    for i, toks in enumerate(token_lists):
+        for t in toks:
+            h = zlib.crc32(t.encode("utf-8"))
+            rows.append(i)
+            cols.append(h % n_features)
+            signs.append(1.0 if (h >> 31) & 1 else -1.0)
+    X = np.zeros((len(token_lists), n_features), dtype=np.float32)
+    if rows:
+        np.add.at(X, (np.asarray(rows), np.asarray(cols)), np.asarray(signs, dtype=np.float32))
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return X / norms
+
+
+def _kmeans_plus_plus(X, k: int, rng):
+    centers = [X[rng.integers(len(X))]]
+    closest = 1.0 - X @ centers[0]
+    for _ in range(1, k):
+        d2 = np.clip(closest, 0.0, None) ** 2
+        total = d2.sum()
+        idx = rng.choice(len(X), p=d2 / total) if total > 0 else rng.integers(len(X))
+        centers.append(X[idx])
+        closest = np.minimum(closest, 1.0 - X @ X[idx])
+    return np.stack(centers)
+
+
+def minibatch_kmeans(X, k: int, *, batch_size: int = 256, n_iter: int = 60, seed: int = 0):
+    """
+    k-means sphérique (similarité cosinus) par mini-lots.
+    Renvoie (labels, centers). X doit être normalisé L2.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(X)
+    k = max(1, min(k, n))
+    init_idx = rng.choice(n, size=min(n, 20 * k), replace=False)
+    centers = _kmeans_plus_plus(X[init_idx], k, rng)
+    counts = np.zeros(k, dtype=np.float64)
+    eye = np.eye(k, dtype=np.float32)
+
+    for _ in range(n_iter):
+        batch = X[rng.choice(n, size=min(batch_size, n), replace=False)]
+        assign = np.argmax(batch @ centers.T, axis=1)
+        onehot = eye[assign]                       # (b, k)
+        sums = onehot.T @ batch                    # (k, F)
+        nb = onehot.sum(axis=0).astype(np.float64)
+        counts += nb
+        # taux d'apprentissage par centre = nb / total vu (moyenne mobile)
+        eta = np.divide(nb, counts, out=np.zeros_like(nb), where=counts > 0)[:, None]
+        means = sums / np.maximum(nb, 1.0)[:, None]
+        centers = (1.0 - eta) * centers + eta * means
+        norms = np.linalg.norm(centers, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centers = (centers / norms).astype(np.float32)
+
+    labels = np.argmax(X @ centers.T, axis=1)
+    return labels, centers
+
+
+def _choose_k(n: int) -> int:
+    return max(2, min(MAX_TOPICS, int(round(math.sqrt(n / 4)))))
+
+
+def cluster_topics(
+    items: list[tuple[str, dict]],
+    *,
+    k: int | None = None,
+    max_examples: int = 3,
+    seed: int = 0,
+) -> list[dict]:
+    """
+    items : [(canal, message), ...] (message = dict avec au moins "content").
+    Renvoie les sujets couvrant >= 2 canaux, du plus gros au plus petit :
+      {"terms": [...], "size": int, "channels": [...], "examples": [(canal, message), ...]}
+    """
+    if np is None or len(items) < MIN_MESSAGES:
+        return []
+
+    token_lists = [tokenize(m.get("content", "")) for _ch, m in items]
+    keep = [i for i, toks in enumerate(token_lists) if toks]
+    if len(keep) < MIN_MESSAGES:
+        return []
+    token_lists = [token_lists[i] for i in keep]
+    items = [items[i] for i in keep]
+
+    X = hash_vectorize(token_lists)
+    labels, centers = minibatch_kmeans(X, k or _choose_k(len(items)), seed=seed)
+    sims = np.einsum("ij,ij->i", X, centers[labels])
+
+    df = Counter(t for toks in token_lists for t in set(toks))
+    n_docs = len(token_lists)
+    topics = []
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        channels = sorted({items[i][0] for i in members})
+        if len(members) < MIN_TOPIC_SIZE or len(channels) < 2:
+            continue
+        tf = Counter(t for i in members for t in set(token_lists[i]))
+        terms = sorted(tf, key=lambda t: (-tf[t] * math.log(n_docs / df[t] + 1.0), t))[:3]
+        best = members[np.argsort(-sims[members], kind="stable")[:max_examples]]
+        topics.append({
+            "terms": terms,
+            "size": int(len(members)),
+            "channels": channels,
+            "examples": [items[i] for i in best],
+        })
+    topics.sort(key=lambda t: -t["size"])
+    return topics
+
+
+# ---------- Benchmark (python -m bot.topics [n_messages]) ----------
+
+_BENCH_THEMES = [
+    "réunion mensuelle coalition ordre du jour salle jeudi",
+    "budget subsides rapport financier justificatifs dépenses",
+    "formation juristes violences accompagnement victimes atelier",
+    "campagne communication affiches réseaux sociaux visuels",
+    "plaidoyer parlement ministre courrier proposition texte",
+]
+
+
+def benchmark(n_messages: int = 3000, repeat: int = 3, seed: int = 0) -> float:
+    """Génère n_messages synthétiques et renvoie le meilleur temps (s) de cluster_topics."""
+    import random
+    rnd = random.Random(seed)
+    channels = [f"canal-{i}" for i in range(12)]
+    filler = "les gens vraiment demain semaine prochaine document lien partagé avis".split()
+    items = []
+    for _ in range(n_messages):
+        theme = rnd.choice(_BENCH_THEMES).split()
+        words = rnd.sample(theme, 4) + rnd.sample(filler, 3)
+        rnd.shuffle(words)
+        items.append((rnd.choice(channels), {"content": " ".join(words)}))
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        cluster_topics(items, seed=seed)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+if __name__ == "__main__":
+    import sys
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    print(f"[BENCH] cluster_topics({n} messages) : {benchmark(n) * 1000:.1f} ms (meilleur de 3)")
@@ -0,0 +1,209 @@
+# bot/worker.py
+
+"""
+Description:
+    Processus de rapports (déploiement en deux processus) :
+        BOT_MODE=ingest python -m bot.core   → gateway Discord + journal SQLite
+        python -m bot.worker                 → planification, rendu, archivage, e-mails
+    Le worker ne parle pas à Discord : il lit le buffer de chaque guild dans
+    le journal (bot.journal), rend les rapports dans un pool de processus
+    (WORKER_PROCESSES, un par cœur par défaut) et les envoie. Un rendu lourd
+    ou un SMTP bloqué ne concurrence plus les heartbeats du gateway.
+    Le processus d'ingestion le pilote par IPC locale (bot.ipc) :
+    "refresh" (nouvelle guild), "report" (!send_daily_summary), "ping",
+    "metrics" (exposition Prometheus du worker, pour !stats).
+Uses: asyncio, concurrent.futures, bot.journal, bot.ipc, bot.scheduler, bot.mails_management, bot.metrics
+Args: (aucun, configuration par .env)  ||  Returns: (processus longue durée)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import logging
+import signal
+import time
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from bot import ipc
+from bot.env_config import (
+    get_email_address,
+    get_email_password,
+    get_recipient_email,
+    get_test_recipient_email,
+    get_journal_path,
+    get_journal_retention_days,
+    get_worker_address,
+    get_worker_ipc_token,
+    get_worker_processes,
+)
+from bot.file_utils import save_messages_to_file
+from bot.guilds import GuildConfig, guild_recipients
+from bot.journal import MessageJournal
+from bot.logging_setup import setup_logging, stop_logging
+from bot.mails_management import format_messages_for_email, send_email
+from bot.metrics import REGISTRY, DAILY_LAST_RUN, DAILY_STAGE_SECONDS, smtp_result
+from bot.profiling import profiled_job
+from bot.scheduler import run_daily_at
+
+log = logging.getLogger(__name__)
+
+# Premier rapport d'une guild : fenêtre par défaut
+FIRST_REPORT_WINDOW = timedelta(hours=24)
+# !send_daily_summary : toujours les dernières 24h, sans toucher au rapport planifié
+MANUAL_REPORT_WINDOW = timedelta(hours=24)
+
+
+def render_report(messages_dict: dict) -> str:
+    """Rendu exécuté dans un processus du pool (fonction de module : picklable)."""
+    return format_messages_for_email(messages_dict)
+
+
+def _config_from_json(raw: dict) -> GuildConfig:
+    raw = dict(raw)
+    raw["recipients"] = tuple(raw.get("recipients") or ())
+    raw["daily_at"] = tuple(raw.get("daily_at") or (7, 0))
+    return GuildConfig(**{k: v for k, v in raw.items() if k in GuildConfig._fields})
+
+
+class ReportWorker:
+    def __init__(self, journal: MessageJournal, *, processes: int | None = None, clock=None):
+        self.journal = journal
+        self.pool = ProcessPoolExecutor(max_workers=processes) if processes else None
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+        self.tasks: dict[int, asyncio.Task] = {}
+        self.reports = 0
+        self.failures = 0
+
+    def _guild(self, guild_id: int) -> tuple[str, GuildConfig]:
+        for gid, name, raw in self.journal.guilds():
+            if gid == guild_id:
+                return name, _config_from_json(raw)
+        raise KeyError(f"guild {guild_id} inconnue du journal")
+
+    async def _render(self, buffer: dict) -> str:
+        if self.pool is None:
+            return render_report(buffer)
+        return await asyncio.get_running_loop().run_in_executor(self.pool, render_report, buffer)
+
+    @profiled_job("daily")
+    async def run_report(self, guild_id: int, *, test: bool = False, manual: bool = False) -> dict:
+        """
+        Rapport d'une guild. Planifié : messages depuis le dernier envoi (24h au
+        premier), puis marque l'envoi et élague le journal. manual=True
+        (!send_daily_summary) : dernières 24h, sans marquer ni élaguer, pour ne
+        pas consommer la fenêtre du prochain rapport planifié.
+        """
+        name, config = self._guild(guild_id)
+        now = self._clock()
+        if manual:
+            since = now - MANUAL_REPORT_WINDOW
+        else:
+            since = self.journal.last_report(guild_id) or now - FIRST_REPORT_WINDOW
+        buffer = self.journal.load_buffer(guild_id, since)
+        with DAILY_STAGE_SECONDS.time(stage="format"):
+            summary = await self._render(buffer)
+
+        state = SimpleNamespace(guild_config=config)
+        recipients = [get_test_recipient_email()] if test else guild_recipients(state, get_recipient_email)
+        recipients = [r for r in recipients if r]
+        to_addr = ", ".join(recipients)
+        if recipients:
+            t0 = time.perf_counter()
+            try:
+                with DAILY_STAGE_SECONDS.time(stage="smtp"):
+                    await send_email(summary, get_email_address(), get_email_password(), recipients)
+                smtp_result(True, time.perf_counter() - t0)
+                log.info("[WORKER] %s : résumé envoyé à %s.", name, to_addr)
+            except Exception:
+                smtp_result(False, time.perf_counter() - t0)
+                self.failures += 1
+                log.exception("[WORKER] %s : échec de l'envoi du résumé (SMTP).", name)
+                return {"ok": False, "guild_id": guild_id, "error": "échec SMTP"}
+        else:
+            log.warning("[WORKER] %s : aucun destinataire configuré, envoi ignoré.", name)
+
+        try:
+            with DAILY_STAGE_SECONDS.time(stage="save"):
+                save_messages_to_file(buffer, directory=config.reports_dir)
+        except Exception:
+            log.exception("[WORKER] %s : échec de la sauvegarde du JSON.", name)
+
+        if not (test or manual):
+            self.journal.mark_report(guild_id, now)
+            self.journal.prune(now - timedelta(days=get_journal_retention_days()))
+        self.reports += 1
+        DAILY_LAST_RUN.set(time.time())
+        return {"ok": True, "guild_id": guild_id, "sent_to": to_addr, "chars": len(summary)}
+
+    def schedule_all(self) -> int:
+        """Une tâche quotidienne par guild du journal (idempotent). Renvoie le nombre de nouvelles."""
+        added = 0
+        for gid, name, raw in self.journal.guilds():
+            if gid in self.tasks and not self.tasks[gid].done():
+                continue
+            hour, minute = _config_from_json(raw).daily_at
+            self.tasks[gid] = asyncio.create_task(
+                run_daily_at(functools.partial(self.run_report, gid), hour, minute, name=name)
+            )
+            log.info("[WORKER] %s : rapport quotidien à %02d:%02d.", name, hour, minute)
+            added += 1
+        return added
+
+    async def handle(self, req: dict) -> dict:
+        op = req.get("op")
+        if op == "ping":
+            return {"ok": True, "guilds": len(self.tasks), "reports": self.reports, "failures": self.failures}
+        if op == "refresh":
+            return {"ok": True, "added": self.schedule_all()}
+        if op == "report":
+            return await self.run_report(int(req["guild_id"]), test=bool(req.get("test")), manual=True)
+        if op == "metrics":
+            return {"ok": True, "text": REGISTRY.render_prometheus()}
+        return {"ok": False, "error": f"opération inconnue : {op}"}
+
+    async def close(self) -> None:
+        for task in self.tasks.values():
+            task.cancel()
+        for task in self.tasks.values():
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def main():
+    journal = MessageJournal(get_journal_path())
+    worker = ReportWorker(journal, processes=get_worker_processes())
+    host, port = get_worker_address()
+    server = await ipc.serve(worker.handle, host, port, token=get_worker_ipc_token())
+    worker.schedule_all()
+    log.info("[WORKER] En écoute sur %s:%d (%d guild(s)).", host, port, len(worker.tasks))
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+    try:
+        await stop.wait()
+    finally:
+        server.close()
+        await server.wait_closed()
+        await worker.close()
+        journal.close()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        log.info("[WORKER] Arrêt demandé (Ctrl+C) — fermeture propre.")
+    finally:
+        stop_logging()
@@ -0,0 +1,98 @@
+# tests/test_bench.py
+
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from bot.bench import (
+    BenchResult,
+    compare,
+    generate_messages_by_channel,
+    load_baselines,
+    main,
+    measure,
+    save_baselines,
+)
+from bot.summarizer import get_messages_last_24h, get_messages_last_72h
+
+NOW = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class TestGenerator(unittest.TestCase):
+    def test_same_seed_same_buffer(self):
+        a = generate_messages_by_channel(4, 30, seed=3, now=NOW)
+        b = generate_messages_by_channel(4, 30, seed=3, now=NOW)
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, generate_messages_by_channel(4, 30, seed=4, now=NOW))
+
+    def test_shape_and_realism(self):
+        buf = generate_messages_by_channel(8, 50, seed=0, now=NOW)
+        channels = {**buf["important"], **buf["general"]}
+        self.assertEqual(len(channels), 8)
+        self.assertEqual(len(buf["important"]), 2)
+        msgs = [m for lst in channels.values() for m in lst]
+        self.assertEqual(len(msgs), 400)
+        contents = [m["content"] for m in msgs]
+        self.assertTrue(any("https://" in c for c in contents))
+        self.assertLess(len(set(contents)), len(contents))  # doublons présents
+        for lst in channels.values():
+            stamps = [m["timestamp"] for m in lst]
+            self.assertEqual(stamps, sorted(stamps))
+            self.assertTrue(all((NOW - ts).total_seconds() <= 72 * 3600 for ts in stamps))
+
+            self.assertTrue(all(ts.tzinfo is not None for ts in stamps))  # comme msg.created_at
+
+    def test_window_filters_accept_aware_timestamps(self):
+        buf = generate_messages_by_channel(3, 60, seed=1)
+        msgs = [m for cat in buf.values() for lst in cat.values() for m in lst]
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=24)
+        expected = sum(m["timestamp"] >= cutoff + timedelta(seconds=5) for m in msgs)
+        last_24h = [m for cat in get_messages_last_24h(buf).values() for lst in cat.values() for m in lst]
+        self.assertGreaterEqual(len(last_24h), expected)
+        self.assertLess(len(last_24h), len(msgs))
+        # ancien format (UTC naïf) toujours accepté
+        old = dict(msgs[-1], timestamp=msgs[-1]["timestamp"].replace(tzinfo=None))
+        self.assertEqual(len(get_messages_last_72h({"important": {}, "general": {"x": [old]}})["general"]["x"]), 1)
+
+
+class TestBaselines(unittest.TestCase):
+    def _result(self, rel, peak=100.0, error=None):
+        return BenchResult("format_messages_for_email", 10.0, 0.1, 0.09, peak, rel, error)
+
+    def test_compare_flags_slower_and_bigger(self):
+        baselines = {"results": {"format_messages_for_email": {"rel": 2.0, "peak_kib": 100.0}}}
+        self.assertEqual(compare([self._result(2.5)], baselines, 0.5), [])
+        self.assertEqual(len(compare([self._result(3.5)], baselines, 0.5)), 1)
+        self.assertEqual(len(compare([self._result(2.0, peak=1000.0)], baselines, 0.5)), 1)
+        self.assertEqual(len(compare([self._result(0.0, error="boom")], baselines, 0.5)), 1)
+
+    def test_save_and_load_roundtrip(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "baselines.json")
+            save_baselines({"channels": 1}, [self._result(2.0), self._result(0.0, error="x")._replace(name="x")], path)
+            data = load_baselines(path)
+            self.assertEqual(data["params"], {"channels": 1})
+            self.assertEqual(list(data["results"]), ["format_messages_for_email"])
+
+    def test_measure_reports_errors_instead_of_raising(self):
+        res = measure("casse", lambda: 1 / 0, repeat=1)
+        self.assertIn("ZeroDivisionError", res.error)
+
+    def test_cli_fails_loudly_on_regression(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "baselines.json")
+            args = ["--channels", "2", "--messages", "10", "--repeat", "1",
+                    "--only", "get_last_n_messages", "--baseline", path]
+            self.assertEqual(main(args + ["--save-baseline"]), 0)
+            data = load_baselines(path)
+            data["results"]["get_last_n_messages"]["rel"] = 1e-9
+            data["results"]["get_last_n_messages"]["peak_kib"] = 0.0
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            self.assertEqual(main(args), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
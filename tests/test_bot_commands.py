@@ -25,7 +25,7 @@ class TestBotCommands(unittest.TestCase):
         command = bot.get_command("send_daily_summary")
         self.assertIsNotNone(command)
 
-        with patch("bot.discord_bot_commands.send_email", new=AsyncMock()) as mock_send, \
+        with patch("bot.mails_management.send_email", new=AsyncMock()) as mock_send, \
              patch("bot.discord_bot_commands.get_email_address", return_value="addr@example.com"), \
              patch("bot.discord_bot_commands.get_email_password", return_value="pwd"), \
              patch("bot.discord_bot_commands.get_recipient_email", return_value="dest@example.com"):
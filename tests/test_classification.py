@@ -0,0 +1,49 @@
+# tests/test_classification.py
+
+import unittest
+from types import SimpleNamespace
+
+from bot.classification import ChannelClassifier
+
+
+def _channel(cid, name):
+    return SimpleNamespace(id=cid, name=name)
+
+
+class TestChannelClassifier(unittest.TestCase):
+    def setUp(self):
+        self.guild = SimpleNamespace(text_channels=[_channel(1, "annonces"), _channel(2, "général"), _channel(3, "bot-storage")])
+        self.classifier = ChannelClassifier()
+        self.classifier.rebuild([self.guild], important=["annonces"], excluded=["bot-storage"])
+
+    def test_lookup_by_id(self):
+        self.assertEqual(self.classifier.lookup(_channel(1, "annonces")).category, "important")
+        self.assertEqual(self.classifier.lookup(_channel(2, "général")).category, "general")
+        self.assertTrue(self.classifier.lookup(_channel(3, "bot-storage")).excluded)
+        self.assertEqual(len(self.classifier), 3)
+
+    def test_unknown_channel_is_classified_and_cached(self):
+        cls = self.classifier.lookup(_channel(4, "nouveau"))
+        self.assertEqual((cls.category, cls.excluded), ("general", False))
+        self.assertEqual(len(self.classifier), 4)
+
+    def test_rename_and_delete(self):
+        cls = self.classifier.update_channel(_channel(2, "annonces"))
+        self.assertEqual(cls.category, "important")
+        self.classifier.remove_channel(2)
+        self.assertEqual(len(self.classifier), 2)
+
+    def test_thread_uses_parent_classification(self):
+        thread = SimpleNamespace(id=99, name="fil de discussion", parent_id=1, parent=None)
+        cls = self.classifier.lookup(thread)
+        self.assertEqual((cls.category, cls.name), ("important", "annonces"))
+        self.assertEqual(len(self.classifier), 3)  # les fils ne sont pas mémorisés
+
+    def test_rebuild_after_list_change(self):
+        self.classifier.rebuild([self.guild], important=[], excluded=["bot-storage", "général"])
+        self.assertTrue(self.classifier.lookup(_channel(2, "général")).excluded)
+        self.assertEqual(self.classifier.lookup(_channel(1, "annonces")).category, "general")
+
+
+if __name__ == "__main__":
+    unittest.main()
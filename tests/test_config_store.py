@@ -0,0 +1,108 @@
+# tests/test_config_store.py
+
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from bot import discord_bot_commands as cmds
+from bot.config_store import LocalConfigStore
+
+
+class TestLocalConfigStore(unittest.TestCase):
+    def test_save_and_reload(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = LocalConfigStore(tmp)
+            store.save("important", ["annonces", "agenda"], version=4)
+            store.save("keywords", ["urgent"], dirty=True)
+
+            reloaded = LocalConfigStore(tmp)
+            self.assertEqual(reloaded.load()["important"], ["annonces", "agenda"])
+            self.assertEqual(reloaded.load()["excluded"], [])
+            self.assertEqual(reloaded.state("important"), {"version": 4, "dirty": False})
+            self.assertEqual(reloaded.state("keywords"), {"version": 0, "dirty": True})
+
+    def test_tracked_txt_files_are_read_only_seeds(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            seed = os.path.join(tmp, "important_channels.txt")
+            with open(seed, "w", encoding="utf-8") as f:
+                f.write("annonces\n")
+            store = LocalConfigStore(tmp)
+            self.assertEqual(store.load()["important"], ["annonces"])
+
+            store.save("important", ["annonces", "bureau"], dirty=True,
+                       ops={"add": {"bureau"}, "remove": set()})
+            with open(seed, encoding="utf-8") as f:
+                self.assertEqual(f.read(), "annonces\n")
+            reloaded = LocalConfigStore(tmp)
+            self.assertEqual(reloaded.load()["important"], ["annonces", "bureau"])
+            self.assertEqual(reloaded.pending_ops("important"), {"add": {"bureau"}, "remove": set()})
+
+            reloaded.save("important", ["annonces", "bureau"], version=3)
+            self.assertIsNone(reloaded.pending_ops("important"))
+
+
+class TestLocalFirstStartup(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bot = MagicMock(spec=[])
+        self.bot.messages_by_channel = {"important": {}, "general": {}}
+        self.bot.local_config = LocalConfigStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_local_lists_available_without_network(self):
+        self.bot.local_config.save("important", ["annonces"], version=2)
+        self.bot.local_config.save("excluded", ["bot-storage"], version=2)
+        cmds.apply_local_config(self.bot)
+        self.assertEqual(self.bot.important_channels, ["annonces"])
+        self.assertEqual(self.bot.excluded_channels, ["bot-storage"])
+        self.assertEqual(self.bot.keywords, [])
+
+    async def test_reconcile_pushes_dirty_local_changes(self):
+        self.bot.local_config.save("important", ["annonces", "bureau"], version=2, dirty=True)
+        self.bot.local_config.save("excluded", ["old"], version=1)
+        self.bot._store = {"channel": MagicMock()}
+        for key, data, version in (("important", ["annonces"], 2), ("excluded", ["bot-storage"], 3), ("keywords", [], 1)):
+            self.bot._store[key] = {"message": MagicMock(), "payload": {"version": version, "data": data}, "tag": cmds.STORE_TAGS[key]}
+
+        with patch.object(cmds.StoreWriter, "_schedule"):
+            cmds._reconcile_with_local(self.bot)
+            writer = self.bot.store_writer
+            self.assertEqual(writer.pending_ops("important"), {"add": {"bureau"}, "remove": set()})
+            self.assertIsNone(writer.pending_ops("excluded"))
+
+        # Discord fait foi pour les listes propres → copie locale mise à jour
+        self.assertEqual(self.bot.local_config.load()["excluded"], ["bot-storage"])
+        self.assertEqual(self.bot.local_config.state("excluded"), {"version": 3, "dirty": False})
+        self.assertEqual(self.bot.important_channels, ["annonces", "bureau"])
+
+    async def test_reconcile_merges_per_item_with_remote_changes(self):
+        self.bot.local_config.save("important", ["annonces", "bureau", "old"], version=2)
+        self.bot._store = {"channel": MagicMock()}
+        for key, data, version in (("important", ["annonces", "bureau", "old"], 2),
+                                   ("excluded", [], 1), ("keywords", [], 1)):
+            self.bot._store[key] = {"message": MagicMock(), "payload": {"version": version, "data": data}, "tag": cmds.STORE_TAGS[key]}
+
+        with patch.object(cmds.StoreWriter, "_schedule"):
+            cmds.apply_local_config(self.bot)
+            # hors ligne : on ajoute "agenda" et retire "old"
+            writer = cmds.get_store_writer(self.bot)
+            writer.queue("important", add=["agenda"], remove=["old"])
+        self.assertEqual(self.bot.local_config.pending_ops("important"),
+                         {"add": {"agenda"}, "remove": {"old"}})
+
+        # redémarrage : un autre admin a entre-temps ajouté "rh" et retiré "bureau"
+        self.bot.local_config = LocalConfigStore(self.tmp.name)
+        del self.bot.store_writer
+        self.bot._store["important"]["payload"] = {"version": 3, "data": ["annonces", "old", "rh"]}
+        with patch.object(cmds.StoreWriter, "_schedule"):
+            cmds._reconcile_with_local(self.bot)
+            self.assertEqual(self.bot.store_writer.pending_ops("important"),
+                             {"add": {"agenda"}, "remove": {"old"}})
+        self.assertEqual(self.bot.important_channels, ["agenda", "annonces", "rh"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,7 +15,7 @@ class TestEmailCog(unittest.IsolatedAsyncioTestCase):
         ctx = MagicMock()
         ctx.send = AsyncMock()
 
-        with patch("bot.discord_bot_commands.send_email", new=AsyncMock()) as mock_send, \
+        with patch("bot.mails_management.send_email", new=AsyncMock()) as mock_send, \
              patch("bot.discord_bot_commands.logger") as mock_logger:
             await cog.test_send_daily_summary_cmd.callback(cog, ctx)
 
@@ -30,8 +30,8 @@ class TestEmailCog(unittest.IsolatedAsyncioTestCase):
         ctx = MagicMock()
         ctx.send = AsyncMock()
 
-        with patch("bot.discord_bot_commands.send_email", new=AsyncMock(side_effect=TimeoutError)), \
-             patch("bot.discord_bot_commands.save_messages_to_file") as mock_save, \
+        with patch("bot.mails_management.send_email", new=AsyncMock(side_effect=TimeoutError)), \
+             patch("bot.file_utils.save_messages_to_file") as mock_save, \
              patch("bot.discord_bot_commands.logger") as mock_logger:
             # Simule une configuration valide
             with patch("bot.discord_bot_commands.get_email_address", return_value="addr@example.com"), \
@@ -51,9 +51,9 @@ class TestEmailCog(unittest.IsolatedAsyncioTestCase):
         ctx.send = AsyncMock()
 
         with patch(
-            "bot.discord_bot_commands.send_email",
+            "bot.mails_management.send_email",
             new=AsyncMock(side_effect=smtplib.SMTPException("smtp error")),
-        ), patch("bot.discord_bot_commands.save_messages_to_file") as mock_save, patch(
+        ), patch("bot.file_utils.save_messages_to_file") as mock_save, patch(
             "bot.discord_bot_commands.logger"
         ) as mock_logger, patch(
             "bot.discord_bot_commands.get_email_address", return_value="addr@example.com"
@@ -77,9 +77,9 @@ class TestEmailCog(unittest.IsolatedAsyncioTestCase):
         ctx.send = AsyncMock()
 
         with patch(
-            "bot.discord_bot_commands.send_email",
+            "bot.mails_management.send_email",
             new=AsyncMock(side_effect=RuntimeError("boom")),
-        ), patch("bot.discord_bot_commands.save_messages_to_file") as mock_save, patch(
+        ), patch("bot.file_utils.save_messages_to_file") as mock_save, patch(
             "bot.discord_bot_commands.logger"
         ) as mock_logger, patch(
             "bot.discord_bot_commands.get_email_address", return_value="addr@example.com"
@@ -103,9 +103,9 @@ class TestEmailCog(unittest.IsolatedAsyncioTestCase):
         ctx.send = AsyncMock()
 
         with patch(
-            "bot.discord_bot_commands.send_email",
+            "bot.mails_management.send_email",
             new=AsyncMock(side_effect=OSError("network unreachable")),
-        ), patch("bot.discord_bot_commands.save_messages_to_file") as mock_save, patch(
+        ), patch("bot.file_utils.save_messages_to_file") as mock_save, patch(
             "bot.discord_bot_commands.logger"
         ) as mock_logger, patch(
             "bot.discord_bot_commands.get_email_address", return_value="addr@example.com"
@@ -0,0 +1,53 @@
+# tests/test_extractive_summarizer.py
+
+import unittest
+from unittest.mock import patch
+
+from bot.extractive_summarizer import summarize_channels_batch
+from bot.summarizer import naive_summarize
+
+
+class TestExtractiveSummarizer(unittest.TestCase):
+    def setUp(self):
+        self.blobs = {
+            "logistique": (
+                "Anne: Bonjour à toutes. "
+                "Bea: La réunion budget aura lieu jeudi. "
+                "Chloe: Il fait beau. "
+                "Anne: Le budget de la réunion doit être validé jeudi. "
+                "Bea: Je confirme la réunion budget jeudi"
+            ),
+            "court": "Anne: Une seule phrase ici",
+        }
+
+    def test_picks_representative_sentences(self):
+        out = summarize_channels_batch(self.blobs, max_sentences=2, max_length=400)
+        self.assertIn("budget", out["logistique"])
+        self.assertNotIn("Il fait beau", out["logistique"])
+        self.assertIn("(résumé...)", out["logistique"])
+
+    def test_short_channel_matches_naive(self):
+        out = summarize_channels_batch(self.blobs, max_sentences=3, max_length=400)
+        self.assertEqual(out["court"], naive_summarize(self.blobs["court"], max_sentences=3, max_length=400))
+
+    def test_channel_summary_does_not_depend_on_batch(self):
+        autre = ("Dan: Le budget est validé. Dan: Le budget est voté. Dan: Le budget est clos. "
+                 "Dan: Le budget est publié. Dan: Bonjour à toutes")
+        alone = summarize_channels_batch({"logistique": self.blobs["logistique"]}, max_sentences=2, max_length=400)
+        batched = summarize_channels_batch({**self.blobs, "autre": autre}, max_sentences=2, max_length=400)
+        self.assertEqual(alone["logistique"], batched["logistique"])
+        self.assertFalse(batched.fallback)
+
+    def test_budget_exceeded_falls_back_to_naive(self):
+        out = summarize_channels_batch(self.blobs, max_sentences=2, max_length=400, budget_s=0)
+        self.assertEqual(out["logistique"], naive_summarize(self.blobs["logistique"], max_sentences=2, max_length=400))
+        self.assertTrue(out.fallback)
+
+    def test_without_numpy_falls_back_to_naive(self):
+        with patch("bot.extractive_summarizer.np", None):
+            out = summarize_channels_batch(self.blobs, max_sentences=2, max_length=400)
+        self.assertIn("Bonjour à toutes", out["logistique"])
+
+
+if __name__ == "__main__":
+    unittest.main()
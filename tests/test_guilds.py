@@ -0,0 +1,107 @@
+# tests/test_guilds.py
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from bot.classification import rebuild_classification
+from bot.guilds import (
+    GuildConfig,
+    GuildContext,
+    GuildRegistry,
+    guild_config_for,
+    guild_recipients,
+    guild_state,
+    guild_states,
+)
+from bot.ingestion import IngestionPipeline, IngestRecord
+
+STORAGE_ID = 999
+
+
+def _guild(gid, *channels):
+    chans = [SimpleNamespace(id=cid, name=name) for cid, name in channels]
+    by_id = {c.id: c for c in chans}
+    return SimpleNamespace(id=gid, name=f"g{gid}", text_channels=chans, forums=[], get_channel=by_id.get)
+
+
+class TestGuildConfig(unittest.TestCase):
+    def test_legacy_guild_keeps_historical_layout(self):
+        legacy = _guild(1, (STORAGE_ID, "bot-storage"))
+        cfg = guild_config_for(legacy, {}, STORAGE_ID)
+        self.assertTrue(cfg.legacy)
+        self.assertEqual((cfg.data_dir, cfg.reports_dir, cfg.storage_channel_id), ("data", "rapports", STORAGE_ID))
+
+    def test_partner_guild_gets_its_own_dirs_and_settings(self):
+        partner = _guild(2, (20, "général"))
+        raw = {2: {"recipients": ["asbl@example.org"], "daily_at": "06:30"}}
+        cfg = guild_config_for(partner, raw, STORAGE_ID)
+        self.assertFalse(cfg.legacy)
+        self.assertEqual(cfg.data_dir, os.path.join("data", "guilds", "2"))
+        self.assertEqual(cfg.reports_dir, os.path.join("rapports", "2"))
+        self.assertIsNone(cfg.storage_channel_id)
+        self.assertEqual(cfg.daily_at, (6, 30))
+        self.assertEqual(cfg.recipients, ("asbl@example.org",))
+
+    def test_recipients(self):
+        env = lambda: "coalition@example.org"  # noqa: E731
+        legacy = SimpleNamespace(guild_config=GuildConfig("data", legacy=True))
+        partner = SimpleNamespace(guild_config=GuildConfig("d", recipients=("a@b.org",)))
+        silent = SimpleNamespace(guild_config=GuildConfig("d"))
+        self.assertEqual(guild_recipients(legacy, env), ["coalition@example.org"])
+        self.assertEqual(guild_recipients(partner, env), ["a@b.org"])
+        self.assertEqual(guild_recipients(silent, env), [])
+        self.assertEqual(guild_recipients(SimpleNamespace(), env), ["coalition@example.org"])
+        # RECIPIENT_EMAIL absent : pas de [None]
+        self.assertEqual(guild_recipients(legacy, lambda: None), [])
+        self.assertEqual(guild_recipients(SimpleNamespace(), lambda: ""), [])
+
+
+class TestGuildContexts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.g1 = _guild(1, (10, "annonces"), (STORAGE_ID, "bot-storage"))
+        self.g2 = _guild(2, (20, "annonces"))
+        guilds = {1: self.g1, 2: self.g2}
+        self.bot = SimpleNamespace(get_guild=guilds.get, user=SimpleNamespace(id=42))
+        raw = {1: {"data_dir": self.tmp.name}, 2: {"data_dir": self.tmp.name + "/2"}}
+        self.bot.guild_contexts = GuildRegistry(self.bot, raw, STORAGE_ID)
+        self.s1, _ = self.bot.guild_contexts.ensure(self.g1)
+        self.s2, created = self.bot.guild_contexts.ensure(self.g2)
+        self.assertTrue(created)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_state_is_per_guild_and_rest_is_delegated(self):
+        self.s1.important_channels = ["annonces"]
+        self.assertEqual(self.s2.important_channels, [])
+        self.assertFalse(hasattr(self.bot, "important_channels"))
+        self.assertEqual(self.s1.user.id, 42)              # délégué au bot
+        self.assertIsNone(getattr(self.s1, "_store", None))  # état de guild absent ≠ attribut du bot
+        self.assertEqual(self.s1.guilds, [self.g1])
+
+    def test_lookup_helpers(self):
+        self.assertIs(guild_state(self.bot, self.g2), self.s2)
+        self.assertIs(guild_state(self.bot, 2), self.s2)
+        self.assertIs(guild_state(self.bot, None), self.s1)  # MP → guild historique
+        self.assertEqual(len(guild_states(self.bot)), 2)
+        plain = SimpleNamespace()
+        self.assertIs(guild_state(plain, self.g1), plain)
+
+    def test_ingestion_and_classification_stay_separate(self):
+        self.s1.important_channels = ["annonces"]
+        for state in (self.s1, self.s2):
+            rebuild_classification(state)
+        ts = datetime(2025, 9, 22, tzinfo=timezone.utc)
+        for state, chan in ((self.s1, self.g1.text_channels[0]), (self.s2, self.g2.text_channels[0])):
+            IngestionPipeline(state).apply_batch([IngestRecord(chan.id, chan, "Anne", f"msg {chan.id}", ts, 0.0)])
+        self.assertEqual(self.s1.messages_by_channel["important"]["annonces"][0]["content"], "msg 10")
+        self.assertEqual(self.s2.messages_by_channel["general"]["annonces"][0]["content"], "msg 20")
+        self.assertEqual(len(self.s1.message_index), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
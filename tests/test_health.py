@@ -0,0 +1,74 @@
+# tests/test_health.py
+
+import time
+import unittest
+from types import SimpleNamespace
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from bot.health import build_app, process_memory, readiness, telemetry
+from bot.metrics import DAILY_NEXT_RUN
+
+
+def _bot(ready=True, closed=False):
+    return SimpleNamespace(
+        latency=0.0421,
+        last_message_at=time.time() - 5,
+        messages_by_channel={"important": {"annonces": [{}, {}]}, "general": {"general": [{}]}},
+        is_ready=lambda: ready,
+        is_closed=lambda: closed,
+    )
+
+
+class TestTelemetry(unittest.TestCase):
+    def test_telemetry_fields(self):
+        DAILY_NEXT_RUN.set(time.time() + 3600, job="test-health")
+        data = telemetry(_bot())
+        self.assertEqual(data["gateway_latency_ms"], 42.1)
+        self.assertAlmostEqual(data["seconds_since_last_message"], 5, delta=1)
+        self.assertEqual(data["buffer"], {"important": 2, "general": 1})
+        self.assertIn("test-health", data["daily"]["next_runs"])
+        self.assertIn("rss_bytes", data["memory"])
+
+    def test_latency_before_first_heartbeat(self):
+        bot = _bot()
+        bot.latency = float("nan")
+        self.assertIsNone(telemetry(bot)["gateway_latency_ms"])
+
+    def test_memory_is_reported_on_linux(self):
+        mem = process_memory()
+        if mem["rss_bytes"] is not None:
+            self.assertGreater(mem["rss_bytes"], 1024 * 1024)
+
+    def test_readiness(self):
+        self.assertEqual(readiness(_bot()), [])
+        self.assertEqual(len(readiness(_bot(ready=False))), 1)
+
+
+class TestEndpoints(unittest.IsolatedAsyncioTestCase):
+    async def _client(self, bot):
+        client = TestClient(TestServer(build_app(bot)))
+        await client.start_server()
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_healthz_readyz_metrics(self):
+        client = await self._client(_bot(ready=False))
+        resp = await client.get("/healthz")
+        self.assertEqual(resp.status, 200)
+        self.assertEqual((await resp.json())["status"], "ok")
+        resp = await client.get("/readyz")
+        self.assertEqual(resp.status, 503)
+        self.assertFalse((await resp.json())["ready"])
+        resp = await client.get("/metrics")
+        self.assertEqual(resp.status, 200)
+        self.assertIn("text/plain", resp.headers["Content-Type"])
+        self.assertIn("bot_uptime_seconds", await resp.text())
+
+    async def test_closed_client_is_unhealthy(self):
+        client = await self._client(_bot(closed=True))
+        self.assertEqual((await client.get("/healthz")).status, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+# tests/test_ingestion.py
+
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from bot.classification import ChannelClassifier
+from bot.ingestion import IngestionPipeline, looks_like_command
+from bot.keywords import KeywordMatcher
+
+TS = datetime(2025, 9, 22, 8, tzinfo=timezone.utc)
+
+
+def _bot():
+    bot = SimpleNamespace(
+        messages_by_channel={"important": {}, "general": {}},
+        channel_classifier=ChannelClassifier(important=["annonces"], excluded=["bot-storage"]),
+        keyword_matcher=KeywordMatcher(["urgent"]),
+        command_prefix="!",
+    )
+    bot.get_channel = lambda _cid: None
+    return bot
+
+
+def _message(i, channel_name="général", content="bonjour à toutes"):
+    return SimpleNamespace(
+        id=i,
+        channel=SimpleNamespace(id=hash(channel_name), name=channel_name),
+        author=SimpleNamespace(name="anne"),
+        content=content,
+        created_at=TS,
+    )
+
+
+class TestIngestionPipeline(unittest.IsolatedAsyncioTestCase):
+    async def test_consumer_applies_batches(self):
+        bot = _bot()
+        pipeline = IngestionPipeline(bot, batch_size=50)
+        for i in range(120):
+            pipeline.submit(_message(i))
+        pipeline.submit(_message(200, "annonces", "C'est urgent"))
+        pipeline.submit(_message(201, "bot-storage"))
+        pipeline.start()
+        await asyncio.wait_for(pipeline.queue.join(), timeout=2)
+        await pipeline.stop()
+
+        self.assertEqual(len(bot.messages_by_channel["general"]["général"]), 120)
+        entry = bot.messages_by_channel["important"]["annonces"][0]
+        self.assertEqual(entry["timestamp"], TS)  # created_at, pas l'heure de réception
+        self.assertEqual(entry["keywords"], ["urgent"])
+        self.assertNotIn("bot-storage", bot.messages_by_channel["general"])
+        st = pipeline.stats()
+        self.assertEqual(st["processed"], 122)
+        self.assertLessEqual(st["max_batch"], 50)
+        self.assertEqual(st["high_water"], 122)
+
+    async def test_malformed_message_does_not_drop_the_batch(self):
+        bot = _bot()
+        pipeline = IngestionPipeline(bot, batch_size=50)
+        pipeline.submit(_message(1))
+        pipeline.submit(_message(2, content=12345))   # contenu non textuel
+        pipeline.submit(_message(3))
+        with self.assertLogs("bot.ingestion", level="WARNING"):
+            pipeline.start()
+            await asyncio.wait_for(pipeline.queue.join(), timeout=2)
+            await pipeline.stop()
+
+        self.assertEqual([e["id"] for e in bot.messages_by_channel["general"]["général"]], [1, 3])
+        st = pipeline.stats()
+        self.assertEqual((st["processed"], st["errors"], st["batches"]), (3, 1, 1))
+
+    async def test_drop_policies(self):
+        drop_new = IngestionPipeline(_bot(), maxsize=2, policy="drop_new")
+        drop_old = IngestionPipeline(_bot(), maxsize=2, policy="drop_oldest")
+        for i in range(3):
+            drop_new.submit(_message(i))
+            drop_old.submit(_message(i))
+        self.assertEqual(drop_new.stats()["dropped"], 1)
+        self.assertEqual([r.message_id for r in drop_new.queue._queue], [0, 1])
+        self.assertEqual([r.message_id for r in drop_old.queue._queue], [1, 2])
+
+    async def test_spill_policy_reinjects_from_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            bot = _bot()
+            pipeline = IngestionPipeline(bot, maxsize=2, policy="spill", spill_path=os.path.join(tmp, "spill.jsonl"))
+            for i in range(5):
+                pipeline.submit(_message(i))
+            self.assertEqual(pipeline.stats()["spilled"], 3)
+            pipeline.start()
+            for _ in range(50):
+                await asyncio.sleep(0)
+            await pipeline.stop()
+            self.assertEqual(len(bot.messages_by_channel["general"]["général"]), 5)
+            self.assertFalse(os.path.exists(pipeline.spill_path))
+
+    async def test_corrupt_spill_line_is_skipped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            bot = _bot()
+            pipeline = IngestionPipeline(bot, maxsize=2, policy="spill", spill_path=os.path.join(tmp, "spill.jsonl"))
+            for i in range(4):
+                pipeline.submit(_message(i))
+            with open(pipeline.spill_path, "a", encoding="utf-8") as f:
+                f.write('{"message_id": 9, "channel_id": 1, "chan')   # arrêt brutal pendant _spill
+            with self.assertLogs("bot.ingestion", level="WARNING"):
+                pipeline.start()
+                for _ in range(50):
+                    await asyncio.sleep(0)
+            self.assertFalse(pipeline._task.done())               # le consommateur tourne toujours
+            await pipeline.stop()
+            self.assertEqual([e["id"] for e in bot.messages_by_channel["general"]["général"]], [0, 1, 2, 3])
+            self.assertEqual(pipeline.stats()["errors"], 1)
+            self.assertFalse(os.path.exists(pipeline.spill_path))
+
+    def test_looks_like_command(self):
+        bot = _bot()
+        self.assertTrue(looks_like_command(bot, _message(1, content="!ping")))
+        self.assertFalse(looks_like_command(bot, _message(1, content="salut")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+# tests/test_journal.py
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+from bot import ipc
+from bot.guilds import GuildConfig
+from bot.ingestion import make_buffer_entry
+from bot.journal import MessageJournal
+from bot.worker import ReportWorker
+
+NOW = datetime(2025, 9, 22, 7, 0, tzinfo=timezone.utc)
+
+
+def _entry(mid, content, hours_ago=1):
+    return make_buffer_entry("Anne", content, NOW - timedelta(hours=hours_ago), None, mid)
+
+
+class TestMessageJournal(unittest.TestCase):
+    def setUp(self):
+        self.journal = MessageJournal(":memory:")
+
+    def test_roundtrip_and_dedup(self):
+        e = _entry(1, "Réunion du comité jeudi à 18h, ordre du jour en pièce jointe")
+        e["thread"] = "comité"
+        self.journal.append(7, [("important", "annonces", e)])
+        self.journal.append(7, [("important", "annonces", e)])  # rejoué par le backfill
+        buf = self.journal.load_buffer(7)
+        [got] = buf["important"]["annonces"]
+        self.assertEqual((got["id"], got["content"], got["thread"]), (1, e["content"], "comité"))
+        self.assertEqual(got["fingerprint"], e["fingerprint"])
+        self.assertEqual(got["timestamp"], e["timestamp"])
+        self.assertEqual(self.journal.load_buffer(8), {"important": {}, "general": {}})
+
+    def test_edit_delete_rename_and_window(self):
+        self.journal.append(7, [
+            ("general", "général", _entry(1, "ancien message", hours_ago=30)),
+            ("general", "général", _entry(2, "message à corriger")),
+            ("general", "général", _entry(3, "message supprimé")),
+        ])
+        edited = _entry(2, "message corrigé")
+        self.journal.apply_edit(2, edited)
+        self.journal.apply_delete(3)
+        self.journal.rename_channel(7, "général", "discussions")
+        buf = self.journal.load_buffer(7, since=NOW - timedelta(hours=24))
+        [m] = buf["general"]["discussions"]
+        self.assertEqual(m["content"], "message corrigé")
+        self.assertTrue(m["edited"])
+        self.assertEqual(self.journal.prune(NOW - timedelta(hours=24)), 1)
+
+    def test_writer_thread_retries_while_the_worker_holds_the_lock(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "journal.sqlite3")
+            journal = MessageJournal(path)
+            journal.start_writer()
+            other = sqlite3.connect(path)
+            other.execute("BEGIN IMMEDIATE")     # le worker écrit (prune, mark_report)
+            try:
+                journal.append(7, [("general", "général", _entry(1, "message live"))])
+                journal.apply_edit(1, _entry(1, "message corrigé"))
+                time.sleep(0.4)
+                self.assertEqual(journal.load_buffer(7), {"important": {}, "general": {}})
+            finally:
+                other.rollback()
+                other.close()
+            journal.flush()
+            [m] = journal.load_buffer(7)["general"]["général"]
+            self.assertEqual((m["content"], journal.pending_writes()), ("message corrigé", 0))
+            self.assertGreaterEqual(journal.write_retries, 1)
+            self.assertEqual(journal.write_errors, 0)
+            journal.close()
+
+
+class TestReportWorker(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal = MessageJournal(os.path.join(self.tmp.name, "journal.sqlite3"))
+        cfg = GuildConfig(self.tmp.name, reports_dir=self.tmp.name, recipients=("asbl@example.org", "ca@example.org"))
+        self.journal.set_guild(7, "Partenaire", cfg._asdict())
+        self.journal.append(7, [("important", "annonces", _entry(1, "Assemblée générale samedi"))])
+        self.worker = ReportWorker(self.journal, clock=lambda: NOW)
+
+    async def asyncTearDown(self):
+        await self.worker.close()
+        self.journal.close()
+        self.tmp.cleanup()
+
+    async def test_report_is_rendered_sent_and_marked(self):
+        with patch("bot.worker.send_email", new=AsyncMock()) as send, \
+             patch("bot.worker.get_email_address", return_value="bot@example.org"), \
+             patch("bot.worker.get_email_password", return_value="pwd"):
+            resp = await self.worker.run_report(7)
+        self.assertTrue(resp["ok"])
+        self.assertEqual(resp["sent_to"], "asbl@example.org, ca@example.org")
+        body, _, _, to_addr = send.await_args.args
+        self.assertIn("Assemblée générale samedi", body)
+        self.assertEqual(to_addr, ["asbl@example.org", "ca@example.org"])
+        self.assertEqual(self.journal.last_report(7), NOW)
+        self.assertEqual(len([f for f in os.listdir(self.tmp.name) if f.startswith("rapport_")]), 1)
+
+    async def test_manual_report_keeps_the_scheduled_window(self):
+        earlier = NOW - timedelta(hours=3)
+        self.journal.mark_report(7, earlier)
+        self.journal.append(7, [("general", "général", _entry(2, "Message d'hier soir", hours_ago=20))])
+        with patch("bot.worker.send_email", new=AsyncMock()) as send, \
+             patch("bot.worker.get_email_address", return_value="bot@example.org"), \
+             patch("bot.worker.get_email_password", return_value="pwd"):
+            resp = await self.worker.handle({"op": "report", "guild_id": 7})
+        self.assertTrue(resp["ok"])
+        body = send.await_args.args[0]
+        self.assertIn("Message d'hier soir", body)          # fenêtre de 24h, pas depuis `earlier`
+        self.assertEqual(self.journal.last_report(7), earlier)
+        self.assertEqual(len(self.journal.load_buffer(7)["general"]["général"]), 1)
+
+    async def test_ipc_roundtrip(self):
+        server = await ipc.serve(self.worker.handle, "127.0.0.1", 0, token="s3cret")
+        port = server.sockets[0].getsockname()[1]
+        try:
+            self.assertEqual((await ipc.request({"op": "refresh"}, port=port, token="s3cret"))["added"], 1)
+            self.assertEqual((await ipc.request({"op": "ping"}, port=port, token="s3cret"))["guilds"], 1)
+            self.assertFalse((await ipc.request({"op": "ping"}, port=port, token="faux"))["ok"])
+        finally:
+            server.close()
+            await server.wait_closed()
+
+
+class TestIpcTimeouts(unittest.IsolatedAsyncioTestCase):
+    def test_report_waits_longer_than_smtp(self):
+        from bot.mails_management import DEFAULT_SMTP_TIMEOUT
+        self.assertEqual(ipc.op_timeout({"op": "ping"}), ipc.DEFAULT_TIMEOUT_S)
+        self.assertGreater(ipc.op_timeout({"op": "report"}), 3 * DEFAULT_SMTP_TIMEOUT)
+
+    async def test_slow_reply_is_pending_not_unreachable(self):
+        async def slow(req):
+            await asyncio.sleep(0.5)
+            return {"ok": True}
+
+        server = await ipc.serve(slow, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            with patch.dict(ipc.OP_TIMEOUTS, {"report": 0.05}), \
+                 patch("bot.ipc.get_worker_address", return_value=("127.0.0.1", port)), \
+                 patch("bot.ipc.get_worker_ipc_token", return_value=None):
+                resp = await ipc.notify_worker({"op": "report", "guild_id": 7})
+                self.assertTrue(resp["pending"])
+                self.assertFalse(resp["ok"])
+                self.assertTrue((await ipc.notify_worker({"op": "ping"}))["ok"])
+        finally:
+            server.close()
+            await server.wait_closed()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+# tests/test_keywords.py
+
+import unittest
+from datetime import datetime, timezone
+
+from bot.keywords import KeywordMatcher, rescan_buffer
+from bot.mails_management import format_messages_for_email
+
+
+class TestKeywordMatcher(unittest.TestCase):
+    def setUp(self):
+        self.matcher = KeywordMatcher(["urgent", "réunion", "deadline", "Anne", "he", "she", "hers"])
+
+    def test_case_and_accent_insensitive(self):
+        self.assertEqual(self.matcher.scan("URGENT : Reunion demain"), {"urgent", "réunion"})
+
+    def test_whole_words_only(self):
+        self.assertEqual(self.matcher.scan("Bonne année à toutes"), set())
+        self.assertEqual(self.matcher.scan("Merci Anne !"), {"Anne"})
+
+    def test_overlapping_patterns(self):
+        # cas classique Aho-Corasick : les sorties héritées via les liens d'échec
+        self.assertEqual(self.matcher.scan("ushers"), set())
+        self.assertEqual(self.matcher.scan("she said hers"), {"she", "hers"})
+
+    def test_stats_record_cost(self):
+        self.matcher.scan("deadline vendredi")
+        self.matcher.scan("rien ici")
+        st = self.matcher.stats()
+        self.assertEqual((st["scanned"], st["matched"]), (2, 1))
+        self.assertGreaterEqual(st["avg_us_per_message"], 0.0)
+
+    def test_empty_matcher(self):
+        self.assertFalse(KeywordMatcher())
+        self.assertEqual(KeywordMatcher().scan("urgent"), set())
+
+
+class TestKeywordPromotion(unittest.TestCase):
+    def test_general_message_promoted_to_important(self):
+        ts = datetime(2025, 9, 22, 8, tzinfo=timezone.utc)
+        messages = {
+            "important": {},
+            "general": {"random": [
+                {"author": "Anne", "content": "C'est urgent, il faut signer le document", "timestamp": ts},
+                {"author": "Bea", "content": "Bonne journée à toutes", "timestamp": ts},
+            ]},
+        }
+        rescan_buffer(messages, KeywordMatcher(["urgent"]))
+        body = format_messages_for_email(messages)
+        important = body.split("__Canaux importants__", 1)[1].split("__Autres canaux__", 1)[0]
+        self.assertIn("il faut signer le document 🔔 [urgent]", important)
+        self.assertNotIn("Bonne journée", important)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# tests/test_loadtest.py
+
+import asyncio
+import unittest
+
+from bot import core
+from bot.loadtest import arrival_times, check_gates, percentile, run_load
+
+
+class TestArrivals(unittest.TestCase):
+    def test_patterns_keep_the_average_rate(self):
+        steady = arrival_times(100, 50.0, "steady")
+        burst = arrival_times(100, 50.0, "burst", burst_size=25)
+        poisson = arrival_times(1000, 50.0, "poisson", seed=1)
+        self.assertAlmostEqual(steady[-1], 99 / 50)
+        self.assertEqual(len(set(burst)), 4)  # 4 rafales de 25
+        self.assertEqual(burst[25], 0.5)
+        self.assertAlmostEqual(poisson[-1] / 1000, 1 / 50, delta=0.005)
+        self.assertEqual(poisson, arrival_times(1000, 50.0, "poisson", seed=1))
+        with self.assertRaises(ValueError):
+            arrival_times(10, 1.0, "vague")
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(values, 0.5), 51.0)
+        self.assertEqual(percentile(values, 0.99), 100.0)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+
+class TestRunLoad(unittest.TestCase):
+    def test_messages_and_commands_go_through_on_message(self):
+        previous = core.bot
+        report = asyncio.run(run_load(n_messages=300, rate=100_000, pattern="burst", command_ratio=0.05, seed=2))
+        self.assertIs(core.bot, previous)  # bot du module restauré
+        self.assertEqual(report["buffered"], 300)
+        self.assertEqual(report["ingestion"]["dropped"], 0)
+        self.assertGreater(report["commands"], 0)
+        self.assertEqual(report["command_errors"], 0)
+        self.assertGreaterEqual(report["replies"], report["commands"])
+        self.assertGreater(report["buffer_bytes"]["after"], report["buffer_bytes"]["before"])
+        self.assertGreater(report["latency_ms"]["max"], 0.0)
+
+    def test_gates(self):
+        report = {
+            "latency_ms": {"p99": 12.0},
+            "loop_lag_ms": {"max": 3.0},
+            "throughput_msg_s": 900.0,
+            "ingestion": {"dropped": 2},
+        }
+        self.assertEqual(check_gates(report), [])
+        self.assertEqual(check_gates(report, max_p99_ms=20, max_loop_lag_ms=5, min_throughput=500, max_dropped=2), [])
+        problems = check_gates(report, max_p99_ms=10, max_loop_lag_ms=1, min_throughput=1000, max_dropped=0)
+        self.assertEqual(len(problems), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
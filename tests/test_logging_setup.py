@@ -0,0 +1,96 @@
+# tests/test_logging_setup.py
+
+import io
+import json
+import logging
+import sys
+import unittest
+
+from bot.logging_setup import (
+    JsonFormatter,
+    RateLimitFilter,
+    SamplingFilter,
+    parse_sampling,
+    setup_logging,
+    stop_logging,
+)
+
+
+def _record(name="bot.core", level=logging.INFO, msg="message %s", args=("x",), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestFilters(unittest.TestCase):
+    def test_sampling_keeps_a_fraction_below_warning(self):
+        f = SamplingFilter({"bot.ingestion": 0.1, "bot": 1.0})
+        kept = sum(f.filter(_record("bot.ingestion", logging.DEBUG)) for _ in range(100))
+        self.assertEqual(kept, 10)
+        self.assertTrue(all(f.filter(_record("bot.ingestion", logging.WARNING)) for _ in range(5)))
+        self.assertTrue(all(f.filter(_record("bot.core")) for _ in range(5)))       # préfixe "bot" : 100 %
+        self.assertTrue(all(f.filter(_record("discord.client")) for _ in range(5)))  # non configuré
+
+    def test_rate_limit_repeated_warnings(self):
+        now = [0.0]
+        f = RateLimitFilter(interval=60, clock=lambda: now[0])
+        forbidden = dict(name="bot.core", level=logging.WARNING, msg="Pas de permission pour lire #%s")
+        self.assertTrue(f.filter(_record(args=("annonces",), **forbidden)))
+        self.assertFalse(f.filter(_record(args=("annonces",), **forbidden)))
+        self.assertFalse(f.filter(_record(args=("annonces",), **forbidden)))
+        self.assertTrue(f.filter(_record(args=("général",), **forbidden)))   # autre canal
+        self.assertTrue(f.filter(_record(level=logging.INFO)))               # INFO jamais limité
+        now[0] = 61
+        record = _record(args=("annonces",), **forbidden)
+        self.assertTrue(f.filter(record))
+        self.assertIn("2 répétition(s) ignorée(s)", record.getMessage())
+        self.assertEqual(record.suppressed, 2)
+
+    def test_parse_sampling(self):
+        self.assertEqual(parse_sampling("bot.ingestion=0.1, discord.gateway=2,bad,x=y"),
+                         {"bot.ingestion": 0.1, "discord.gateway": 1.0})
+
+
+class TestJsonPipeline(unittest.TestCase):
+    def setUp(self):
+        root = logging.getLogger()
+        saved = (list(root.handlers), root.level)
+
+        def restore():
+            stop_logging()
+            root.handlers[:] = saved[0]
+            root.setLevel(saved[1])
+        self.addCleanup(restore)
+
+    def test_formatter_fields_and_exception(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord("bot.core", logging.ERROR, __file__, 1, "échec %d", (3,), None)
+            record.exc_info = sys.exc_info()
+        record.channel = "annonces"
+        data = json.loads(JsonFormatter().format(record))
+        self.assertEqual(data["msg"], "échec 3")
+        self.assertEqual(data["level"], "ERROR")
+        self.assertEqual(data["channel"], "annonces")
+        self.assertIn("ValueError: boom", data["exc"])
+
+    def test_setup_writes_json_lines_from_the_listener_thread(self):
+        stream = io.StringIO()
+        setup_logging(level="INFO", fmt="json", sampling={}, rate_limit=60, stream=stream)
+        log = logging.getLogger("bot.test_logging")
+        log.info("bonjour %s", "anne", extra={"channel": "général"})
+        log.debug("ignoré (niveau)")
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            log.exception("division")
+        stop_logging()  # vide la file
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([d["msg"] for d in lines], ["bonjour anne", "division"])
+        self.assertEqual(lines[0]["channel"], "général")
+        self.assertIn("ZeroDivisionError", lines[1]["exc"])
+
+
+if __name__ == "__main__":
+    unittest.main()
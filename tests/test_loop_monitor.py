@@ -0,0 +1,60 @@
+# tests/test_loop_monitor.py
+
+import asyncio
+import time
+import traceback
+import unittest
+
+from bot import file_utils
+from bot.loop_monitor import LoopLagMonitor, blocking_site
+from bot.metrics import LOOP_LAG
+
+
+def _blocking_call(seconds):
+    time.sleep(seconds)  # appel synchrone volontaire sur la boucle
+
+
+class TestBlockingSite(unittest.TestCase):
+    def test_prefers_project_frame(self):
+        stack = traceback.StackSummary.from_list([
+            ("/usr/lib/python3/asyncio/events.py", 80, "_run", None),
+            (file_utils.__file__, 58, "save_messages_to_file", None),
+            ("/usr/lib/python3/json/__init__.py", 179, "dump", None),
+        ])
+        self.assertEqual(blocking_site(stack), "bot/file_utils.py:58 save_messages_to_file")
+        # sans frame du projet : la plus profonde
+        self.assertEqual(blocking_site(stack[::2]), "__init__.py:179 dump")
+
+    def test_empty_stack(self):
+        self.assertIn("non capturé", blocking_site(traceback.StackSummary()))
+
+
+class TestLoopLagMonitor(unittest.IsolatedAsyncioTestCase):
+    async def test_blocking_call_is_attributed(self):
+        before = LOOP_LAG.count()
+        monitor = LoopLagMonitor(threshold=0.1, interval=0.02).start()
+        self.addAsyncCleanup(monitor.stop)
+        await asyncio.sleep(0.05)
+        _blocking_call(0.4)
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(monitor.blocks, 1)
+        self.assertGreaterEqual(monitor.max_lag, 0.3)
+        site, count, total, _ = monitor.top_sites()[0]
+        self.assertIn("_blocking_call", site)
+        self.assertTrue(site.startswith("test_loop_monitor.py:"))
+        self.assertEqual(count, 1)
+        self.assertGreater(LOOP_LAG.count(), before)
+        self.assertIn("_blocking_call", "\n".join(monitor.summary()))
+        self.assertEqual(monitor.snapshot()["blocks"], 1)
+
+    async def test_idle_loop_has_no_blocks(self):
+        monitor = LoopLagMonitor(threshold=0.2, interval=0.01).start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+        self.assertEqual(monitor.blocks, 0)
+        self.assertFalse(monitor._thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -64,5 +64,16 @@ class TestMailsManagement(unittest.TestCase):
         # la fermeture se fait par __exit__. On peut éventuellement tester:
         mock_smtp.return_value.__exit__.assert_called_once()
 
+    @patch("bot.mails_management.smtplib.SMTP")
+    def test_send_email_several_recipients(self, mock_smtp):
+        """Une liste → une adresse SMTP par destinataire, jointes seulement dans To:."""
+        recipients = ["a@example.org", "b@example.org"]
+        asyncio.run(send_email("Bonjour", "test@example.com", "pw", recipients, host="smtp.example.com"))
+
+        server = mock_smtp.return_value.__enter__.return_value
+        from_addr, to_addrs, raw = server.sendmail.call_args.args
+        self.assertEqual(to_addrs, recipients)
+        self.assertIn("To: a@example.org, b@example.org", raw)
+
 if __name__ == "__main__":
     unittest.main()
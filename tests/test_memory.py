@@ -0,0 +1,192 @@
+# tests/test_memory.py
+
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from bot import core
+from bot.classification import ChannelClassifier
+from bot.env_config import get_memory_budgets
+from bot.ingestion import IngestionPipeline, make_buffer_entry
+from bot.memory import BufferMemory, entry_size, memory_report
+from bot.message_index import MessageIndex
+
+T0 = datetime(2025, 9, 22, 8, tzinfo=timezone.utc)
+
+
+def _entry(i, minutes, content="x" * 200):
+    return make_buffer_entry("anne", content, T0 + timedelta(minutes=minutes), None, i)
+
+
+def _buffer():
+    # annonces : messages 0..9 (minutes 0, 2, 4…) ; général : 100..109 (minutes 1, 3, 5…)
+    return {
+        "important": {"annonces": [_entry(i, 2 * i) for i in range(10)]},
+        "general": {"général": [_entry(100 + i, 2 * i + 1) for i in range(10)]},
+    }
+
+
+def _index(buffer):
+    index = MessageIndex(cache=None)
+    for category, channels in buffer.items():
+        for channel, msgs in channels.items():
+            for m in msgs:
+                index.add(m["id"], category, channel, m)
+    return index
+
+
+class TestBufferMemory(unittest.TestCase):
+    def test_add_matches_recount(self):
+        buffer = _buffer()
+        memory = BufferMemory()
+        for category, channels in buffer.items():
+            for channel, msgs in channels.items():
+                for m in msgs:
+                    memory.add(category, channel, m)
+        incremental = dict(memory.bytes)
+        self.assertEqual(memory.recount(buffer), sum(incremental.values()))
+        self.assertEqual(memory.bytes, incremental)
+        self.assertGreater(entry_size(buffer["important"]["annonces"][0]), 200)
+        top = memory.top(buffer, 1)
+        self.assertEqual(top[0][3], 10)
+
+    def test_channel_budget_evicts_oldest_first(self):
+        buffer = _buffer()
+        index = _index(buffer)
+        size = entry_size(buffer["important"]["annonces"][0])
+        memory = BufferMemory(channel_budget=4 * size)
+        memory.recount(buffer)
+        removed = memory.enforce(buffer, index, channels={("important", "annonces")})
+        self.assertEqual(removed, 6)
+        self.assertEqual([m["id"] for m in buffer["important"]["annonces"]], [6, 7, 8, 9])
+        self.assertEqual(len(buffer["general"]["général"]), 10)  # canal non touché
+        self.assertIsNone(index.get(0))
+        self.assertIsNotNone(index.get(6))
+        self.assertLessEqual(memory.bytes[("important", "annonces")], 4 * size)
+        self.assertEqual(memory.evicted, 6)
+
+    def test_total_budget_evicts_globally_oldest(self):
+        buffer = _buffer()
+        size = entry_size(buffer["important"]["annonces"][0])
+        memory = BufferMemory(total_budget=15 * size)
+        memory.recount(buffer)
+        self.assertEqual(memory.enforce(buffer), 5)
+        # minutes 0..4 : annonces 0, 1, 2 et général 100, 101
+        self.assertEqual(buffer["important"]["annonces"][0]["id"], 3)
+        self.assertEqual(buffer["general"]["général"][0]["id"], 102)
+        self.assertEqual(memory.total(), memory.recount(buffer))
+
+    def test_spill_is_merged_into_next_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "buffer_spill.jsonl")
+            buffer = _buffer()
+            size = entry_size(buffer["important"]["annonces"][0])
+            memory = BufferMemory(channel_budget=8 * size, policy="spill", spill_path=path)
+            memory.recount(buffer)
+            self.assertEqual(memory.enforce(buffer), 4)
+            self.assertEqual(memory.spilled, 4)
+            merged = memory.merged_with_spill(buffer)
+            self.assertEqual([m["id"] for m in merged["important"]["annonces"]], list(range(10)))
+            self.assertEqual(merged["important"]["annonces"][0]["timestamp"], T0)
+            self.assertEqual(len(buffer["important"]["annonces"]), 8)  # buffer en mémoire inchangé
+            memory.clear_spill()
+            self.assertFalse(os.path.exists(path))
+            self.assertIs(memory.merged_with_spill(buffer), buffer)
+
+    def test_corrupt_spill_line_does_not_break_the_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "buffer_spill.jsonl")
+            buffer = _buffer()
+            size = entry_size(buffer["important"]["annonces"][0])
+            memory = BufferMemory(channel_budget=8 * size, policy="spill", spill_path=path)
+            memory.recount(buffer)
+            memory.enforce(buffer)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write('{"category": "important", "channel": "annonces"}\n')   # sans "entry"
+                f.write('{"category": "important", "chan')                       # ligne tronquée
+            with self.assertLogs("bot.memory", level="WARNING"):
+                merged = memory.merged_with_spill(buffer)
+            self.assertEqual([m["id"] for m in merged["important"]["annonces"]], list(range(10)))
+            self.assertEqual(memory.stats()["spill_errors"], 2)
+            memory.clear_spill()
+            self.assertFalse(os.path.exists(path))
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            BufferMemory(policy="compress")
+        with self.assertRaises(ValueError):
+            BufferMemory(policy="spill")
+
+    def test_memory_report(self):
+        bot = SimpleNamespace(messages_by_channel=_buffer(), buffer_memory=BufferMemory(channel_budget=10_000))
+        text = "\n".join(memory_report(bot))
+        self.assertIn("20 messages", text)
+        self.assertIn("important/annonces (10 msg)", text)
+        self.assertIn("evict", text)
+
+
+class TestIngestionBudget(unittest.TestCase):
+    def test_apply_batch_enforces_channel_budget(self):
+        buffer = {"important": {}, "general": {}}
+        bot = SimpleNamespace(
+            messages_by_channel=buffer,
+            channel_classifier=ChannelClassifier(),
+            message_index=MessageIndex(cache=None),
+            buffer_memory=BufferMemory(channel_budget=3 * entry_size(_entry(0, 0))),
+        )
+        pipeline = IngestionPipeline(bot)
+        channel = SimpleNamespace(id=1, name="général")
+        records = [
+            SimpleNamespace(message_id=i, channel=channel, author="anne", content="x" * 200,
+                            created_at=T0 + timedelta(minutes=i), enqueued_at=0.0)
+            for i in range(10)
+        ]
+        pipeline.apply_batch(records)
+        self.assertEqual([m["id"] for m in buffer["general"]["général"]], [7, 8, 9])
+        self.assertEqual(len(bot.message_index), 3)
+
+    def test_ingest_mode_journals_backfill_before_evicting(self):
+        msgs = [
+            SimpleNamespace(id=i, content="x" * 200, created_at=T0 + timedelta(minutes=i),
+                            author=SimpleNamespace(name="anne", bot=False))
+            for i in range(10)
+        ]
+
+        def history(limit=None, oldest_first=False):
+            async def gen():
+                for m in reversed(msgs[-limit:]):
+                    yield m
+            return gen()
+
+        journal = MagicMock()
+        state = SimpleNamespace(
+            guilds=[SimpleNamespace(text_channels=[SimpleNamespace(id=1, name="général", history=history)])],
+            guild_id=5,
+            journal=journal,
+            channel_classifier=ChannelClassifier(),
+            message_index=MessageIndex(cache=None),
+            messages_by_channel={"important": {}, "general": {}},
+            local_config=SimpleNamespace(data_dir="data-inexistant"),
+            buffer_memory=BufferMemory(channel_budget=3 * entry_size(_entry(0, 0))),
+        )
+        with patch.object(core, "crawl_threads", AsyncMock(return_value=[])):
+            asyncio.run(core.populate_and_journal(state, limit=20))
+        journaled = journal.append.call_args.args[1]
+        self.assertEqual([entry["id"] for _cat, _ch, entry in journaled], list(range(10)))
+        self.assertEqual([m["id"] for m in state.messages_by_channel["general"]["général"]], [7, 8, 9])
+
+    def test_ingest_mode_default_budgets(self):
+        with patch.dict(os.environ, {"MEMORY_CHANNEL_BUDGET_KB": "", "MEMORY_BUFFER_BUDGET_MB": ""}):
+            self.assertIsNone(get_memory_budgets()["total_budget"])
+            budgets = get_memory_budgets(256, 16)
+        self.assertEqual((budgets["channel_budget"], budgets["total_budget"]), (256 * 1024, 16 * 1024 * 1024))
+        with patch.dict(os.environ, {"MEMORY_CHANNEL_BUDGET_KB": "64"}):
+            self.assertEqual(get_memory_budgets(256, 16)["channel_budget"], 64 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# tests/test_message_index.py
+
+import unittest
+from datetime import datetime, timezone
+
+from bot.ingestion import make_buffer_entry
+from bot.keywords import KeywordMatcher
+from bot.mails_management import format_messages_for_email
+from bot.message_index import MessageIndex, local_day
+from bot.summary_cache import SummaryCache
+
+
+TS = datetime(2025, 9, 22, 10, 0, tzinfo=timezone.utc)
+
+
+def _buffer_with(index, *entries):
+    buf = {"important": {}, "general": {}}
+    for mid, cat, ch, content in entries:
+        e = make_buffer_entry("Anne", content, TS, None, mid)
+        buf[cat].setdefault(ch, []).append(e)
+        index.add(mid, cat, ch, e)
+    return buf
+
+
+class TestMessageIndex(unittest.TestCase):
+    def test_local_day_uses_brussels_time(self):
+        late = datetime(2025, 9, 22, 23, 30, tzinfo=timezone.utc)
+        self.assertEqual(local_day(late), "2025-09-23")
+
+    def test_edit_updates_entry_in_place(self):
+        idx = MessageIndex(cache=None)
+        buf = _buffer_with(idx, (1, "important", "annonces", "réunion demain"))
+        matcher = KeywordMatcher(["assemblée"])
+        self.assertEqual(idx.apply_edit(1, "assemblée générale demain", matcher), "annonces")
+        e = buf["important"]["annonces"][0]
+        self.assertEqual(e["content"], "assemblée générale demain")
+        self.assertEqual(e["keywords"], ["assemblée"])
+        self.assertTrue(e["edited"])
+        self.assertIsNone(idx.apply_edit(999, "inconnu"))
+
+    def test_delete_tombstones_then_compact(self):
+        idx = MessageIndex(cache=None)
+        buf = _buffer_with(
+            idx,
+            (1, "general", "général", "premier message du jour"),
+            (2, "general", "général", "second message du jour"),
+        )
+        idx.apply_delete(2)
+        self.assertTrue(buf["general"]["général"][1]["deleted"])
+        self.assertNotIn("second message", format_messages_for_email(buf, summary_cache=None))
+        self.assertEqual(idx.compact(buf), 1)
+        self.assertEqual(len(buf["general"]["général"]), 1)
+        self.assertIsNone(idx.get(2))
+
+    def test_edit_invalidates_cached_summary_for_channel_day(self):
+        cache = SummaryCache()
+        idx = MessageIndex(cache=cache)
+        _buffer_with(idx, (1, "general", "général", "texte initial"))
+        cache.put("k1", "résumé", tag=("général", local_day(TS)))
+        cache.put("k2", "autre", tag=("autre", local_day(TS)))
+        idx.apply_edit(1, "texte corrigé")
+        self.assertIsNone(cache.get("k1"))
+        self.assertEqual(cache.get("k2"), "autre")
+        self.assertEqual(cache.stats()["invalidations"], 1)
+
+    def test_rename_channel_keeps_entries_reachable(self):
+        idx = MessageIndex(cache=None)
+        _buffer_with(idx, (1, "general", "ancien", "bonjour tout le monde"))
+        idx.rename_channel("ancien", "nouveau")
+        self.assertEqual(idx.get(1)[1], "nouveau")
+
+
+if __name__ == "__main__":
+    unittest.main()
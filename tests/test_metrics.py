@@ -0,0 +1,83 @@
+# tests/test_metrics.py
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from bot.metrics import COMMANDS_TOTAL, COMMAND_SECONDS, MetricsRegistry
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.reg = MetricsRegistry()
+
+    def test_counter_and_gauge(self):
+        c = self.reg.counter("x_total", "x", ("kind",))
+        c.inc(kind="a")
+        c.inc(2, kind="a")
+        c.inc(kind="b")
+        self.assertEqual(c.value(kind="a"), 3)
+        self.assertEqual(c.total(), 4)
+        g = self.reg.gauge("depth", "profondeur")
+        g.set(7)
+        self.assertEqual(g.value(), 7)
+        with self.assertRaises(ValueError):
+            c.inc(other="a")
+        self.assertIs(self.reg.counter("x_total", "x", ("kind",)), c)
+        with self.assertRaises(ValueError):
+            self.reg.gauge("x_total", "x", ("kind",))
+
+    def test_histogram_stats_and_timer(self):
+        h = self.reg.histogram("lat_seconds", "latence", buckets=(0.1, 1.0, 10.0))
+        for v in (0.05, 0.05, 0.5, 5.0):
+            h.observe(v)
+        st = h.stats()
+        self.assertEqual(st["count"], 4)
+        self.assertAlmostEqual(st["sum"], 5.6)
+        self.assertEqual(st["max"], 5.0)
+        self.assertLessEqual(st["p50"], 0.1)
+        self.assertGreater(st["p95"], 1.0)
+        with self.assertRaises(RuntimeError):
+            with h.time():
+                raise RuntimeError("boom")
+        self.assertEqual(h.count(), 5)  # observé même en cas d'exception
+
+    def test_prometheus_exposition(self):
+        h = self.reg.histogram("cmd_seconds", "durée", ("command",), buckets=(0.1, 1.0))
+        h.observe(0.5, command='a"b')
+        self.reg.counter("sent_total", "envois").inc()
+        calls = []
+        self.reg.add_collector(lambda: calls.append(1))
+        text = self.reg.render_prometheus()
+        self.assertEqual(calls, [1])
+        self.assertIn("# TYPE cmd_seconds histogram", text)
+        self.assertIn('cmd_seconds_bucket{command="a\\"b",le="0.1"} 0', text)
+        self.assertIn('cmd_seconds_bucket{command="a\\"b",le="1.0"} 1', text)
+        self.assertIn('cmd_seconds_bucket{command="a\\"b",le="+Inf"} 1', text)
+        self.assertIn('cmd_seconds_count{command="a\\"b"} 1', text)
+        self.assertIn("sent_total 1", text)
+        self.assertTrue(text.endswith("\n"))
+
+
+class TestCommandHooks(unittest.TestCase):
+    def test_after_hook_records_duration_and_status(self):
+        from bot.discord_bot_commands import _after_command, _before_command
+
+        ctx = SimpleNamespace(command=SimpleNamespace(qualified_name="metrics_test_cmd"), command_failed=False)
+        before = COMMAND_SECONDS.count(command="metrics_test_cmd")
+
+        async def run():
+            await _before_command(ctx)
+            await _after_command(ctx)
+            ctx.command_failed = True
+            await _after_command(ctx)
+
+        asyncio.run(run())
+        self.assertEqual(COMMAND_SECONDS.count(command="metrics_test_cmd"), before + 2)
+        self.assertGreaterEqual(COMMANDS_TOTAL.value(command="metrics_test_cmd", status="ok"), 1)
+        self.assertGreaterEqual(COMMANDS_TOTAL.value(command="metrics_test_cmd", status="error"), 1)
+        self.assertTrue(ctx._metrics_done)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+# tests/test_near_duplicates.py
+
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from bot.near_duplicates import NearDuplicateIndex, hamming, simhash64
+from bot.mails_management import format_messages_for_email
+
+ANNONCE = "Rappel : la réunion mensuelle de la coalition aura lieu jeudi 25 septembre à 14h."
+ANNONCE_BIS = "Rappel: la réunion mensuelle de la coalition aura lieu jeudi 25 septembre à 14h !"
+AUTRE = "Quelqu'un a le lien du document partagé pour le rapport annuel ?"
+
+
+class TestNearDuplicates(unittest.TestCase):
+    def test_simhash_close_for_near_identical_text(self):
+        self.assertLessEqual(hamming(simhash64(ANNONCE), simhash64(ANNONCE_BIS)), 3)
+        self.assertGreater(hamming(simhash64(ANNONCE), simhash64(AUTRE)), 3)
+        self.assertIsNone(simhash64("ok merci"))
+
+    def test_pure_python_matches_numpy(self):
+        expected = simhash64(ANNONCE)
+        with patch("bot.near_duplicates.np", None):
+            self.assertEqual(simhash64(ANNONCE), expected)
+
+    def test_index_groups_near_duplicates(self):
+        index = NearDuplicateIndex()
+        g1 = index.add(simhash64(ANNONCE))
+        g2 = index.add(simhash64(AUTRE))
+        self.assertNotEqual(g1, g2)
+        self.assertEqual(index.add(simhash64(ANNONCE_BIS)), g1)
+        self.assertEqual(len(index), 2)
+
+    def test_email_collapses_cross_posts(self):
+        d1 = datetime(2025, 9, 22, 8, tzinfo=timezone.utc)
+        d2 = datetime(2025, 9, 23, 8, tzinfo=timezone.utc)
+        messages = {
+            "important": {"annonces": [{"author": "Anne", "content": ANNONCE, "timestamp": d1}]},
+            "general": {
+                "général": [{"author": "Anne", "content": ANNONCE_BIS, "timestamp": d1}],
+                "random": [{"author": "Bea", "content": ANNONCE, "timestamp": d2}],
+            },
+        }
+        body = format_messages_for_email(messages)
+        self.assertEqual(body.count("réunion mensuelle"), 1)
+        self.assertIn("(aussi dans #général, #random)", body)
+
+        body = format_messages_for_email(messages, collapse_near_duplicates=False)
+        self.assertEqual(body.count("réunion mensuelle"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
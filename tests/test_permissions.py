@@ -0,0 +1,51 @@
+# tests/test_permissions.py
+
+import unittest
+from types import SimpleNamespace
+
+from bot.permissions import ReadableChannels, readable
+
+
+class _Channel(SimpleNamespace):
+    def permissions_for(self, member):
+        ok = self.id not in member.hidden
+        return SimpleNamespace(view_channel=ok, read_message_history=ok)
+
+
+class TestReadableChannels(unittest.TestCase):
+    def setUp(self):
+        self.me = SimpleNamespace(hidden={2})
+        self.guild = SimpleNamespace(id=100, me=self.me, text_channels=[], forums=[])
+        self.chans = [_Channel(id=i, name=f"c{i}", guild=self.guild) for i in (1, 2, 3)]
+        self.guild.text_channels = self.chans
+        self.rc = ReadableChannels()
+        self.rc.rebuild([self.guild])
+
+    def test_only_readable_channels_are_crawled(self):
+        self.assertEqual([c.id for c in self.rc.filter(self.chans)], [1, 3])
+        bot = SimpleNamespace(readable_channels=self.rc)
+        self.assertEqual([c.id for c in readable(bot, self.chans)], [1, 3])
+        # bot sans ensemble calculé : tout est gardé
+        self.assertEqual(len(readable(SimpleNamespace(), self.chans)), 3)
+
+    def test_thread_follows_parent(self):
+        thread = SimpleNamespace(id=50, parent_id=2, guild=self.guild)
+        self.assertNotIn(thread, self.rc)
+        thread.parent_id = 1
+        self.assertIn(thread, self.rc)
+
+    def test_permission_changes(self):
+        # overwrite du canal modifié
+        self.me.hidden = {1, 2}
+        self.assertFalse(self.rc.update_channel(self.chans[0]))
+        self.assertEqual([c.id for c in self.rc.filter(self.chans)], [3])
+        # rôle modifié → recalcul de la guild
+        self.me.hidden = set()
+        self.rc.rebuild_guild(self.guild)
+        self.assertEqual(len(self.rc), 3)
+        self.rc.remove_channel(self.chans[2])
+        self.assertEqual(len(self.rc), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
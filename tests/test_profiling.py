@@ -0,0 +1,105 @@
+# tests/test_profiling.py
+
+import asyncio
+import os
+import pstats
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from bot import core, profiling
+from bot import discord_bot_commands as cmds
+from bot.env_config import get_bot_profile
+from bot.profiling import Profiler, ProfilerBusy, profiled_job
+
+
+def _busy_work(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(200))
+    return total
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_writes_pstats_collapsed_and_top(self):
+        with Profiler("preview mail", out_dir=self.tmp.name, sample_interval=0.001) as profiler:
+            _busy_work(0.1)
+        report = profiler.report
+        self.assertEqual(report.label, "preview_mail")
+        self.assertTrue(os.path.basename(report.pstats_path).startswith("preview_mail_"))
+        self.assertIn("_busy_work", "".join(row[3] for row in report.top))
+        self.assertLessEqual(len(report.top), profiling.TOP_N)
+        pstats.Stats(report.pstats_path)  # relisible par pstats
+        with open(report.collapsed_path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertTrue(any("_busy_work (test_profiling.py" in line for line in lines))
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+        self.assertGreater(report.samples, 0)
+        self.assertIn("cumul ms", report.format_top())
+
+    def test_one_profile_at_a_time(self):
+        with Profiler("outer", out_dir=self.tmp.name):
+            with self.assertRaises(ProfilerBusy):
+                Profiler("inner", out_dir=self.tmp.name).start()
+        Profiler("again", out_dir=self.tmp.name).start().stop()  # verrou relâché
+
+
+class TestBotProfileMode(unittest.TestCase):
+    def test_env_parsing(self):
+        with patch.dict(os.environ, {"BOT_PROFILE": ""}):
+            self.assertEqual(get_bot_profile(), frozenset())
+        with patch.dict(os.environ, {"BOT_PROFILE": "all"}):
+            self.assertEqual(get_bot_profile(), frozenset({"*"}))
+        with patch.dict(os.environ, {"BOT_PROFILE": "daily, preview_mail"}):
+            self.assertEqual(get_bot_profile(), frozenset({"daily", "preview_mail"}))
+
+    def test_profiled_job_only_when_enabled(self):
+        @profiled_job("daily")
+        async def job(x):
+            _busy_work(0.01)
+            return x * 2
+
+        with tempfile.TemporaryDirectory() as tmp, patch.object(profiling, "PROFILE_DIR", tmp):
+            with patch.dict(os.environ, {"BOT_PROFILE": "populate"}):
+                self.assertEqual(asyncio.run(job(2)), 4)
+                self.assertEqual(os.listdir(tmp), [])
+            with patch.dict(os.environ, {"BOT_PROFILE": "daily"}):
+                self.assertEqual(asyncio.run(job(3)), 6)
+                self.assertEqual(sorted(f.rsplit(".", 1)[1] for f in os.listdir(tmp)), ["collapsed", "pstats"])
+
+
+class TestProfileCommand(unittest.TestCase):
+    def test_populate_runs_in_scratch_data_dir(self):
+        with tempfile.TemporaryDirectory() as data_dir, tempfile.TemporaryDirectory() as out_dir:
+            bot = SimpleNamespace(journal=None)
+            state = cmds.GuildContext(bot, 7, cmds.GuildConfig(data_dir))
+            seen = {}
+
+            async def fake_populate(scratch, limit=20):
+                seen["data_dir"] = scratch.local_config.data_dir
+                seen["exists"] = os.path.isdir(scratch.local_config.data_dir)
+
+            ctx = MagicMock()
+            ctx.send = AsyncMock()
+            cog = cmds.DebugCog(bot)
+            with patch.object(cmds, "guild_state", return_value=state), \
+                 patch.object(core, "populate_initial_messages", fake_populate), \
+                 patch.object(profiling, "PROFILE_DIR", out_dir), \
+                 patch.object(cmds.discord, "File", MagicMock()):
+                asyncio.run(cmds.DebugCog.profile_cmd.callback(cog, ctx, target="populate"))
+
+            self.assertTrue(seen["exists"])
+            self.assertNotEqual(seen["data_dir"], data_dir)   # checkpoints réels intouchés
+            self.assertFalse(os.path.exists(seen["data_dir"]))  # dossier jetable supprimé
+            self.assertEqual(os.listdir(data_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
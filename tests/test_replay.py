@@ -0,0 +1,66 @@
+# tests/test_replay.py
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from bot.file_utils import load_messages_from_file, save_messages_to_file
+from bot.ingestion import make_buffer_entry
+from bot.replay import diff_against_golden, golden_path, render_email
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+REPORT = os.path.join(ROOT_DIR, "rapports", "rapport_2025.09.22_10h08.json")
+
+
+class TestLoadReport(unittest.TestCase):
+    def test_roundtrip_with_save_messages_to_file(self):
+        ts = datetime(2025, 3, 1, 9, 30, tzinfo=timezone.utc)
+        entry = make_buffer_entry("alice", "Réunion jeudi à 19h.", ts, None, 42)
+        entry["thread"] = "ordre-du-jour"
+        buffer = {"important": {"annonces": [entry]}, "general": {}}
+        with tempfile.TemporaryDirectory() as d:
+            save_messages_to_file(buffer, directory=d)
+            (name,) = os.listdir(d)
+            metadata, loaded = load_messages_from_file(os.path.join(d, name))
+        self.assertEqual(metadata["total_messages"], 1)
+        self.assertEqual(loaded, buffer)
+
+    def test_old_reports_get_fingerprints_and_datetimes(self):
+        metadata, loaded = load_messages_from_file(REPORT)
+        msgs = [m for channels in loaded.values() for lst in channels.values() for m in lst]
+        self.assertEqual(len(msgs), metadata["total_messages"])
+        self.assertTrue(all(isinstance(m["timestamp"], datetime) for m in msgs))
+        self.assertTrue(all("fingerprint" in m and m["keywords"] == [] for m in msgs))
+        self.assertTrue(any(isinstance(m["fingerprint"], int) for m in msgs))
+
+    def test_empty_report_is_rejected(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            path = f.name
+        try:
+            with self.assertRaises(ValueError):
+                load_messages_from_file(path)
+        finally:
+            os.remove(path)
+
+
+class TestGolden(unittest.TestCase):
+    def test_archived_report_renders_like_its_golden_copy(self):
+        _, loaded = load_messages_from_file(REPORT)
+        golden = golden_path(REPORT, os.path.join(ROOT_DIR, "tests", "golden"))
+        self.assertEqual(diff_against_golden(render_email(loaded), golden), [])
+
+    def test_missing_golden_and_changed_output(self):
+        self.assertIsNone(diff_against_golden("x", "/nonexistent/golden.txt"))
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+            f.write("ligne 1\nligne 2")
+        try:
+            diff = diff_against_golden("ligne 1\nligne 3", f.name)
+            self.assertIn("-ligne 2", diff)
+            self.assertIn("+ligne 3", diff)
+        finally:
+            os.remove(f.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
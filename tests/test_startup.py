@@ -0,0 +1,150 @@
+# tests/test_startup.py
+
+import asyncio
+import os
+import subprocess
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from bot import core
+from bot.classification import ChannelClassifier
+from bot.ingestion import IngestionPipeline, make_buffer_entry
+from bot.keywords import KeywordMatcher
+from bot.message_index import MessageIndex
+from bot.startup import BackfillProgress, StartupClock
+
+T0 = datetime(2025, 9, 22, 8, tzinfo=timezone.utc)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _msg(mid, content="bonjour"):
+    return SimpleNamespace(
+        id=mid, content=content, created_at=T0 + timedelta(minutes=mid),
+        author=SimpleNamespace(name="anne", bot=False),
+    )
+
+
+def _channel(cid, name, messages):
+    def history(limit=None, oldest_first=False):
+        async def gen():
+            for m in sorted(messages, key=lambda m: m.id, reverse=True)[:limit]:
+                yield m
+        return gen()
+    return SimpleNamespace(id=cid, name=name, history=history)
+
+
+class TestStartupClock(unittest.TestCase):
+    def test_phases_and_summary(self):
+        clock = _Clock()
+        startup = StartupClock(clock=clock)
+        clock.now = 0.5
+        startup.mark("imports")
+        clock.now = 2.0
+        startup.mark("connexion")
+        clock.now = 9.0
+        startup.mark("connexion")  # un on_ready répété ne déplace pas le jalon
+        self.assertEqual(startup.phases(), [("imports", 0.5), ("connexion", 1.5)])
+        self.assertEqual(startup.total(), 2.0)
+        self.assertEqual(startup.summary(), "prêt en 2.00 s (imports 0.50 s, connexion 1.50 s)")
+        self.assertEqual(startup.snapshot()["phases_s"], {"imports": 0.5, "connexion": 1.5})
+
+
+class TestBackfillProgress(unittest.TestCase):
+    def test_progress(self):
+        clock = _Clock()
+        progress = BackfillProgress("coalition", clock=clock)
+        self.assertFalse(progress.running)
+        progress.start(3)
+        clock.now = 1.0
+        progress.channel_done(20)
+        progress.channel_done(5, skipped=2)
+        self.assertTrue(progress.running)
+        self.assertEqual(progress.snapshot(), {
+            "phase": "channels", "channels_done": 2, "channels_total": 3,
+            "messages": 25, "skipped": 2, "elapsed_s": 1.0,
+        })
+        progress.finish()
+        clock.now = 5.0
+        self.assertEqual(progress.phase, "done")
+        self.assertEqual(progress.elapsed(), 1.0)
+
+
+class TestBackgroundBackfill(unittest.TestCase):
+    def _state(self, channels):
+        return SimpleNamespace(
+            guilds=[SimpleNamespace(text_channels=channels)],
+            channel_classifier=ChannelClassifier(),
+            keyword_matcher=KeywordMatcher(),
+            message_index=MessageIndex(cache=None),
+            messages_by_channel={"important": {}, "general": {}},
+            local_config=SimpleNamespace(data_dir="data-inexistant"),
+            backfill=BackfillProgress("test"),
+        )
+
+    def test_backfill_skips_live_messages_and_goes_first(self):
+        state = self._state([_channel(1, "général", [_msg(i) for i in range(1, 6)])])
+        # l'ingestion live a déjà reçu 5 (aussi dans l'historique) et 6
+        live = [make_buffer_entry("anne", "live", T0 + timedelta(minutes=i), None, i) for i in (5, 6)]
+        state.messages_by_channel["general"]["général"] = list(live)
+        for entry in live:
+            state.message_index.add(entry["id"], "general", "général", entry)
+
+        with patch.object(core, "crawl_threads", AsyncMock(return_value=[])):
+            asyncio.run(core.populate_initial_messages(state, limit=20))
+
+        self.assertEqual([m["id"] for m in state.messages_by_channel["general"]["général"]], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(state.messages_by_channel["general"]["général"][4]["content"], "live")
+        self.assertEqual(len(state.message_index), 6)
+        snap = state.backfill.snapshot()
+        self.assertEqual((snap["phase"], snap["channels_done"], snap["channels_total"]), ("done", 1, 1))
+        self.assertEqual((snap["messages"], snap["skipped"]), (4, 1))
+
+    def test_live_ingestion_skips_backfilled_messages(self):
+        state = self._state([])
+        state.message_index.add(7, "general", "général", make_buffer_entry("anne", "x", T0, None, 7))
+        channel = SimpleNamespace(id=1, name="général")
+        records = [
+            SimpleNamespace(message_id=mid, channel=channel, author="anne", content="x",
+                            created_at=T0, enqueued_at=0.0)
+            for mid in (7, 8)
+        ]
+        added = IngestionPipeline(state).apply_batch(records)
+        self.assertEqual([entry["id"] for _cat, _ch, entry in added], [8])
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_core_import_skips_heavy_modules(self):
+        code = (
+            "import sys, bot.core; "
+            "print(','.join(m for m in ('numpy', 'bot.mails_management', 'aiohttp.web', 'bot.journal') "
+            "if m in sys.modules))"
+        )
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(out.stdout.strip(), "")
+
+    def test_commands_extension_import_skips_heavy_modules(self):
+        # main() charge l'extension avant la connexion : elle doit rester légère aussi
+        heavy = ("bot.mails_management", "bot.file_utils", "bot.journal", "smtplib", "email.mime.text",
+                 "sqlite3", "cProfile", "pstats", "tracemalloc")
+        code = (
+            "import sys, bot.core, bot.discord_bot_commands; "
+            f"print(','.join(m for m in {heavy!r} if m in sys.modules))"
+        )
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(out.stdout.strip(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# tests/test_store_cache.py
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from bot import discord_bot_commands as cmds
+
+
+def _store_msg(msg_id, tag, data, author_id=42, version=1):
+    msg = MagicMock()
+    msg.id = msg_id
+    msg.author.id = author_id
+    msg.content = cmds._render_store_payload(tag, {"version": version, "updated_at": None, "data": data})
+    return msg
+
+
+class TestStoreCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.ids_path = os.path.join(self.tmp.name, "ids.json")
+        self.msgs = {
+            "important": _store_msg(1, cmds.TAG_IMPORTANT, ["annonces"]),
+            "excluded": _store_msg(2, cmds.TAG_EXCLUDED, ["bot-storage"]),
+            "keywords": _store_msg(3, cmds.TAG_KEYWORDS, ["urgent"]),
+        }
+        self.channel = MagicMock()
+        by_id = {m.id: m for m in self.msgs.values()}
+        self.channel.fetch_message = AsyncMock(side_effect=lambda i: by_id[i])
+        self.channel.history = MagicMock(side_effect=AssertionError("history ne doit pas être appelé"))
+        self.bot = MagicMock(spec=["get_channel", "fetch_channel", "user", "messages_by_channel"])
+        self.bot.get_channel.return_value = self.channel
+        self.bot.user.id = 42
+        self.bot.messages_by_channel = {"important": {}, "general": {}}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    async def _load(self, **kwargs):
+        with patch.object(cmds, "STORE_IDS_PATH", self.ids_path), \
+             patch.object(cmds, "get_bot_storage_channel_id", return_value=99), \
+             patch.object(cmds, "get_important_msg_id", return_value=None), \
+             patch.object(cmds, "get_excluded_msg_id", return_value=None), \
+             patch.object(cmds, "get_keywords_msg_id", return_value=None):
+            await cmds.ensure_storage_loaded(self.bot, **kwargs)
+
+    async def test_known_ids_skip_history_scan(self):
+        with open(self.ids_path, "w", encoding="utf-8") as f:
+            json.dump({"important": 1, "excluded": 2, "keywords": 3}, f)
+        await self._load()
+        self.assertEqual(self.bot.important_channels, ["annonces"])
+        self.assertEqual(self.bot.keywords, ["urgent"])
+        self.assertEqual(self.channel.fetch_message.await_count, 3)
+
+    async def test_cached_store_makes_no_api_call(self):
+        with open(self.ids_path, "w", encoding="utf-8") as f:
+            json.dump({"important": 1, "excluded": 2, "keywords": 3}, f)
+        await self._load()
+        self.bot.get_channel.reset_mock()
+        self.channel.fetch_message.reset_mock()
+        await self._load()
+        self.bot.get_channel.assert_not_called()
+        self.channel.fetch_message.assert_not_called()
+
+    async def test_raw_edit_refreshes_cache(self):
+        with open(self.ids_path, "w", encoding="utf-8") as f:
+            json.dump({"important": 1, "excluded": 2, "keywords": 3}, f)
+        await self._load()
+        edited = cmds._render_store_payload(cmds.TAG_EXCLUDED, {"version": 2, "data": ["bot-storage", "tests-bot"]})
+        self.assertEqual(cmds.apply_store_edit(self.bot, 2, edited), "excluded")
+        self.assertEqual(self.bot.excluded_channels, ["bot-storage", "tests-bot"])
+        # écho d'une version déjà connue → ignoré
+        self.assertIsNone(cmds.apply_store_edit(self.bot, 2, edited))
+        self.assertIsNone(cmds.apply_store_edit(self.bot, 12345, edited))
+
+
+if __name__ == "__main__":
+    unittest.main()
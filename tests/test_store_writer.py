@@ -0,0 +1,86 @@
+# tests/test_store_writer.py
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from bot import discord_bot_commands as cmds
+
+
+class TestStoreWriter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.remote = {"version": 3, "updated_at": None, "data": ["annonces"]}
+        self.message = MagicMock()
+        self.message.id = 1
+        self.message.edit = AsyncMock(side_effect=self._edit)
+        channel = MagicMock()
+        channel.fetch_message = AsyncMock(side_effect=self._fetch)
+
+        self.bot = MagicMock(spec=[])
+        self.bot.important_channels = ["annonces"]
+        self.bot._store = {
+            "channel": channel,
+            "important": {"message": self.message, "payload": dict(self.remote), "tag": cmds.TAG_IMPORTANT},
+        }
+
+    async def _fetch(self, _msg_id):
+        msg = MagicMock()
+        msg.content = cmds._render_store_payload(cmds.TAG_IMPORTANT, self.remote)
+        return msg
+
+    async def _edit(self, content):
+        self.remote = cmds._parse_store_message(content)
+
+    async def test_changes_are_coalesced_into_one_edit(self):
+        writer = cmds.StoreWriter(self.bot, debounce_s=0.05)
+        for i in range(10):
+            writer.queue("important", add=[f"canal-{i}"])
+        writer.queue("important", remove=["canal-3"])
+        self.assertIn("canal-9", self.bot.important_channels)  # visible tout de suite
+        self.message.edit.assert_not_called()
+
+        await asyncio.sleep(0.15)
+        self.assertEqual(self.message.edit.await_count, 1)
+        self.assertEqual(self.remote["version"], 4)
+        self.assertEqual(len(self.remote["data"]), 10)
+        self.assertNotIn("canal-3", self.remote["data"])
+        self.assertFalse(writer.pending)
+
+    async def test_version_conflict_rebases_on_remote(self):
+        # quelqu'un a édité le message entre-temps (version 5, nouveau canal)
+        self.remote = {"version": 5, "updated_at": None, "data": ["annonces", "agenda"]}
+        writer = cmds.StoreWriter(self.bot, debounce_s=10)
+        writer.queue("important", add=["bureau"])
+        await writer.flush()
+        self.assertEqual(writer.conflicts, 1)
+        self.assertEqual(self.remote["version"], 6)
+        self.assertEqual(self.remote["data"], ["agenda", "annonces", "bureau"])
+        self.assertEqual(self.bot.important_channels, ["agenda", "annonces", "bureau"])
+
+    async def test_failed_flush_keeps_every_list_and_retries(self):
+        excluded_msg = MagicMock()
+        excluded_msg.id = 2
+        excluded_msg.edit = AsyncMock()
+        self.bot.excluded_channels = []
+        self.bot._store["excluded"] = {
+            "message": excluded_msg, "payload": {"version": 1, "updated_at": None, "data": []},
+            "tag": cmds.TAG_EXCLUDED,
+        }
+        self.message.edit = AsyncMock(side_effect=[RuntimeError("503"), None])
+        writer = cmds.StoreWriter(self.bot, debounce_s=0.02)
+        writer.queue("important", add=["bureau"])
+        writer.queue("excluded", add=["bot-storage"])
+
+        await asyncio.sleep(0.05)          # 1re écriture : "important" échoue
+        self.assertEqual(writer.pending_ops("important")["add"], {"bureau"})
+        self.assertEqual(writer.pending_ops("excluded")["add"], {"bot-storage"})
+        excluded_msg.edit.assert_not_called()
+
+        await asyncio.sleep(0.1)           # nouvel essai programmé sans nouveau changement
+        self.assertFalse(writer.pending)
+        self.assertEqual(self.message.edit.await_count, 2)
+        excluded_msg.edit.assert_awaited_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+# tests/test_summary_cache.py
+
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from bot import extractive_summarizer
+from bot.summary_cache import SummaryCache, make_key
+from bot.mails_management import _summarize_general_channels
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSummaryCache(unittest.TestCase):
+    def test_key_depends_on_content_and_params(self):
+        k1 = make_key(["Anne: salut"], backend="naive", max_chars=450)
+        self.assertEqual(k1, make_key(["Anne: salut"], max_chars=450, backend="naive"))
+        self.assertNotEqual(k1, make_key(["Anne: salut !"], backend="naive", max_chars=450))
+        self.assertNotEqual(k1, make_key(["Anne: salut"], backend="extractive", max_chars=450))
+
+    def test_lru_and_ttl_eviction(self):
+        clock = FakeClock()
+        cache = SummaryCache(maxsize=2, ttl_s=10, clock=clock)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        self.assertEqual(cache.get("a"), "A")  # "a" devient le plus récent
+        cache.put("c", "C")                    # évince "b"
+        self.assertIsNone(cache.get("b"))
+        clock.now = 11
+        self.assertIsNone(cache.get("a"))      # expiré
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertEqual((stats["evictions"], stats["expirations"]), (1, 1))
+
+    def test_evicted_and_expired_keys_leave_their_tag(self):
+        clock = FakeClock()
+        cache = SummaryCache(maxsize=2, ttl_s=10, clock=clock)
+        cache.put("a", "A", tag=("général", "2025-09-22"))
+        cache.put("b", "B", tag=("général", "2025-09-22"))
+        cache.put("c", "C", tag=("annonces", "2025-09-22"))   # évince "a"
+        self.assertEqual(cache._tags[("général", "2025-09-22")], {"b"})
+        clock.now = 11
+        self.assertIsNone(cache.get("b"))                       # expiré
+        self.assertNotIn(("général", "2025-09-22"), cache._tags)
+        cache.put("d", "D")
+        cache.put("e", "E")                                     # évince "c"
+        self.assertEqual(cache._tags, {})
+        self.assertEqual(cache.invalidate("général", "2025-09-22"), 0)
+
+    def test_summaries_served_from_cache(self):
+        cache = SummaryCache()
+        ts = datetime(2025, 9, 22, 10, tzinfo=timezone.utc)
+        channels = {"general": [{"author": "Anne", "content": "Réunion jeudi à 14h", "timestamp": ts}]}
+
+        first = _summarize_general_channels(channels, backend="extractive", cache=cache)
+        with patch("bot.mails_management.summarize_channels_batch") as mock_batch:
+            second = _summarize_general_channels(channels, backend="extractive", cache=cache)
+        mock_batch.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_fallback_not_cached_as_extractive(self):
+        cache = SummaryCache()
+        ts = datetime(2025, 9, 22, 10, tzinfo=timezone.utc)
+        text = "Réunion jeudi. Budget voté. Salle réservée. Ordre du jour envoyé"
+        channels = {"general": [{"author": "Anne", "content": text, "timestamp": ts}]}
+        blob = "Anne: " + text
+
+        # budget nul → repli naive_summarize
+        real = extractive_summarizer.summarize_channels_batch
+        with patch("bot.extractive_summarizer.summarize_channels_batch",
+                   lambda blobs, **kw: real(blobs, budget_s=0, **kw)):
+            _summarize_general_channels(channels, backend="extractive", cache=cache)
+
+        self.assertIsNone(cache.get(make_key([blob], backend="extractive", max_chars=500, max_sentences=3)))
+        self.assertIsNotNone(cache.get(make_key([blob], backend="naive", max_chars=500, max_sentences=3)))
+
+
+if __name__ == "__main__":
+    unittest.main()
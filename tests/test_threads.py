@@ -0,0 +1,144 @@
+# tests/test_threads.py
+
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from bot.classification import ChannelClassifier
+from bot.message_index import MessageIndex
+from bot.threads import ThreadCheckpoints, crawl_threads, run_bounded
+
+NOW = datetime.now(timezone.utc)
+
+
+class _History:
+    """Imite channel.history(limit, after, oldest_first=False) : du plus récent au plus ancien."""
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    def __call__(self, limit=None, after=None, oldest_first=False):
+        msgs = [m for m in self.messages if after is None or m.id > after.id]
+        msgs = sorted(msgs, key=lambda m: m.id, reverse=True)[:limit]
+
+        async def gen():
+            for m in msgs:
+                yield m
+        return gen()
+
+
+def _msg(mid, content, bot=False):
+    return SimpleNamespace(
+        id=mid, content=content, created_at=NOW,
+        author=SimpleNamespace(name="Anne", bot=bot),
+    )
+
+
+def _thread(tid, name, parent, messages, archived_h=None):
+    t = SimpleNamespace(
+        id=tid, name=name, parent_id=parent.id, parent=parent,
+        last_message_id=max((m.id for m in messages), default=None),
+        archive_timestamp=NOW - timedelta(hours=archived_h or 0),
+    )
+    t.history = _History(messages)
+    return t
+
+
+def _parent(cid, name, archived=()):
+    async def archived_threads(limit=None):
+        for t in archived:
+            yield t
+    return SimpleNamespace(id=cid, name=name, archived_threads=archived_threads)
+
+
+class TestThreadCrawl(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "checkpoints.json")
+        self.annonces = _parent(1, "annonces")
+        self.storage = _parent(3, "bot-storage")
+        old = _thread(12, "vieux fil", self.annonces, [_msg(120, "très ancien")], archived_h=500)
+        recent = _thread(11, "compte-rendu AG", self.annonces, [_msg(110, "PV en ligne")], archived_h=5)
+        self.annonces = _parent(1, "annonces", archived=[recent, old])
+        self.active = _thread(10, "préparation manif", self.annonces, [_msg(100, "rdv 14h"), _msg(101, "ok", bot=True), _msg(102, "pancartes ?")])
+        hidden = _thread(30, "interne", self.storage, [_msg(300, "secret")])
+
+        async def active_threads():
+            return [self.active, hidden]
+        self.guild = SimpleNamespace(
+            text_channels=[self.annonces, self.storage], forums=[], threads=[],
+            active_threads=active_threads,
+        )
+        classifier = ChannelClassifier()
+        classifier.rebuild([self.guild], important=["annonces"], excluded=["bot-storage"])
+        self.bot = SimpleNamespace(channel_classifier=classifier, keyword_matcher=None,
+                                   message_index=MessageIndex(cache=None))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_threads_inherit_parent_classification(self):
+        entries = asyncio.run(crawl_threads(self.bot, self.guild, concurrency=2))
+        by_thread = {}
+        for cat, ch, e in entries:
+            self.assertEqual((cat, ch), ("important", "annonces"))
+            by_thread.setdefault(e["thread"], []).append(e["content"])
+        # fil exclu (parent exclu), archivé trop vieux et messages de bots écartés
+        self.assertEqual(by_thread, {
+            "préparation manif": ["rdv 14h", "pancartes ?"],
+            "compte-rendu AG": ["PV en ligne"],
+        })
+
+    def _buffer(self, entries):
+        # ce que fait populate_initial_messages avec les entrées des fils
+        for cat, ch, e in entries:
+            self.bot.message_index.add(e["id"], cat, ch, e)
+
+    def test_checkpoints_skip_unchanged_threads(self):
+        cps = ThreadCheckpoints(self.path)
+        first = asyncio.run(crawl_threads(self.bot, self.guild, checkpoints=cps))
+        self.assertEqual(len(first), 3)
+        self.assertEqual(ThreadCheckpoints(self.path).get(10), 102)
+        self._buffer(first)
+
+        self.active.history.messages.append(_msg(103, "nouveau"))
+        self.active.last_message_id = 103
+        second = asyncio.run(crawl_threads(self.bot, self.guild, checkpoints=ThreadCheckpoints(self.path)))
+        self.assertEqual([e["content"] for _, _, e in second], ["nouveau"])
+
+    def test_restart_rereads_threads_missing_from_buffer(self):
+        first = asyncio.run(crawl_threads(self.bot, self.guild, checkpoints=ThreadCheckpoints(self.path)))
+        self.assertEqual(len(first), 3)
+
+        # redémarrage : checkpoints relus depuis le fichier, buffer (et index) vides
+        self.bot.message_index = MessageIndex(cache=None)
+        again = asyncio.run(crawl_threads(self.bot, self.guild, checkpoints=ThreadCheckpoints(self.path)))
+        self.assertEqual(sorted(e["content"] for _, _, e in again), ["PV en ligne", "pancartes ?", "rdv 14h"])
+
+
+class TestRunBounded(unittest.TestCase):
+    def test_concurrency_is_bounded_and_order_kept(self):
+        running = 0
+        peak = 0
+
+        async def work(x):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+            if x == 3:
+                raise RuntimeError("boom")
+            return x * 2
+
+        results = asyncio.run(run_bounded(range(10), work, concurrency=3))
+        self.assertLessEqual(peak, 3)
+        self.assertEqual(results[:3], [0, 2, 4])
+        self.assertIsInstance(results[3], RuntimeError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+# tests/test_topics.py
+
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from bot import topics
+from bot.topics import cluster_topics, hash_vectorize, minibatch_kmeans, tokenize
+
+
+def _items():
+    themes = {
+        "budget": "budget subsides rapport financier justificatifs",
+        "formation": "formation juristes atelier victimes accompagnement",
+    }
+    items = []
+    for i in range(12):
+        for name, words in themes.items():
+            w = words.split()
+            items.append((f"canal-{i % 3}", {"content": " ".join(w[i % 2:] + w[:i % 2]), "theme": name}))
+    return items
+
+
+class TestTopics(unittest.TestCase):
+    def test_hash_vectorize_is_normalized(self):
+        X = hash_vectorize([tokenize("réunion budget jeudi"), []])
+        self.assertAlmostEqual(float(np.linalg.norm(X[0])), 1.0, places=5)
+        self.assertEqual(float(np.abs(X[1]).sum()), 0.0)
+
+    def test_clusters_group_messages_by_theme(self):
+        topics = cluster_topics(_items(), k=2)
+        self.assertEqual(len(topics), 2)
+        for topic in topics:
+            self.assertEqual(len({m["theme"] for _ch, m in topic["examples"]}), 1)
+            self.assertGreaterEqual(len(topic["channels"]), 2)
+
+    def test_too_few_messages(self):
+        self.assertEqual(cluster_topics(_items()[:4]), [])
+
+    def test_kmeans_iterations_touch_bounded_samples(self):
+        # le temps est suivi par python -m bot.bench (cluster_topics) ; ici on
+        # vérifie que chaque passe ne lit qu'un mini-lot, quel que soit n
+        sizes = []
+        real_rng = np.random.default_rng
+
+        class _Rng:
+            def __init__(self, seed):
+                self._rng = real_rng(seed)
+
+            def choice(self, n, size=None, **kwargs):
+                sizes.append(size)
+                return self._rng.choice(n, size=size, **kwargs)
+
+            def __getattr__(self, name):
+                return getattr(self._rng, name)
+
+        X = hash_vectorize([tokenize(f"message {i % 97} budget réunion") for i in range(3000)])
+        self.assertEqual(X.shape, (3000, topics.N_FEATURES))
+        with patch.object(topics.np.random, "default_rng", _Rng):
+            labels, centers = minibatch_kmeans(X, 4, batch_size=64, n_iter=10)
+        self.assertEqual((len(labels), centers.shape), (3000, (4, topics.N_FEATURES)))
+        batches = [s for s in sizes if s is not None]
+        self.assertEqual(batches, [80] + [64] * 10)  # 20·k pour l'init, puis un mini-lot par passe
+
+
+if __name__ == "__main__":
+    unittest.main()